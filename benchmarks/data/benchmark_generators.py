@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from generate_all import collect_jobs, database_generator_util_path, schema_file, distribution_name, read_report
+from database_generator.database_generator import DatabaseGenerator, zipf_transform, generate_pair
+
+
+# size every script is run at; big enough that interpreter start up does not
+# dominate, small enough for the whole suite to take minutes
+DEFAULT_SIZE = "100K"
+DEFAULT_REPEAT = 3
+# the microbenchmarks take a fraction of a second, so they can afford more runs
+DEFAULT_MICRO_REPEAT = 10
+# compare flags an entry when it got slower than this, relative to the baseline
+DEFAULT_THRESHOLD = 0.2
+
+
+def summarize_times(times):
+    # min is the least noisy estimate of the cost, median shows the spread
+    return {"times": [round(t, 4) for t in times],
+            "min": round(min(times), 4),
+            "median": round(statistics.median(times), 4)}
+
+
+def run_script(job, tmp_root):
+    """Run one generator script in a scratch directory; returns (exit code, seconds, run report)."""
+    work_dir = tempfile.mkdtemp(prefix=job.distribution + "_" + job.problem_id + "_", dir=tmp_root)
+    try:
+        shutil.copytree(database_generator_util_path, work_dir + "/database_generator")
+        shutil.copy(job.script, work_dir + "/db_script.py")
+        env = dict(os.environ)
+        env["DBGEN_SCHEMA"] = schema_file(job)
+        env["DBGEN_DISTRIBUTION"] = distribution_name(job)
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "db_script.py", job.size], cwd=work_dir, env=env,
+                                stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return result.returncode, elapsed, None
+        return 0, elapsed, read_report(work_dir + "/output")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_scripts(size, repeat, problems=None, distributions=None):
+    results = {}
+    jobs = sorted(collect_jobs(problems, distributions, [size]), key=lambda job: job.script)
+    tmp_root = tempfile.mkdtemp(prefix="bench_")
+    try:
+        for i, job in enumerate(jobs, 1):
+            name = job.distribution + "/" + job.problem_id
+            times, peak = [], 0.0
+            for _ in range(repeat):
+                returncode, elapsed, report = run_script(job, tmp_root)
+                if returncode != 0:
+                    break
+                times.append(elapsed)
+                if report:
+                    peak = max(peak, report["peak_rss_mb"])
+            if returncode != 0:
+                # a failed script gets no timings, the rest of the suite still runs
+                results[name] = {"returncode": returncode}
+                print("%-40s FAILED (%d)  (%d/%d)" % (name, returncode, i, len(jobs)), flush=True)
+                continue
+            entry = summarize_times(times)
+            entry["peak_rss_mb"] = peak
+            results[name] = entry
+            print("%-40s %8.3fs  (%d/%d)" % (name, entry["min"], i, len(jobs)), flush=True)
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+    return results
+
+
+def time_call(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return summarize_times(times)
+
+
+def bench_zipf_transform(n=100000):
+    pool = list(range(n))
+    return lambda: zipf_transform(pool)
+
+
+def bench_generate_pair(k=100000):
+    pool1, pool2 = list(range(10000)), list(range(100))
+
+    def run():
+        random.seed(2333)
+        for _ in range(k):
+            generate_pair(pool1, pool2)
+    return run
+
+
+def bench_output(work_dir, rows=100000):
+    # the row-built table shape most scripts still use: names, types, then rows
+    rng = np.random.default_rng(2333)
+    dates = (np.datetime64('2020-01-01') + rng.integers(0, 1000, rows)).astype(object)
+    data = [['id', 'name', 'amount', 'day', 'flag'], ['int', 'str', 'int', 'date', 'boolean']]
+    data += [[i, 'name_' + str(i % 1000), int(v), d, 'TRUE' if v % 2 else 'FALSE']
+             for i, v, d in zip(range(rows), rng.integers(0, 5000, rows), dates)]
+
+    def run():
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            generator = DatabaseGenerator(size=str(rows), problem_id="bench", script_file=__file__,
+                                          formats=['csv'])
+            generator.output("T", data)
+        finally:
+            os.chdir(cwd)
+    return run
+
+
+def bench_micro(repeat):
+    work_dir = tempfile.mkdtemp(prefix="bench_micro_")
+    try:
+        cases = {
+            "zipf_transform_100K": bench_zipf_transform(),
+            "generate_pair_100K": bench_generate_pair(),
+            "DatabaseGenerator.output_100K": bench_output(work_dir),
+        }
+        results = {}
+        for name, func in cases.items():
+            func()  # warm up
+            results[name] = time_call(func, repeat)
+            print("%-40s %8.3fs" % (name, results[name]["min"]), flush=True)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def environment():
+    return {"python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count()}
+
+
+def run(args):
+    results = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "size": args.size,
+               "repeat": args.repeat,
+               "micro_repeat": args.micro_repeat,
+               "environment": environment(),
+               "micro": {},
+               "scripts": {}}
+    if not args.scripts_only:
+        results["micro"] = bench_micro(args.micro_repeat)
+    if not args.micro_only:
+        results["scripts"] = bench_scripts(args.size, args.repeat, args.problems, args.distributions)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print("wrote " + args.out)
+    failed = failed_entries(results)
+    for name, returncode in failed:
+        print("failed: %s (exit code %d)" % (name, returncode))
+    return 1 if failed else 0
+
+
+def failed_entries(results):
+    """(section/name, exit code) of every entry whose script failed."""
+    return [(section + "/" + name, entry["returncode"])
+            for section in ("micro", "scripts") for name, entry in sorted(results.get(section, {}).items())
+            if entry.get("returncode")]
+
+
+def compare_results(baseline, current, threshold):
+    """(section/name, baseline min, current min, ratio, flagged) for every entry timed in both files."""
+    rows = []
+    for section in ("micro", "scripts"):
+        for name, entry in sorted(current.get(section, {}).items()):
+            old = baseline.get(section, {}).get(name)
+            if old is None or "min" not in old or "min" not in entry:
+                continue
+            ratio = entry["min"] / old["min"] if old["min"] > 0 else float("inf")
+            rows.append((section + "/" + name, old["min"], entry["min"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("size") != current.get("size"):
+        print("warning: baseline was run at size %s, current at %s" % (baseline.get("size"), current.get("size")))
+    if baseline.get("environment") != current.get("environment"):
+        print("warning: the two runs come from different environments, timings may not be comparable")
+    rows = compare_results(baseline, current, args.threshold)
+    slower = [r for r in rows if r[4]]
+    for name, old, new, ratio, flagged in rows:
+        if flagged or args.verbose:
+            print("%-50s %8.3fs -> %8.3fs  %5.2fx%s" % (name, old, new, ratio, "  SLOWER" if flagged else ""))
+    print("%d of %d entries are more than %.0f%% slower than the baseline"
+          % (len(slower), len(rows), args.threshold * 100))
+    failed = failed_entries(current)
+    for name, returncode in failed:
+        print("%-50s FAILED (exit code %d)" % (name, returncode))
+    return 1 if slower or failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the database generators.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time every script and the microbenchmarks, write a JSON file")
+    run_parser.add_argument("--out", default="generator_bench.json", help="result file (default: generator_bench.json)")
+    run_parser.add_argument("--size", default=DEFAULT_SIZE, help="size every script is run at (default: %s)" % DEFAULT_SIZE)
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                            help="runs per entry, the fastest one counts (default: %d)" % DEFAULT_REPEAT)
+    run_parser.add_argument("--micro-repeat", type=int, default=DEFAULT_MICRO_REPEAT,
+                            help="runs per microbenchmark (default: %d)" % DEFAULT_MICRO_REPEAT)
+    run_parser.add_argument("--problems", nargs="+", help="only benchmark these problem ids")
+    run_parser.add_argument("--distributions", nargs="+", help="only benchmark these distributions")
+    run_parser.add_argument("--micro-only", action="store_true", help="skip the generator scripts")
+    run_parser.add_argument("--scripts-only", action="store_true", help="skip the microbenchmarks")
+
+    compare_parser = commands.add_parser("compare", help="flag entries that got slower than a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="relative slowdown that is flagged (default: %.2f)" % DEFAULT_THRESHOLD)
+    compare_parser.add_argument("--verbose", action="store_true", help="list every entry, not only the slower ones")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
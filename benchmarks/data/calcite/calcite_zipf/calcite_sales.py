@@ -1,6 +1,8 @@
 import random
-from database_generator.database_generator import DatabaseGenerator, zipf_transform
-from faker import Faker
+import numpy as np
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import random_dates, prefixed
+from database_generator.sampling import ZipfSampler, apply_nulls
 import datetime
 import sys
 
@@ -12,22 +14,12 @@ def generate_pair(pool1, pool2):
 dbsize = sys.argv[1]
 
 # some setups
-db_generator = DatabaseGenerator(size=dbsize, script_file=__file__,
-                                 problem_id="calcite_sales")
-
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
+db_generator = DatabaseGenerator(size=dbsize, script_file=__file__,
+                                 problem_id="calcite_sales", seed=seed)
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == 'calcite_4M':
-    size = 4000000
-elif dbsize == 'calcite_1M':
-    size = 1000000
-elif dbsize == 'calcite_250K':
-    size = 250000
+size = db_generator.rows
 
 
 emp_num = size
@@ -41,139 +33,108 @@ comm_num = 1000
 null_prob = 0.1
 
 
-empno = list(range(emp_num))
-deptno = list(range(dept_num))
+empno = np.arange(emp_num)
+deptno = np.arange(dept_num)
+
+ename_pool = np.concatenate([prefixed('ename_', ename_num),
+                             ['foo', 'bar', 'John', 'SMITH', 'A', 'ok', 'rookie']])
 
-ename_pool = ['ename_' + str(i) for i in range(ename_num)]
-ename_pool.append('foo')
-ename_pool.append('bar')
-ename_pool.append('John')
-ename_pool.append('SMITH')
-ename_pool.append('A')
-ename_pool.append('ok')
-ename_pool.append('rookie')
+dname_pool = np.concatenate([prefixed('dname_', dname_num), ['CLERK', 'Charlie', 'Propane']])
 
-dname_pool = ['dname_' + str(i) for i in range(dname_num)]
-dname_pool.append('CLERK')
-dname_pool.append('Charlie')
-dname_pool.append('Propane')
+def pool_rng(name):
+    # every pool draws from its own stream, see database_generator/streams.py
+    return db_generator.streams.rng("pools", name)
 
-mgr_pool = random.choices(empno, k=mgr_num)
+mgr_pool = pool_rng("MGR").choice(empno, mgr_num)
 
-date_pool = [fake.date_between(datetime.date(2009,1,1), datetime.date(2022,11,30)) for _ in range(date_num)]
-date_pool.append(datetime.date(2022,1,1))
-date_pool.append(datetime.date(2020,12,11))
+date_pool = np.concatenate([random_dates(datetime.date(2009,1,1), datetime.date(2022,11,30), date_num, pool_rng("HIREDATE")),
+                            np.array(['2022-01-01', '2020-12-11'], dtype='datetime64[D]')])
 
-birth_date_pool = [fake.date_between(datetime.date(2000,1,1), datetime.date(2015,11,30)) for _ in range(date_num)]
+birth_date_pool = random_dates(datetime.date(2000,1,1), datetime.date(2015,11,30), date_num, pool_rng("BIRTHDATE"))
 
-salary_pool = random.choices(list(range(1,3000)), k=salary_num)
-salary_pool.append(4)
-salary_pool.append(1000)
-salary_pool.append(2000)
-salary_pool.append(5000)
+salary_pool = np.concatenate([pool_rng("SAL").integers(1, 3000, size=salary_num), [4, 1000, 2000, 5000]])
 
-comm_pool = random.choices(list(range(30)), k=comm_num)
-comm_pool.append(10)
-comm_pool.append(100)
-comm_pool.append(200)
-comm_pool.append(500)
+comm_pool = np.concatenate([pool_rng("COMM").integers(0, 30, size=comm_num), [10, 100, 200, 500]])
 
 slacker_pool = ['TRUE', 'FALSE']
 
-depno_zipf_pool = zipf_transform(deptno)
-ename_zipf_pool = zipf_transform(ename_pool)
-dname_zipf_pool = zipf_transform(dname_pool)
-mgr_zipf_pool = zipf_transform(mgr_pool)
-date_zipf_pool = zipf_transform(date_pool)
-salary_zipf_pool = zipf_transform(salary_pool)
-comm_zipf_pool = zipf_transform(comm_pool)
-slacker_zipf_pool = zipf_transform(slacker_pool)
-birth_date_zipf_pool = zipf_transform(birth_date_pool)
-
-# fill in columns
-
-emp_table = []
-emp_b_table = []
-empnullables_table = []
-empnullables_20_table = []
-
-dept_table = []
-bonus_table = []
-
-
-emp_table.append(['EMPNO','DEPTNO','ENAME','JOB','MGR','HIREDATE','SAL','COMM','SLACKER'])
-emp_table.append(['int','int','str','str','int','date','int','int','boolean'])
-
-empnullables_table.append(['EMPNO','DEPTNO','ENAME','JOB','MGR','HIREDATE','SAL','COMM','SLACKER'])
-empnullables_table.append(['int','int','str','str','int','date','int','int','boolean'])
-
-empnullables_20_table.append(['EMPNO','DEPTNO','ENAME','JOB','MGR','HIREDATE','SAL','COMM','SLACKER'])
-empnullables_20_table.append(['int','int','str','str','int','date','int','int','boolean'])
-
-emp_b_table.append(['EMPNO','DEPTNO','ENAME','JOB','MGR','HIREDATE','SAL','COMM','SLACKER','BIRTHDATE'])
-emp_b_table.append(['int','int','str','str','int','date','int','int','boolean','date'])
-
-for i in range(emp_num):
-    emp_table.append([empno[i],
-                      random.choice(depno_zipf_pool),
-                      random.choice(ename_pool),
-                      random.choice(dname_zipf_pool),
-                      random.choice(mgr_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                      random.choice(date_zipf_pool),
-                      random.choice(salary_zipf_pool),
-                      random.choice(comm_zipf_pool),
-                      random.choice(slacker_zipf_pool)])
-
-    emp_b_table.append([empno[i],
-                      random.choice(depno_zipf_pool),
-                      random.choice(ename_pool),
-                      random.choice(dname_zipf_pool),
-                      random.choice(mgr_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                      random.choice(date_zipf_pool),
-                      random.choice(salary_zipf_pool),
-                      random.choice(comm_zipf_pool),
-                      random.choice(slacker_zipf_pool),
-                      random.choice(birth_date_zipf_pool)])
-
-    empnullables_table.append([empno[i],
-                              random.choice(depno_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(ename_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(dname_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(mgr_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(date_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(salary_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(comm_zipf_pool) if random.uniform(0, 1) > null_prob else '',
-                              random.choice(slacker_zipf_pool) if random.uniform(0, 1) > null_prob else ''])
-
-
-for row in empnullables_table:
-    if row[1] != '' and row[6] != '' and row[1] == 20 and row[6] > 1000:
-        empnullables_20_table.append(row)
-
-dept_table.append(['DEPTNO','NAME'])
-dept_table.append(['int','str'])
-
-bonus_table.append(['ENAME','JOB','SAL','COMM'])
-bonus_table.append(['str','str','int','int'])
-
-for i in range(dept_num):
-    dept_table.append([deptno[i], random.choice(dname_pool)])
-
-
-for i in range(size):
-    bonus_table.append([random.choice(ename_zipf_pool),
-                       random.choice(dname_zipf_pool),
-                       random.choice(salary_zipf_pool),
-                       random.choice(comm_zipf_pool)])
+depno_zipf_pool = ZipfSampler(deptno)
+ename_zipf_pool = ZipfSampler(ename_pool)
+dname_zipf_pool = ZipfSampler(dname_pool)
+mgr_zipf_pool = ZipfSampler(mgr_pool)
+date_zipf_pool = ZipfSampler(date_pool)
+salary_zipf_pool = ZipfSampler(salary_pool)
+comm_zipf_pool = ZipfSampler(comm_pool)
+slacker_zipf_pool = ZipfSampler(slacker_pool)
+birth_date_zipf_pool = ZipfSampler(birth_date_pool)
 
+# fill in columns, one shard of rows at a time; every column draws from the
+# shard's own stream, so shards can be built by any number of workers
+
+emp_header = ['EMPNO','DEPTNO','ENAME','JOB','MGR','HIREDATE','SAL','COMM','SLACKER']
+emp_types = ['int','int','str','str','int','date','int','int','boolean']
+
+
+def draw(shard, column, zipf_pool):
+    return zipf_pool.sample(shard.size, shard.rng(column))
+
+
+def emp_values(shard):
+    return [shard.rows,
+            draw(shard, 'DEPTNO', depno_zipf_pool),
+            shard.sampler('ENAME').choice(ename_pool, shard.size),
+            draw(shard, 'JOB', dname_zipf_pool),
+            draw(shard, 'MGR', mgr_zipf_pool),
+            draw(shard, 'HIREDATE', date_zipf_pool),
+            draw(shard, 'SAL', salary_zipf_pool),
+            draw(shard, 'COMM', comm_zipf_pool),
+            draw(shard, 'SLACKER', slacker_zipf_pool)]
 
-# output tables
-db_generator.output("EMP", emp_table)
-db_generator.output("EMPNULLABLES", empnullables_table)
-db_generator.output("EMPNULLABLES_20", empnullables_20_table)
-db_generator.output("EMP_B", emp_b_table)
 
-db_generator.output("DEPT", dept_table)
-db_generator.output("BONUS", bonus_table)
+def build_emp(shard):
+    columns = emp_values(shard)
+    columns[4] = shard.sampler('MGR_NULLS').with_nulls(columns[4], null_prob)
+    return columns
 
 
+def build_emp_b(shard):
+    return build_emp(shard) + [draw(shard, 'BIRTHDATE', birth_date_zipf_pool)]
+
+
+def build_empnullables(shard):
+    # every column but EMPNO can be null
+    columns = emp_values(shard)
+    masks = [shard.sampler(name + '_NULLS').null_mask(shard.size, null_prob) for name in emp_header[1:]]
+    return columns[:1] + [apply_nulls(c, m) for c, m in zip(columns[1:], masks)]
+
+
+def department_20_high_salary(columns):
+    # EMPNULLABLES_20 keeps the rows of department 20 earning more than 1000;
+    # a null DEPTNO or SAL never matches
+    deptno, sal = columns[1], columns[6]
+    keep = (deptno != '') & (sal != '')
+    keep[keep] = (deptno[keep].astype(np.int64) == 20) & (sal[keep].astype(np.int64) > 1000)
+    return keep
+
+
+def build_dept(shard):
+    return [shard.rows, shard.sampler('NAME').choice(dname_pool, shard.size)]
+
+
+def build_bonus(shard):
+    return [draw(shard, 'ENAME', ename_zipf_pool),
+            draw(shard, 'JOB', dname_zipf_pool),
+            draw(shard, 'SAL', salary_zipf_pool),
+            draw(shard, 'COMM', comm_zipf_pool)]
+
+
+# output tables
+db_generator.output_sharded("EMP", emp_header, emp_types, emp_num, build_emp)
+db_generator.output_sharded("EMPNULLABLES", emp_header, emp_types, emp_num, build_empnullables)
+# built from the EMPNULLABLES streams, so its rows are exactly the EMPNULLABLES rows it keeps
+db_generator.output_sharded("EMPNULLABLES_20", emp_header, emp_types, emp_num, build_empnullables,
+                            stream="EMPNULLABLES", where=department_20_high_salary)
+db_generator.output_sharded("EMP_B", emp_header + ['BIRTHDATE'], emp_types + ['date'], emp_num, build_emp_b)
+
+db_generator.output_sharded("DEPT", ['DEPTNO','NAME'], ['int','str'], dept_num, build_dept)
+db_generator.output_sharded("BONUS", ['ENAME','JOB','SAL','COMM'], ['str','str','int','int'], size, build_bonus)
@@ -0,0 +1,280 @@
+"""
+Canonical forms of SQL queries, to find the queries of a problem that only
+differ in spelling: case, whitespace, comments, quoting, literal syntax,
+optional keywords (AS, INNER, OUTER) and the names given to aliases.
+
+canonicalize() tokenizes a query and writes it back out in one spelling:
+keywords and function names in lower case, identifiers in the case the
+dialect folds them to, strings in single quotes, '!=' as '<>', 'left outer
+join' as 'left join', no AS before aliases, and table aliases renamed t1,
+t2, ... and column aliases c1, c2, ... in order of definition. Names of
+the schema are never renamed, so two queries only share a canonical form
+if they read the same columns of the same tables; they can still differ in
+the names of their output columns. fingerprint() is a hash of that form.
+
+There is no full parser behind this: aliases are recognized by where they
+stand, which is enough for the queries of the benchmarks. A word taken for
+an alias by mistake is renamed consistently across the query, so it can
+only hide a duplicate, never merge two different queries, as long as the
+schema names are passed in.
+"""
+
+import hashlib
+import os
+import re
+from collections import namedtuple
+from database_generator.schema import load_schema
+
+DIALECTS = ('mysql', 'ansi')
+
+Token = namedtuple("Token", ["kind", "text"])
+
+TOKEN = re.compile(r"""
+    (?P<space>\s+|--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\]|\\.|'')*')
+  | (?P<dquoted>"(?:[^"\\]|\\.|"")*")
+  | (?P<backtick>`(?:[^`]|``)*`)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<variable>@@?[\w$.]+)
+  | (?P<word>[A-Za-z_][\w$]*)
+  | (?P<op><=>|<=|>=|<>|!=|\|\||::|:=|[-+*/%=<>!&|^~])
+  | (?P<punct>[(),.;])
+  | (?P<other>\S)
+""", re.X | re.S)
+
+# words that are never aliases or names
+KEYWORDS = frozenset("""
+    all and any as asc between both by case cast collate convert cross cube current desc distinct div else end escape
+    except exists false fetch filter first following for from full group grouping having if ignore in inner intersect
+    interval into is join last lateral leading left like limit minus mod natural next not null nulls offset on only or order
+    outer over partition preceding range recursive regexp right rlike rollup row rows select separator set sets some
+    straight_join then ties to trailing true unbounded union unknown using values when where window with xor
+""".split())
+# keywords that are also functions, written without a space before '('
+CALL_KEYWORDS = frozenset(("cast", "convert", "grouping", "if", "left", "mod", "right"))
+# the clause an alias is defined in tells a table alias from a column alias
+TABLE_CLAUSES = frozenset(("from", "join", "with"))
+CLAUSES = frozenset(("select", "from", "join", "on", "using", "where", "group", "having", "order", "limit",
+                     "window", "with", "union", "intersect", "except", "minus"))
+# AS inside these calls comes before a type, not an alias
+TYPE_CALLS = frozenset(("cast", "convert"))
+INTERVAL_UNITS = frozenset(("microsecond", "second", "minute", "hour", "day", "week", "month", "quarter", "year"))
+# optional words of a join and which of the two goes
+JOIN_NOISE = {("inner", "join"): "inner", ("left", "outer"): "outer", ("right", "outer"): "outer",
+              ("full", "outer"): "outer"}
+CALL = re.compile(r'\s*\(')
+SIMPLE_NAME = re.compile(r'^[A-Za-z_][\w$]*$')
+
+
+def unquote(text, quote, backslash):
+    # the value of a quoted token: doubled quotes, and with backslash also \x escapes
+    body = text[1:-1].replace(quote * 2, quote)
+    if backslash:
+        body = re.sub(r'\\(.)', lambda m: {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', 'b': '\b', 'Z': '\x1a'}
+                      .get(m.group(1), m.group(0) if m.group(1) in '%_' else m.group(1)), body)
+    return body
+
+
+def tokenize(sql, dialect='mysql'):
+    """
+    The tokens of a query, whitespace and comments left out. Words are
+    'keyword', 'name' (identifiers, quoted or not, in their folded case) or
+    'function' (a name right before '('); strings carry their value.
+    """
+    if dialect not in DIALECTS:
+        raise ValueError("unknown dialect '%s', expected one of %s" % (dialect, ", ".join(DIALECTS)))
+    mysql = dialect == 'mysql'
+    tokens = []
+    for match in TOKEN.finditer(sql):
+        kind, text = match.lastgroup, match.group()
+        if kind == 'space':
+            continue
+        if kind == 'word':
+            lower = text.lower()
+            call = CALL.match(sql, match.end()) and not (tokens and tokens[-1].text == '.')
+            if lower in KEYWORDS and not (call and lower in CALL_KEYWORDS):
+                tokens.append(Token('keyword', lower))
+            elif call:
+                # function names are not case sensitive in either dialect
+                tokens.append(Token('function', lower))
+            else:
+                # mysql compares column names without case, unquoted ansi names are upper case
+                tokens.append(Token('name', lower if mysql else text.upper()))
+        elif kind == 'string':
+            tokens.append(Token('string', unquote(text, "'", mysql)))
+        elif kind == 'dquoted':
+            # a string in mysql, a quoted name otherwise
+            tokens.append(Token('string', unquote(text, '"', True)) if mysql else Token('name', unquote(text, '"', False)))
+        elif kind == 'backtick':
+            tokens.append(Token('name', unquote(text, '`', False).lower()))
+        elif kind == 'number':
+            text = text.lower()
+            tokens.append(Token('number', '0' + text if text.startswith('.') else text))
+        elif kind == 'op':
+            tokens.append(Token('op', '<>' if text == '!=' else text))
+        else:
+            tokens.append(Token(kind, text))
+    return tokens
+
+
+def drop_noise(tokens):
+    # 'inner join' -> 'join', 'left outer join' -> 'left join', no trailing ';'
+    out = []
+    for token in tokens:
+        noise = JOIN_NOISE.get((out[-1].text, token.text)) if out and out[-1].kind == token.kind == 'keyword' else None
+        if noise == token.text:
+            continue
+        if noise is not None:
+            out.pop()
+        out.append(token)
+    while out and out[-1].text == ';':
+        out.pop()
+    return out
+
+
+def find_aliases(tokens):
+    """
+    Drop every AS that comes before an alias and return the tokens with
+    the aliases found: name -> ('table' or 'column', the token before it).
+    """
+    out = []
+    aliases = {}
+    # per open parenthesis: the word it follows and the current clause inside it
+    calls, clauses = [None], [None]
+
+    def define(name, before):
+        kind = 'table' if clauses[-1] in TABLE_CLAUSES else 'column'
+        aliases.setdefault(name, (kind, before))
+
+    for i, token in enumerate(tokens):
+        prev = out[-1] if out else None
+        after = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token.text == '(' and token.kind == 'punct':
+            calls.append(prev.text if prev is not None else None)
+            clauses.append(None)
+        elif token.text == ')' and token.kind == 'punct' and len(calls) > 1:
+            calls.pop()
+            clauses.pop()
+        elif token.kind == 'keyword' and token.text in CLAUSES:
+            clauses[-1] = token.text
+        if token.kind == 'keyword' and token.text == 'as' and calls[-1] not in TYPE_CALLS:
+            if after is not None and after.kind == 'name' and prev is not None:
+                # x AS alias: the alias is defined, the AS is noise
+                define(after.text, prev)
+                continue
+            if after is not None and after.kind == 'string':
+                # mysql takes a string as an alias too
+                tokens[i + 1] = Token('name', after.text)
+                define(after.text, prev)
+                continue
+            if after is not None and after.text == '(' and prev is not None and prev.kind == 'name':
+                # WITH name AS (...)
+                define(prev.text, None)
+        elif token.kind == 'name' and prev is not None and calls[-1] not in TYPE_CALLS and \
+                (after is None or after.text not in ('.', '(')):
+            # an implicit alias follows a name, a literal, a closing parenthesis or CASE's END
+            follows = prev.kind in ('name', 'number', 'string') or prev.text in (')', 'end', 'true', 'false', 'null')
+            interval = token.text in INTERVAL_UNITS and any(t.text == 'interval' for t in out[-4:])
+            if follows and not interval:
+                define(token.text, prev)
+        out.append(token)
+    return out, aliases
+
+
+def rename_aliases(tokens, aliases, names=None):
+    """
+    Rename the aliases t1, t2, ... (tables) and c1, c2, ... (columns). With
+    names (the lower case table and column names of the schema), names of
+    the schema keep theirs; without, only table aliases are renamed, and
+    not one spelled like the table it names.
+    """
+    renames = {}
+    counts = {'table': 0, 'column': 0}
+    for name, (kind, before) in aliases.items():
+        if names is not None and name.lower() in names:
+            continue
+        if names is None and (kind == 'column' or (before is not None and before.text == name)):
+            continue
+        counts[kind] += 1
+        renames[name] = "%s%d" % (kind[0], counts[kind])
+    return [Token('name', renames[t.text]) if t.kind == 'name' and t.text in renames else t for t in tokens]
+
+
+def render_name(name, dialect):
+    if dialect == 'mysql':
+        return name if SIMPLE_NAME.match(name) and name.lower() not in KEYWORDS else '`%s`' % name.replace('`', '``')
+    if SIMPLE_NAME.match(name) and name == name.upper() and name.lower() not in KEYWORDS:
+        return name
+    return '"%s"' % name.replace('"', '""')
+
+
+def render(tokens, dialect='mysql'):
+    """Write tokens back out as SQL, single spaced."""
+    parts = []
+    for i, token in enumerate(tokens):
+        if token.kind == 'name':
+            text = render_name(token.text, dialect)
+        elif token.kind == 'string':
+            value = token.text.replace('\\', '\\\\') if dialect == 'mysql' else token.text
+            text = "'%s'" % value.replace("'", "''")
+        else:
+            text = token.text
+        prev = tokens[i - 1] if i else None
+        glued = prev is None or prev.text in ('.', '(') or token.text in ('.', ',', ')') or \
+            (token.text == '(' and prev.kind == 'function')
+        parts.append(text if glued else ' ' + text)
+    return ''.join(parts)
+
+
+def canonicalize(sql, dialect='mysql', names=None):
+    """The canonical form of a query, see the module docstring. names: lower case schema names, or None."""
+    tokens, aliases = find_aliases(drop_noise(tokenize(sql, dialect)))
+    return render(rename_aliases(tokens, aliases, names), dialect)
+
+
+def fingerprint(canonical):
+    """Stable 16 hex digit hash of a canonical form."""
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+
+def schema_names(schema):
+    """The lower case table and column names of a Schema (database_generator/schema.py)."""
+    names = set()
+    for table in schema.tables:
+        names.add(table.name.lower())
+        names.update(c.name.lower() for c in table.columns)
+    return names
+
+
+def dialect_of(benchmark):
+    # LeetCode queries are MySQL, the calcite ones quote names the ANSI way
+    return 'mysql' if benchmark == 'leetcode' else 'ansi'
+
+
+def dedup(queries, dialect='mysql', names=None):
+    """
+    Group queries [(query id, sql)] by canonical form: {fingerprint:
+    {"canonical": sql, "queries": [ids]}}, in order of each form's first
+    query; the first id of every group is the one to run.
+    """
+    groups = {}
+    for query_id, sql in sorted(queries):
+        canonical = canonicalize(sql, dialect, names)
+        group = groups.setdefault(fingerprint(canonical), {"canonical": canonical, "queries": []})
+        group["queries"].append(query_id)
+    return groups
+
+
+def representatives(groups):
+    """query id -> id of the query to run in its place, from dedup()'s groups."""
+    return {query_id: group["queries"][0] for group in groups.values() for query_id in group["queries"]}
+
+
+def dedup_problem(corpus, benchmark, problem, schemas_dir=None):
+    """dedup() over one problem of a corpus (corpus/pack.py), with the names of its schema if there is one."""
+    names = None
+    if schemas_dir is not None:
+        path = os.path.join(schemas_dir, problem + ".json")
+        if os.path.exists(path):
+            names = schema_names(load_schema(path))
+    return dedup(corpus.problem(benchmark, problem), dialect_of(benchmark), names)
@@ -0,0 +1,219 @@
+"""
+Runs benchmark queries against generated databases in SQLite and times
+them. An output folder of generate_all.py is loaded into
+<folder>/<problem>.sqlite (the file DBGEN_FORMATS=sqlite writes, reused if
+it is newer than the CSV files), then every query runs in a pool of worker
+processes, each with its own read-only connections.
+
+A query runs a few untimed warm-up times, then is timed over a number of
+repetitions; a run is the execution and fetching every row. If asked, one
+more untimed run folds the rows into a digest of the result (results.py),
+to find the queries that return the same thing. Runs longer
+than the timeout are interrupted by a SQLite progress handler, and a
+worker that dies takes only its query down: the queries that were running
+when it died run again, one at a time, and the one that kills its worker
+again is reported as crashed; the queries that had not started go to a
+fresh pool of the same size.
+"""
+
+import math
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from database_generator.sinks import open_csv
+from database_generator.sqlite_sink import SQLiteTableSink
+from database_generator.validate import read_columns, read_header, table_path
+from .results import ResultDigest, is_ordered
+
+# virtual machine steps between two looks at the clock
+PROGRESS_STEPS = 10000
+FETCH_SIZE = 10000
+
+
+def sqlite_path(folder, problem):
+    # the file DBGEN_FORMATS=sqlite writes: databases/leetcode_zipf/1M/1050 -> .../1050/1050.sqlite
+    return os.path.join(folder, problem + ".sqlite")
+
+
+def load_sqlite(folder, schema, block_size=1 << 23):
+    """
+    The SQLite file of an output folder, loaded from its CSV files (with the
+    primary and foreign key indexes of the schema) unless it is newer than
+    all of them.
+    """
+    path = sqlite_path(folder, schema.problem)
+    tables = [(t, table_path(folder, t.name)) for t in schema.tables]
+    tables = [(t, p) for t, p in tables if p is not None]
+    if not tables:
+        raise ValueError("%s holds no table of problem %s" % (folder, schema.problem))
+    if os.path.exists(path) and all(os.path.getmtime(p) <= os.path.getmtime(path) for _, p in tables):
+        return path
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    for table, csv_path in tables:
+        names, types = read_header(csv_path)
+        # SQLiteTableSink declares INTEGER and REAL columns, so the CSV text is stored as numbers
+        with SQLiteTableSink(tmp_path, table.name, names, types, table) as sink, open_csv(csv_path) as f:
+            f.readline()
+            f.readline()
+            while True:
+                block = read_columns(f, len(names), block_size)
+                if block is None:
+                    break
+                columns, length = block
+                if length:
+                    sink.write_columns(columns)
+    os.replace(tmp_path, path)
+    return path
+
+
+# per worker process: database path -> read-only connection
+connections = {}
+# per worker process: a shared flag per job of the pool, set when the job starts
+started = None
+
+
+def connect(path, memory_limit=None):
+    conn = connections.get(path)
+    if conn is None:
+        uri = "file:%s?mode=ro" % urllib.parse.quote(os.path.abspath(path))
+        conn = connections[path] = sqlite3.connect(uri, uri=True)
+        conn.execute("PRAGMA query_only=ON")
+        if memory_limit:
+            # a query that needs more fails with "out of memory" instead of swapping the machine
+            conn.execute("PRAGMA hard_heap_limit=%d" % memory_limit)
+    return conn
+
+
+def run_query(path, sql, warmup=1, repeat=5, timeout=None, memory_limit=None, digest=False):
+    """
+    Runs in a worker: warmup untimed runs of sql, then repeat timed ones,
+    then with digest one to fingerprint the result.
+    Returns {"status": "ok", "error" or "timeout", "rows", "times" (seconds),
+    "error" (the message), "digest"}.
+    """
+    conn = connect(path, memory_limit)
+    deadline = math.inf
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, PROGRESS_STEPS)
+    result = {"status": "ok", "rows": None, "times": [], "error": None, "digest": None}
+    for run in range(warmup + repeat + (1 if digest else 0)):
+        fold = ResultDigest(is_ordered(sql)) if run == warmup + repeat else None
+        start = time.perf_counter()
+        deadline = start + timeout if timeout else math.inf
+        rows = 0
+        try:
+            cursor = conn.execute(sql)
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    break
+                rows += len(batch)
+                if fold is not None:
+                    fold.add_rows(batch)
+        except sqlite3.Error as e:
+            if time.perf_counter() > deadline and str(e) == "interrupted":
+                result.update(status="timeout", error="interrupted after %g s" % timeout)
+            else:
+                result.update(status="error", error=str(e))
+            break
+        finally:
+            deadline = math.inf
+        elapsed = time.perf_counter() - start
+        result["rows"] = rows
+        if fold is not None:
+            fold.columns = len(cursor.description or ())
+            result["digest"] = fold.digest()
+        elif run >= warmup:
+            result["times"].append(elapsed)
+    conn.set_progress_handler(None, 0)
+    return result
+
+
+def set_started(flags):
+    global started
+    started = flags
+
+
+def run_job(index, path, sql, *options):
+    started[index] = 1
+    return run_query(path, sql, *options)
+
+
+def run_pool(jobs, workers, options):
+    """
+    {key: result} of the jobs that finished, and of the jobs a dead worker
+    broke: those that were running and those that had not started yet.
+    """
+    context = multiprocessing.get_context("fork")
+    flags = context.RawArray('b', len(jobs))
+    results, running, waiting = {}, [], []
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=set_started, initargs=(flags,)) as pool:
+        futures = {pool.submit(run_job, i, path, sql, *options): i for i, (key, path, sql) in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[jobs[i][0]] = future.result()
+            except BrokenProcessPool:
+                (running if flags[i] else waiting).append(jobs[i])
+    return results, running, waiting
+
+
+def run_queries(jobs, workers=1, warmup=1, repeat=5, timeout=None, memory_limit=None, digest=False):
+    """
+    Run every job (key, database path, sql) in a pool of workers, see
+    run_query; returns {key: result}. Crashed queries get status "crashed".
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1, got %d" % repeat)
+    options = (warmup, repeat, timeout, memory_limit, digest)
+    results = {}
+    while jobs:
+        done, running, waiting = run_pool(jobs, max(1, min(workers, len(jobs))), options)
+        results.update(done)
+        if not running and len(waiting) == len(jobs):
+            # the pool broke before any query started: run them all alone
+            running, waiting = waiting, []
+        # a dead worker breaks every query of the pool: the ones that were
+        # running run again alone, the others in a fresh pool
+        for key, path, sql in sorted(running):
+            again, died, unstarted = run_pool([(key, path, sql)], 1, options)
+            results.update(again)
+            if died or unstarted:
+                results[key] = {"status": "crashed", "rows": None, "times": [], "error": "the worker process died",
+                                "digest": None}
+        jobs = waiting
+    return results
+
+
+def latency(times):
+    """min, median and 95th percentile (nearest rank) of run times, or Nones."""
+    if not times:
+        return None, None, None
+    ranked = sorted(times)
+    return ranked[0], statistics.median(ranked), ranked[math.ceil(0.95 * len(ranked)) - 1]
+
+
+def format_table(rows):
+    """
+    The latency table of rows (database, query id, result), one line per
+    query, times in milliseconds.
+    """
+    def ms(seconds):
+        return "-" if seconds is None else "%.3f" % (seconds * 1000)
+
+    lines = ["%-36s %6s %-8s %10s %10s %10s %10s" % ("database", "query", "status", "rows", "min ms", "median ms",
+                                                       "p95 ms")]
+    for database, query_id, result in rows:
+        status = result["status"] if "same_as" not in result else "=%d" % result["same_as"]
+        rows_out = "-" if result["rows"] is None else str(result["rows"])
+        lines.append("%-36s %6d %-8s %10s %10s %10s %10s"
+                     % ((database, query_id, status, rows_out) + tuple(map(ms, latency(result["times"])))))
+        if result["error"]:
+            lines.append("    " + result["error"])
+    return "\n".join(lines)
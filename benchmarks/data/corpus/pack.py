@@ -0,0 +1,238 @@
+"""
+Every benchmark query in one packed file: LeetCode/queries/*.csv,
+Calcite/queries/calcite_sales.csv and the testcase pairs of
+Calcite/queries/calcite_pairs.csv. The file holds the query texts, a table
+of entries and an open addressing hash table over their keys. It is memory
+mapped: opening it reads only the header and the list of sources, and
+looking a query up touches a few slots.
+
+Keys are "query/<benchmark>/<problem>/<id>" (leetcode/1050/4,
+calcite/calcite_sales/0), "problem/<benchmark>/<problem>" and
+"testcase/<name>". The pack records the size and mtime of every source
+file and open_corpus() rebuilds it when one of them changes.
+"""
+
+import csv
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+benchmarks_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+DEFAULT_PACK = os.path.join(benchmarks_path, "data", "cache", "queries.pack")
+
+MAGIC = b"SLABQPK1"
+# magic, then offset and length of the metadata, the entries, the slots and the text
+HEADER = struct.Struct("<8s8Q")
+# one row per key; a query spans [start, end) of the text, a testcase has its
+# second query in [start2, end2) and a problem its queries in entries [start, end)
+# (no numpy here: importing it would take longer than everything else)
+ENTRY = struct.Struct("<QQQqQQQQ")
+Entry = namedtuple("Entry", ["hash", "key_start", "key_end", "query_id", "start", "end", "start2", "end2"])
+SLOT = struct.Struct("<I")
+
+
+def key_hash(key):
+    # stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def query_files(benchmarks_dir=benchmarks_path):
+    """(benchmark, problem, path) of every file of queries, in key order."""
+    files = [("leetcode", os.path.splitext(os.path.basename(p))[0], p)
+             for p in glob.glob(os.path.join(benchmarks_dir, "LeetCode", "queries", "*.csv"))]
+    files.append(("calcite", "calcite_sales", os.path.join(benchmarks_dir, "Calcite", "queries", "calcite_sales.csv")))
+    return sorted(files)
+
+
+def pairs_file(benchmarks_dir=benchmarks_path):
+    return os.path.join(benchmarks_dir, "Calcite", "queries", "calcite_pairs.csv")
+
+
+def source_stamps(benchmarks_dir=benchmarks_path):
+    # what the pack was built from: relative path, size and mtime of every source file
+    paths = [p for _, _, p in query_files(benchmarks_dir)] + [pairs_file(benchmarks_dir)]
+    stamps = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stamps.append([os.path.relpath(path, benchmarks_dir), stat.st_size, stat.st_mtime_ns])
+    return stamps
+
+
+def read_rows(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def build_pack(path=DEFAULT_PACK, benchmarks_dir=benchmarks_path):
+    """Read every source file and write the pack to path, replacing it atomically."""
+    stamps = source_stamps(benchmarks_dir)
+    text = bytearray()
+    spans = {}
+
+    def put(value):
+        # identical strings (the testcase pairs repeat calcite_sales) are stored once
+        encoded = value.encode()
+        if encoded not in spans:
+            spans[encoded] = (len(text), len(text) + len(encoded))
+            text.extend(encoded)
+        return spans[encoded]
+
+    # (key, query id, start, end, start2, end2)
+    rows = []
+    problems = []
+    for benchmark, problem, source in query_files(benchmarks_dir):
+        first = len(rows)
+        queries = sorted((int(r[0]), r[1]) for r in read_rows(source) if r)
+        for query_id, sql in queries:
+            rows.append(("query/%s/%s/%d" % (benchmark, problem, query_id), query_id) + put(sql) + (0, 0))
+        problems.append(("problem/%s/%s" % (benchmark, problem), -1, first, len(rows), 0, 0))
+    query_count = len(rows)
+    rows += problems
+    if os.path.exists(pairs_file(benchmarks_dir)):
+        for name, q1, q2 in read_rows(pairs_file(benchmarks_dir))[1:]:
+            rows.append(("testcase/" + name, -1) + put(q1) + put(q2))
+
+    entries = bytearray()
+    slots = [0] * (1 << max(4, (2 * len(rows) - 1).bit_length()))
+    mask = len(slots) - 1
+    for i, (key, query_id, start, end, start2, end2) in enumerate(rows):
+        h = key_hash(key.encode())
+        key_start, key_end = put(key)
+        entries += ENTRY.pack(h, key_start, key_end, query_id, start, end, start2, end2)
+        slot = h & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = i + 1
+
+    meta = json.dumps({"sources": stamps, "queries": query_count, "entries": len(rows)}).encode()
+    offset = HEADER.size
+    sections = []
+    for blob in (meta, bytes(entries), struct.pack("<%dI" % len(slots), *slots), bytes(text)):
+        # 8 byte aligned, so the tables can be read in place
+        offset += -offset % 8
+        sections.append((offset, blob))
+        offset += len(blob)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, *[v for start, blob in sections for v in (start, len(blob))]))
+        for start, blob in sections:
+            f.write(b"\0" * (start - f.tell()))
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+class QueryCorpus:
+    """A built pack, memory mapped. Lookups raise KeyError for keys the corpus does not have."""
+
+    def __init__(self, path=DEFAULT_PACK):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_start, meta_length, entries_start, entries_length, slots_start, slots_length, \
+            text_start, text_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError("%s is not a query pack" % path)
+        self.meta = json.loads(self.map[meta_start:meta_start + meta_length])
+        self.entries_start = entries_start
+        self.entry_count = entries_length // ENTRY.size
+        self.slots_start = slots_start
+        self.slot_count = slots_length // SLOT.size
+        self.text_start = text_start
+
+    def entry_at(self, index):
+        return Entry._make(ENTRY.unpack_from(self.map, self.entries_start + index * ENTRY.size))
+
+    def slot(self, index):
+        return SLOT.unpack_from(self.map, self.slots_start + index * SLOT.size)[0]
+
+    def text(self, start, end):
+        return self.map[self.text_start + start:self.text_start + end].decode()
+
+    def find(self, key):
+        """The entry of a key, or None."""
+        encoded = key.encode()
+        h = key_hash(encoded)
+        mask = self.slot_count - 1
+        slot = h & mask
+        while self.slot(slot):
+            entry = self.entry_at(self.slot(slot) - 1)
+            if entry.hash == h and self.text(entry.key_start, entry.key_end) == key:
+                return entry
+            slot = (slot + 1) & mask
+        return None
+
+    def entry(self, key):
+        entry = self.find(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def query(self, benchmark, problem, query_id):
+        """The text of one query, e.g. query("leetcode", "1050", 4)."""
+        entry = self.entry("query/%s/%s/%d" % (benchmark, problem, int(query_id)))
+        return self.text(entry.start, entry.end)
+
+    def problem(self, benchmark, problem):
+        """[(query id, text)] of a problem, by id."""
+        entry = self.entry("problem/%s/%s" % (benchmark, problem))
+        return [(e.query_id, self.text(e.start, e.end))
+                for e in map(self.entry_at, range(entry.start, entry.end))]
+
+    def testcase(self, name):
+        """The (q1, q2) pair of a calcite testcase."""
+        entry = self.entry("testcase/" + name)
+        return self.text(entry.start, entry.end), self.text(entry.start2, entry.end2)
+
+    def keys(self, prefix=""):
+        keys = (self.text(e.key_start, e.key_end) for e in map(self.entry_at, range(self.entry_count)))
+        return [k for k in keys if k.startswith(prefix)]
+
+    def problems(self):
+        """(benchmark, problem) of every problem."""
+        return [tuple(k.split("/")[1:]) for k in self.keys("problem/")]
+
+    def testcases(self):
+        return [k[len("testcase/"):] for k in self.keys("testcase/")]
+
+    def __len__(self):
+        return self.meta["queries"]
+
+    def __iter__(self):
+        # (benchmark, problem, query id, text) of every query
+        for e in map(self.entry_at, range(len(self))):
+            _, benchmark, problem, _ = self.text(e.key_start, e.key_end).split("/")
+            yield benchmark, problem, e.query_id, self.text(e.start, e.end)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_corpus(path=DEFAULT_PACK, benchmarks_dir=benchmarks_path):
+    """The corpus at path, (re)built first if it is missing or any source file changed since."""
+    corpus = None
+    if os.path.exists(path):
+        try:
+            corpus = QueryCorpus(path)
+        except (ValueError, struct.error):
+            corpus = None
+        if corpus is not None and corpus.meta["sources"] != source_stamps(benchmarks_dir):
+            corpus.close()
+            corpus = None
+    if corpus is None:
+        build_pack(path, benchmarks_dir)
+        corpus = QueryCorpus(path)
+    return corpus
@@ -0,0 +1,175 @@
+"""
+Fingerprints of query results, to check queries for equivalence without
+keeping or sorting their rows. Rows are streamed from a cursor a batch at
+a time and every row gets a 64 bit hash, computed a column at a time with
+numpy. The hashes are folded into a digest in constant memory:
+
+- without ORDER BY, the result is a multiset of rows: the digest is the
+  row count and two sums mod 2**64, of the row hashes and of a remix of
+  them, the same in any order
+- with ORDER BY at the top of the query, the row hashes are chained through
+  one blake2b, so the order counts too
+
+Two results are the same if their digests are equal strings. An ordered
+digest never equals a multiset one: a query that drops the ORDER BY of
+another is not taken as equivalent to it. Ties are not special: queries
+that order tied rows differently get different ordered digests.
+
+Values are hashed by value, not by how SQLite returns them: floats with an
+integral value hash as integers, other floats are rounded to DIGITS
+significant digits first, since sums over the same rows in another order
+can differ in the last bits. Text is hashed with the validator's FNV-1a
+(database_generator/validate.py).
+"""
+
+import hashlib
+import itertools
+import numpy as np
+from database_generator.validate import fingerprint
+from .syntax import parse
+
+DIGITS = 12
+FETCH_SIZE = 10000
+# the hash of a null, and what separates the kinds of values
+NULL = np.uint64(0x6a09e667f3bcc908)
+FLOAT_TAG = np.uint64(0xbb67ae8584caa73b)
+TEXT_TAG = np.uint64(0x3c6ef372fe94f82b)
+OTHER_TAG = np.uint64(0xa54ff53a5f1d36f1)
+ROW_PRIME = np.uint64(0x100000001b3)
+REMIX = np.uint64(0x510e527fade682d1)
+
+
+def mix(h):
+    # splitmix64 finalizer: every input bit flips about half of the output bits
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return h ^ (h >> np.uint64(31))
+
+
+def encode_value(value):
+    # a value of a column that mixes kinds of values: type tag and bytes
+    if isinstance(value, str):
+        return b"s" + value.encode()
+    if isinstance(value, (bytes, memoryview)):
+        return b"b" + bytes(value)
+    return b"r%r" % (value,)
+
+
+def float_hashes(floats, digits=DIGITS):
+    # round to digits significant digits; integral values hash like the int they equal
+    finite = np.isfinite(floats)
+    magnitude = np.floor(np.log10(np.abs(np.where((floats == 0) | ~finite, 1, floats))))
+    with np.errstate(invalid='ignore', over='ignore'):
+        scale = 10.0 ** (digits - 1 - magnitude)
+        rounded = np.where(finite, np.round(floats * scale) / scale, floats) + 0.0  # + 0.0: -0.0 -> 0.0
+        integral = (rounded == np.floor(rounded)) & (np.abs(rounded) < 2.0 ** 63)
+    ints = np.where(integral, rounded, 0).astype(np.int64)
+    return np.where(integral, mix(ints.view(np.uint64)), mix(rounded.view(np.uint64) ^ FLOAT_TAG))
+
+
+def column_hashes(values, digits=DIGITS):
+    """
+    64 bit hash of every value of a column (an object array), as a uint64
+    array. Each value is hashed by its own type, never by the other values
+    of the batch, so a row hashes the same whatever rows it is fetched with.
+    """
+    kinds = np.fromiter(map(type, values), dtype=object, count=len(values))
+    hashes = np.full(len(values), NULL, dtype=np.uint64)
+    ints, floats, texts = kinds == int, kinds == float, kinds == str
+    if ints.any():
+        try:
+            hashes[ints] = mix(values[ints].astype(np.int64).view(np.uint64))
+        except OverflowError:
+            # ints beyond 64 bits take the generic path below
+            ints = np.array([kind is int and -(1 << 63) <= v < 1 << 63 for kind, v in zip(kinds, values)], dtype=bool)
+            hashes[ints] = mix(values[ints].astype(np.int64).view(np.uint64))
+    if floats.any():
+        hashes[floats] = float_hashes(values[floats].astype(np.float64), digits)
+    if texts.any():
+        hashes[texts] = mix(fingerprint(values[texts].astype(str)) ^ TEXT_TAG)
+    others = ~(ints | floats | texts | (kinds == type(None)))
+    if others.any():
+        hashes[others] = np.array([int.from_bytes(hashlib.blake2b(encode_value(v), digest_size=8).digest(), 'little')
+                                   for v in values[others]], dtype=np.uint64) ^ OTHER_TAG
+    return hashes
+
+
+def row_hashes(rows, digits=DIGITS):
+    """64 bit hash of every row of a batch (a list of tuples), as a uint64 array."""
+    # three times faster than np.array(rows, dtype=object)
+    width = len(rows[0])
+    table = np.fromiter(itertools.chain.from_iterable(rows), dtype=object, count=len(rows) * width)
+    table = table.reshape(len(rows), width)
+    hashes = np.zeros(len(rows), dtype=np.uint64)
+    for j in range(table.shape[1]):
+        hashes = mix(hashes * ROW_PRIME + column_hashes(table[:, j], digits))
+    return hashes
+
+
+def is_ordered(sql, dialect='mysql'):
+    """
+    Whether the outermost query of sql has an ORDER BY (see syntax.py);
+    unparsable queries have not. Both dialects give the same answer.
+    """
+    try:
+        tree = parse(sql, dialect)
+    except ValueError:
+        return False
+    return tree[0] == 'query' and any(clause[0] == 'order by' for clause in tree[1])
+
+
+class ResultDigest:
+    """Folds rows into a digest of the result; ordered: whether the row order counts."""
+
+    def __init__(self, ordered=False, digits=DIGITS):
+        self.ordered = ordered
+        self.digits = digits
+        self.columns = None
+        self.rows = 0
+        self.sums = np.zeros(2, dtype=np.uint64)
+        self.chain = hashlib.blake2b(digest_size=16)
+
+    def add_rows(self, rows):
+        """Fold a batch of rows (a list of tuples)."""
+        if not rows:
+            return
+        if self.columns is None:
+            self.columns = len(rows[0])
+        hashes = row_hashes(rows, self.digits)
+        if self.ordered:
+            self.chain.update(hashes.astype('<u8').tobytes())
+        else:
+            self.sums += [hashes.sum(dtype=np.uint64), mix(hashes ^ REMIX).sum(dtype=np.uint64)]
+        self.rows += len(rows)
+
+    def add_cursor(self, cursor, size=FETCH_SIZE):
+        """Fold every row of an executed cursor, size rows at a time."""
+        if cursor.description is not None:
+            self.columns = len(cursor.description)
+        while True:
+            batch = cursor.fetchmany(size)
+            if not batch:
+                break
+            self.add_rows(batch)
+        return self
+
+    def digest(self):
+        """'<ordered|bag>:<columns>:<rows>:<hash>', equal for equal results."""
+        value = self.chain.hexdigest() if self.ordered else "%016x%016x" % tuple(map(int, self.sums))
+        return "%s:%d:%d:%s" % ("ordered" if self.ordered else "bag", self.columns or 0, self.rows, value)
+
+
+def query_digest(conn, sql, ordered=None, dialect='mysql'):
+    """The digest of the result of sql on a sqlite3 connection; ordered defaults to is_ordered(sql)."""
+    if ordered is None:
+        ordered = is_ordered(sql, dialect)
+    return ResultDigest(ordered).add_cursor(conn.execute(sql)).digest()
+
+
+def equivalence_classes(digests):
+    """Keys of {key: digest} grouped by equal digest, as sorted lists, largest group first; None digests left out."""
+    groups = {}
+    for key, digest in digests.items():
+        if digest is not None:
+            groups.setdefault(digest, []).append(key)
+    return sorted((sorted(keys) for keys in groups.values()), key=lambda keys: (-len(keys), keys[0]))
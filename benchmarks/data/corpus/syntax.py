@@ -0,0 +1,180 @@
+"""
+Syntax trees of the benchmark queries, and a cache of them next to the
+query pack (cache/trees.cache) so tools that walk every query do not parse
+them again on every run.
+
+The trees are built over the tokens of canonical.tokenize() and go down to
+the level the tools need, not to a full SQL grammar: a query is split into
+its clauses, and parentheses, function calls and CASE blocks are nested
+nodes. Everything is plain tuples, so the cache loads with marshal:
+
+    token: (kind, text)          e.g. ('name', 'salary'), ('keyword', 'distinct')
+    node:  (kind, (child, ...))  kinds below
+
+    'query'      a query: clause nodes ('select', 'from', 'where', 'group by',
+                 'having', 'order by', 'limit', 'offset', 'fetch', 'window',
+                 'with', 'values', and 'union', 'intersect', 'except',
+                 'minus' between the queries they combine)
+    'statement'  anything else at the top level
+    'parens'     a parenthesized list that is not a query
+    'call'       a function token followed by its arguments
+    'case'       CASE ... END, without the two keywords
+
+is_token() tells a token from a node: only a token has a str second item.
+"""
+
+import hashlib
+import marshal
+import os
+from .canonical import dialect_of, tokenize
+from .pack import DEFAULT_PACK
+
+DEFAULT_TREES = os.path.join(os.path.dirname(DEFAULT_PACK), "trees.cache")
+MAGIC = "SLABTRE1"
+
+QUERY_START = frozenset(("select", "with", "values"))
+CLAUSES = frozenset(("select", "from", "where", "group", "having", "order", "limit", "offset", "fetch", "window",
+                     "with", "values", "union", "intersect", "except", "minus"))
+
+
+# one tuple per distinct token, which marshal then writes once per cache file
+shared_tokens = {}
+
+
+def is_token(item):
+    return isinstance(item[1], str)
+
+
+def parse_items(tokens, i, stop=None):
+    """Items from tokens[i] up to the unmatched stop (')' or 'end'), as (items, index of stop)."""
+    items = []
+    while i < len(tokens):
+        token = tokens[i]
+        if token[1] == ')' and token[0] == 'punct':
+            if stop != ')':
+                raise ValueError("unmatched ')' at token %d" % i)
+            return items, i
+        if token[0] == 'keyword' and token[1] == 'end' and stop == 'end':
+            return items, i
+        if token[1] == '(' and token[0] == 'punct':
+            inner, i = parse_items(tokens, i + 1, ')')
+            group = query(inner) or ('parens', tuple(inner))
+            if items and is_token(items[-1]) and items[-1][0] == 'function':
+                items[-1] = ('call', (items[-1],) + group[1] if group[0] == 'parens' else (items[-1], group))
+            else:
+                items.append(group)
+        elif token[0] == 'keyword' and token[1] == 'case':
+            inner, i = parse_items(tokens, i + 1, 'end')
+            items.append(('case', tuple(inner)))
+        else:
+            items.append(token)
+        i += 1
+    if stop is not None:
+        raise ValueError("missing '%s' at the end of the query" % stop)
+    return items, i
+
+
+def query(items):
+    # a 'query' node of its clauses if items start like a query, else None
+    if not items or not is_token(items[0]) or items[0][0] != 'keyword' or items[0][1] not in QUERY_START:
+        return None
+    clauses = []
+    for item in items:
+        if is_token(item) and item[0] == 'keyword' and item[1] in CLAUSES:
+            clauses.append([item[1], []])
+        elif clauses[-1][0] in ('group', 'order') and not clauses[-1][1] and item == ('keyword', 'by'):
+            clauses[-1][0] += ' by'
+        else:
+            clauses[-1][1].append(item)
+    return 'query', tuple((kind, tuple(children)) for kind, children in clauses)
+
+
+def parse(sql, dialect='mysql'):
+    """The syntax tree of a query, see the module docstring."""
+    tokens = [shared_tokens.setdefault(token, (token.kind, token.text)) for token in tokenize(sql, dialect)]
+    while tokens and tokens[-1] == ('punct', ';'):
+        tokens.pop()
+    items, _ = parse_items(tokens, 0)
+    return query(items) or ('statement', tuple(items))
+
+
+def tokens_of(tree):
+    """The tokens of a tree, in order; parentheses and CASE/END are not in the tree."""
+    if is_token(tree):
+        yield tree
+        return
+    kind, children = tree
+    if kind not in ('query', 'statement', 'parens', 'call', 'case'):
+        yield 'keyword', kind
+    for child in children:
+        yield from tokens_of(child)
+
+
+def format_tree(tree, indent=0):
+    """One line per node and token, indented by depth."""
+    if is_token(tree):
+        return "%s%s %s" % ("  " * indent, tree[0], tree[1])
+    return "\n".join(["%s%s" % ("  " * indent, tree[0])] + [format_tree(child, indent + 1) for child in tree[1]])
+
+
+def text_hash(sql, dialect):
+    # trees depend on the dialect as well as the text
+    return int.from_bytes(hashlib.blake2b((dialect + "\0" + sql).encode(), digest_size=8).digest(), 'little')
+
+
+def parser_version():
+    # a cache written by another version of the tokenizer or parser is stale
+    h = hashlib.blake2b(digest_size=8)
+    for name in ("canonical.py", "syntax.py"):
+        with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class TreeCache:
+    """Trees by text hash, loaded from path if it holds a cache of this parser version."""
+
+    def __init__(self, path=DEFAULT_TREES):
+        self.path = path
+        self.version = parser_version()
+        self.trees = {}
+        self.dirty = False
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            try:
+                # loads() of the whole file: load() reads a file object a few bytes at a time
+                magic, version, trees = marshal.loads(data)
+            except (EOFError, ValueError, TypeError):
+                magic = None
+            if magic == MAGIC and version == self.version:
+                self.trees = trees
+
+    def tree(self, sql, dialect='mysql'):
+        """The tree of a query, parsed and added to the cache if it is not there yet."""
+        key = text_hash(sql, dialect)
+        tree = self.trees.get(key)
+        if tree is None:
+            tree = self.trees[key] = parse(sql, dialect)
+            self.dirty = True
+        return tree
+
+    def save(self):
+        """Write the cache back if trees were added, replacing the file atomically."""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            marshal.dump((MAGIC, self.version, self.trees), f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def corpus_trees(corpus, path=DEFAULT_TREES):
+    """{(benchmark, problem, query id): tree} of every query of a corpus (corpus/pack.py), through the cache at path."""
+    cache = TreeCache(path)
+    trees = {(benchmark, problem, query_id): cache.tree(sql, dialect_of(benchmark))
+             for benchmark, problem, query_id, sql in corpus}
+    cache.save()
+    return trees
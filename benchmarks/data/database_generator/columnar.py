@@ -0,0 +1,211 @@
+import os
+import json
+import numpy as np
+
+MANIFEST = "manifest.json"
+
+INT_TYPES = {'int'}
+FLOAT_TYPES = {'decimal', 'numeric', 'float'}
+DATE_TYPES = {'date'}
+# every other declared type (str, enum, boolean, ...) is dictionary encoded
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def storage_dtype(type_name):
+    if type_name in INT_TYPES:
+        return 'int64'
+    if type_name in FLOAT_TYPES:
+        return 'float64'
+    if type_name in DATE_TYPES:
+        # days since 1970-01-01
+        return 'int32'
+    # codes into the column dictionary
+    return 'int32'
+
+
+def is_dictionary_type(type_name):
+    return type_name not in INT_TYPES | FLOAT_TYPES | DATE_TYPES
+
+
+def split_nulls(values):
+    """Return (values as a list or array, null mask or None). '' and None are nulls, as in the CSV files."""
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values, None
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    mask = np.fromiter((v == '' or v is None for v in values), dtype=bool, count=len(values))
+    if not mask.any():
+        return values, None
+    return values, mask
+
+
+class ColumnWriter:
+    def __init__(self, directory, table_name, name, type_name):
+        self.name = name
+        self.type = type_name
+        self.dtype = storage_dtype(type_name)
+        self.file_name = table_name + "/" + name + ".bin"
+        self.nulls_name = None
+        self.file = open(os.path.join(directory, self.file_name), "wb")
+        self.nulls_file = None
+        self.directory = directory
+        self.table_name = table_name
+        self.dictionary = {} if is_dictionary_type(type_name) else None
+        self.rows = 0
+
+    def encode(self, values, mask):
+        if mask is not None:
+            values = [self.fill_value() if m else v for v, m in zip(values, mask)]
+        if self.dictionary is not None:
+            strings = np.asarray(values).astype(str)
+            uniques, inverse = np.unique(strings, return_inverse=True)
+            codes = np.array([self.dictionary.setdefault(u, len(self.dictionary)) for u in uniques.tolist()],
+                             dtype=np.int32)
+            encoded = codes[inverse] if len(uniques) else np.empty(0, dtype=np.int32)
+            if mask is not None:
+                encoded[mask] = -1
+            return encoded
+        if self.type in DATE_TYPES:
+            return (np.asarray(values, dtype='datetime64[D]') - EPOCH).astype(np.int32)
+        return np.asarray(values, dtype=self.dtype)
+
+    def fill_value(self):
+        # placeholder stored under a null, the null mask is what counts
+        if self.dictionary is not None:
+            return ''
+        if self.type in DATE_TYPES:
+            return EPOCH
+        return 0
+
+    def write(self, values):
+        values, mask = split_nulls(values)
+        if mask is not None and self.nulls_file is None:
+            # first null seen: start the mask file, everything before was non-null
+            self.nulls_name = self.table_name + "/" + self.name + ".nulls"
+            self.nulls_file = open(os.path.join(self.directory, self.nulls_name), "wb")
+            np.zeros(self.rows, dtype=bool).tofile(self.nulls_file)
+        self.encode(values, mask).tofile(self.file)
+        if self.nulls_file is not None:
+            (mask if mask is not None else np.zeros(len(values), dtype=bool)).tofile(self.nulls_file)
+        self.rows += len(values)
+
+    def close(self):
+        self.file.close()
+        if self.nulls_file is not None:
+            self.nulls_file.close()
+        entry = {"name": self.name, "type": self.type, "dtype": self.dtype,
+                 "file": self.file_name, "nulls": self.nulls_name}
+        if self.dictionary is not None:
+            dictionary_name = self.table_name + "/" + self.name + ".dict.json"
+            with open(os.path.join(self.directory, dictionary_name), "w") as f:
+                json.dump(list(self.dictionary), f)
+            entry["dictionary"] = dictionary_name
+        return entry
+
+
+class ColumnarTableSink:
+    """
+    Writes a table as one raw binary file per column under <directory>/<table>/
+    and records it in <directory>/manifest.json. Same interface as TableSink.
+    """
+
+    def __init__(self, directory, table_name, names, types, problem_id=None):
+        if len(names) != len(types):
+            raise ValueError("got %d column names but %d types" % (len(names), len(types)))
+        self.directory = directory
+        self.table_name = table_name
+        self.problem_id = problem_id
+        self.rows_written = 0
+        os.makedirs(os.path.join(directory, table_name), exist_ok=True)
+        self.columns = [ColumnWriter(directory, table_name, n, t) for n, t in zip(names, types)]
+
+    def write_row(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        self.write_columns([list(c) for c in zip(*rows)])
+
+    def write_columns(self, columns):
+        if len(columns) != len(self.columns):
+            raise ValueError("expected %d columns, got %d" % (len(self.columns), len(columns)))
+        length = len(columns[0])
+        if any(len(c) != length for c in columns):
+            raise ValueError("columns have different lengths")
+        for writer, values in zip(self.columns, columns):
+            writer.write(values)
+        self.rows_written += length
+
+    def close(self):
+        entries = [c.close() for c in self.columns]
+        manifest = read_manifest(self.directory)
+        if self.problem_id is not None:
+            manifest["problem_id"] = self.problem_id
+        manifest["tables"][self.table_name] = {"rows": self.rows_written, "columns": entries}
+        with open(os.path.join(self.directory, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {"tables": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+class ColumnarTable:
+    """Memory-mapped view of one table written by ColumnarTableSink."""
+
+    def __init__(self, directory, table_name, entry):
+        self.name = table_name
+        self.rows = entry["rows"]
+        self.directory = directory
+        self.entries = {c["name"]: c for c in entry["columns"]}
+        self.column_names = [c["name"] for c in entry["columns"]]
+        self.dictionaries = {}
+
+    def column(self, name):
+        """Raw stored values: int64/float64, days since epoch for dates, dictionary codes for strings."""
+        entry = self.entries[name]
+        if self.rows == 0:
+            return np.empty(0, dtype=entry["dtype"])
+        return np.memmap(os.path.join(self.directory, entry["file"]), dtype=entry["dtype"],
+                         mode="r", shape=(self.rows,))
+
+    def nulls(self, name):
+        entry = self.entries[name]
+        if entry["nulls"] is None:
+            return np.zeros(self.rows, dtype=bool)
+        return np.memmap(os.path.join(self.directory, entry["nulls"]), dtype=bool, mode="r", shape=(self.rows,))
+
+    def dictionary(self, name):
+        if name not in self.dictionaries:
+            with open(os.path.join(self.directory, self.entries[name]["dictionary"])) as f:
+                self.dictionaries[name] = np.array(json.load(f))
+        return self.dictionaries[name]
+
+    def decoded(self, name):
+        """Values in their natural form: strings for dictionary columns, datetime64 for dates."""
+        entry = self.entries[name]
+        values = self.column(name)
+        if "dictionary" in entry:
+            dictionary = self.dictionary(name)
+            return dictionary[values] if len(dictionary) else values.astype(str)
+        if entry["type"] in DATE_TYPES:
+            return EPOCH + values.astype('timedelta64[D]')
+        return values
+
+
+def load_columnar(directory):
+    """Map every table listed in the manifest, keyed by table name."""
+    manifest = read_manifest(directory)
+    return {name: ColumnarTable(directory, name, entry) for name, entry in manifest["tables"].items()}
@@ -0,0 +1,369 @@
+"""
+The LeetCode/constraints/*.yml rule language, compiled into what
+SchemaGenerator (engine.py) needs to satisfy the rules while it generates:
+
+    col_val: T.c <- [a, b]            c is in [a, b]
+             T.c < x, T.c > x         c is below/above x
+             T.c = x                  c is always x
+             T.c -> {x, y}            c contains x and y
+             (s) T.c < x              some rows of c are below x (also >, =)
+             T.c | int+null           c has nulls
+    col_dep: T.a != T.b, T.a < T.b    row by row, or between tables
+             T.a <- U.b               every a is one of the values of b
+             T.a != x => T.b = null   where a is not x, b is null
+    row_dep: unique(T.a, T.b)         (a, b) tuples are distinct
+             inc(T.a)                 a is 1, 2, 3, ...
+             bound(T.a)               a is a permutation of 1..rows
+
+Rules are separated by ';' or newlines. Value rules become column options
+(narrower domains, nulls, injected values), unique/inc/bound become row
+functions of the table, and row by row rules become fix-up passes that
+redraw the offending rows of a shard with numpy masks. Rules the compiler
+can not map are listed in Constraints.unenforced instead of failing.
+"""
+
+import operator
+import re
+from collections import namedtuple
+import numpy as np
+from .engine import Injection, FIX_ROUNDS, assign
+from .schema import type_kind
+
+SECTIONS = ('col_val', 'col_dep', 'row_dep')
+# unique groups first, injections check them; value rules before
+# dependencies, ordering rules between tables read the ranges they set
+COMPILE_ORDER = ('row_dep', 'col_val', 'col_dep')
+# share of nulls in a column declared int+null
+NULL_SHARE = 0.2
+# share of the rows given one of the values a column must contain (->)
+CONTAINS_SHARE = 0.05
+# share of the rows a (s) rule holds for
+SOME_SHARE = 0.1
+
+Rule = namedtuple("Rule", ["section", "text"])
+
+COMPARISON = re.compile(r'^(\(s\)\s*)?([\w.]+)\s*(<-|->|!=|<|>|=|\|)\s*(.*)$')
+FUNCTION = re.compile(r'^(unique|inc|bound)\s*\((.*)\)$')
+OPERATORS = {'=': operator.eq, '!=': operator.ne, '<': operator.lt, '>': operator.gt}
+
+
+class UnsupportedRule(ValueError):
+    pass
+
+
+def parse_constraints(text):
+    """Split a constraint file into Rules, one per ';' or line, tagged with their section."""
+    rules = []
+    section = None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        match = re.match(r'^(\w+):(.*)$', line)
+        if match and not line[0].isspace():
+            section, line = match.groups()
+            if section not in SECTIONS:
+                raise ValueError("unknown constraint section '%s', expected one of %s"
+                                 % (section, ", ".join(SECTIONS)))
+        elif section is None:
+            raise ValueError("constraint rule outside of a section: '%s'" % line.strip())
+        rules.extend(Rule(section, part.strip()) for part in line.split(';') if part.strip())
+    return rules
+
+
+def compare(a, b, op):
+    """op(a, b) row by row; rows where either side is null ('') count as holding."""
+    a, b = np.asarray(a), np.broadcast_to(np.asarray(b), np.shape(a))
+    if a.dtype != object and b.dtype != object:
+        return np.asarray(op(a, b), dtype=bool)
+    holds = np.ones(len(a), dtype=bool)
+    present = np.flatnonzero(np.array([x != '' and y != '' for x, y in zip(a.tolist(), b.tolist())], dtype=bool))
+    holds[present] = np.asarray(op(a[present], b[present]), dtype=bool)
+    return holds
+
+
+class NotEqual:
+    """a != b row by row: redraws b (or a, if b is a row function) where they are equal."""
+
+    def __init__(self, rule, a, b):
+        self.rule = rule
+        self.a, self.b = a, b
+        self.assigns = []
+
+    def apply(self, batch):
+        target = self.b if not batch.fixed(self.b) else self.a if not batch.fixed(self.a) else None
+        for attempt in range(FIX_ROUNDS if target else 0):
+            bad = np.flatnonzero(~compare(batch[self.a], batch[self.b], operator.ne))
+            if not len(bad):
+                break
+            batch.redraw(target, bad, attempt)
+
+    def keep(self, columns):
+        return compare(columns[self.a], columns[self.b], operator.ne)
+
+
+class Ordered:
+    """
+    column < other (or >) row by row, where other is a column of the same
+    table or, with via, the column of the row the foreign key via points at.
+    Offending rows get both sides redrawn (the reference, with via), so a
+    value at the edge of its range does not keep them stuck.
+    """
+
+    def __init__(self, rule, column, op, other, via=None):
+        self.rule = rule
+        self.column, self.op, self.other, self.via = column, op, other, via
+        self.assigns = []
+
+    def apply(self, batch):
+        targets = [c for c in (self.column, self.via or self.other) if not batch.fixed(c)]
+        other = batch.parent_values(self.via, self.other) if self.via is not None else None
+        for attempt in range(FIX_ROUNDS if targets else 0):
+            bad = np.flatnonzero(~compare(batch[self.column], batch[self.other] if other is None else other, self.op))
+            if not len(bad):
+                break
+            for target in targets:
+                batch.redraw(target, bad, attempt)
+            if other is not None and self.via in targets:
+                other = assign(other, bad, batch.parent_values(self.via, self.other, bad))
+        else:
+            # still stuck after every round: put numbers and dates one step
+            # past the other side; anything else is left to keep()
+            bad = np.flatnonzero(~compare(batch[self.column], batch[self.other] if other is None else other, self.op))
+            values = batch[self.other] if other is None else other
+            if len(bad) and self.column in targets and values.dtype.kind in 'iuM':
+                batch.assign(self.column, bad, values[bad] + (-1 if self.op is operator.lt else 1))
+
+    def keep(self, columns):
+        if self.via is not None:
+            return None
+        return compare(columns[self.column], columns[self.other], self.op)
+
+
+class Implies:
+    """Where condition op value holds, column is set to target (None for null)."""
+
+    def __init__(self, rule, condition, op, value, column, target):
+        self.rule = rule
+        self.condition, self.op, self.value = condition, op, value
+        self.column, self.target = column, target
+        self.assigns = [column]
+
+    def apply(self, batch):
+        where = np.flatnonzero(compare(batch[self.condition], self.value, self.op))
+        if len(where):
+            batch.assign(self.column, where, '' if self.target is None else self.target)
+
+    def keep(self, columns):
+        return None
+
+
+class Constraints:
+    """
+    A constraint file compiled against a schema: the options, unique groups
+    and fix-up passes SchemaGenerator takes, and the rules left unenforced
+    as (rule, reason) pairs.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.options = {}
+        self.unique = {}
+        self.fixes = {}
+        self.unenforced = []
+
+    def column_options(self, table, column):
+        return self.options.setdefault(table.name + "." + column, {})
+
+    def resolve(self, name):
+        """'Table.column' or a bare column name -> (Table, column name)."""
+        table_name, _, column = name.rpartition('.')
+        if table_name:
+            # Contest for Contests and the like
+            table = self.schema.table(table_name) or self.schema.table(table_name + 's')
+            if table is not None:
+                for c in table.columns:
+                    if c.name.lower() == column.lower():
+                        return table, c.name
+        holders = [(t, c.name) for t in self.schema.tables for c in t.columns if c.name.lower() == column.lower()]
+        if len(holders) != 1:
+            raise UnsupportedRule("no single column matches %s" % name)
+        return holders[0]
+
+    def kind(self, table, column):
+        # the type of a foreign key column is the type of the column it references
+        for c in table.columns:
+            if c.name == column and c.type is not None:
+                return type_kind(c.type)
+        for fk in table.fkeys:
+            if fk.column == column:
+                parent = self.schema.table(fk.parent_table)
+                return self.kind(parent, fk.parent_column if fk.parent_column in
+                                 [c.name for c in parent.columns] else parent.primary_key[0])
+        return 'varchar'
+
+    def literal(self, text, table, column):
+        text = text.strip()
+        if text == 'null':
+            return None
+        kind = self.kind(table, column)
+        if kind == 'date':
+            return np.datetime64(text, 'D')
+        if kind in ('int', 'bool'):
+            return int(text)
+        if kind in ('numeric', 'decimal'):
+            return float(text)
+        return text
+
+    def step(self, table, column):
+        # the smallest step of a column's values, for turning < into <=
+        return 0.01 if self.kind(table, column) in ('numeric', 'decimal') else 1
+
+    def in_key(self, table, column):
+        return column in table.primary_key or any(column in g for g in self.unique.get(table.name, []))
+
+    def add_fix(self, table, fix):
+        self.fixes.setdefault(table.name, []).append(fix)
+
+    def compile(self, rules):
+        for section in COMPILE_ORDER:
+            for rule in rules:
+                if rule.section != section:
+                    continue
+                try:
+                    getattr(self, "compile_" + section)(rule.text)
+                except UnsupportedRule as e:
+                    self.unenforced.append((rule.text, str(e)))
+        # implications last, so they see the values the other passes settled on
+        for fixes in self.fixes.values():
+            fixes.sort(key=lambda fix: isinstance(fix, Implies))
+        return self
+
+    def compile_col_val(self, text):
+        match = COMPARISON.match(text)
+        if not match:
+            raise UnsupportedRule("not a column rule")
+        some, name, op, value = match.groups()
+        table, column = self.resolve(name)
+        options = self.column_options(table, column)
+        if op == '|':
+            if 'null' not in value:
+                raise UnsupportedRule("only '| int+null' is understood")
+            options["null_prob"] = NULL_SHARE
+        elif op == '<-':
+            low, high = value.strip().strip('[]').split(',')
+            options["low"], options["high"] = self.literal(low, table, column), self.literal(high, table, column)
+        elif op == '->':
+            values = [self.literal(v, table, column) for v in value.strip().strip('{}').split(',')]
+            self.inject(table, column, Injection(CONTAINS_SHARE, values, 0), values)
+        elif some:
+            offset = {'<': -1, '>': 1, '=': 0}.get(op)
+            if offset is None:
+                raise UnsupportedRule("(s) only goes with <, > and =")
+            bound = self.literal(value, table, column)
+            self.inject(table, column, Injection(SOME_SHARE, [bound], offset * self.step(table, column)), [bound])
+        elif op == '=':
+            options["values"] = [self.literal(value, table, column)]
+        elif op in ('<', '>'):
+            bound = self.literal(value, table, column)
+            step = self.step(table, column)
+            if op == '<':
+                options["high"] = bound - step
+            else:
+                options["low"] = bound + step
+        else:
+            raise UnsupportedRule("'%s' is not a value rule" % op)
+
+    def inject(self, table, column, injection, values):
+        if self.in_key(table, column):
+            # lone int keys count 0, 1, 2, ... and hold any small enough id already
+            if table.primary_key == [column] and self.kind(table, column) == 'int' and min(values) >= 0:
+                return
+            raise UnsupportedRule("values of key column %s.%s can not be injected" % (table.name, column))
+        self.column_options(table, column).setdefault("inject", []).append(injection)
+
+    def compile_col_dep(self, text):
+        if '=>' in text:
+            return self.compile_implication(text)
+        match = COMPARISON.match(text)
+        if not match or match.group(1):
+            raise UnsupportedRule("not a dependency between two columns")
+        _, left, op, right = match.groups()
+        table, column = self.resolve(left)
+        other_table, other = self.resolve(right.strip())
+        if op == '<-':
+            self.column_options(table, column)["ref"] = (other_table.name, other)
+            self.column_options(other_table, other)["row_function"] = True
+            if self.in_key(table, column) and other_table.primary_key != [other]:
+                # see SchemaGenerator.domain
+                self.unenforced.append((text, "key column %s.%s only draws from the same values" % (table.name, column)))
+        elif op == '!=':
+            if table is other_table:
+                self.add_fix(table, NotEqual(text, column, other))
+            else:
+                # disjoint halves of one domain never meet
+                self.column_options(table, column)["part"] = (0, 2)
+                self.column_options(other_table, other)["part"] = (1, 2)
+        elif op in ('<', '>'):
+            self.compile_ordering(text, table, column, OPERATORS[op], other_table, other)
+        else:
+            raise UnsupportedRule("'%s' is not a dependency" % op)
+
+    def compile_ordering(self, text, table, column, op, other_table, other):
+        if table is other_table:
+            self.add_fix(table, Ordered(text, column, op, other))
+            return
+        # between tables joined by a foreign key: compare every row with the row it references
+        for child, child_column, parent, parent_column, child_op in (
+                (table, column, other_table, other, op),
+                (other_table, other, table, column, operator.gt if op is operator.lt else operator.lt)):
+            for fk in child.fkeys:
+                if self.schema.table(fk.parent_table) is parent:
+                    self.column_options(parent, parent_column)["row_function"] = True
+                    self.add_fix(child, Ordered(text, child_column, child_op, parent_column, via=fk.column))
+                    return
+        # otherwise keep the two ranges apart
+        low, high = ((table, column), (other_table, other)) if op is operator.lt else ((other_table, other), (table, column))
+        low_options, high_options = self.column_options(*low), self.column_options(*high)
+        if high_options.get("low") is not None:
+            low_options["high"] = high_options["low"] - self.step(*low)
+        elif low_options.get("high") is not None:
+            high_options["low"] = low_options["high"] + self.step(*high)
+        else:
+            low_options["half"], high_options["half"] = 0, 1
+
+    def compile_implication(self, text):
+        condition, result = [part.strip() for part in text.split('=>', 1)]
+        match, target = COMPARISON.match(condition), COMPARISON.match(result)
+        if not match or not target or target.group(3) != '=' or match.group(3) not in OPERATORS:
+            raise UnsupportedRule("only 'a op x => b = y' implications are understood")
+        table, column = self.resolve(match.group(2))
+        target_table, target_column = self.resolve(target.group(2))
+        if target_table is not table:
+            raise UnsupportedRule("implication between two tables")
+        self.add_fix(table, Implies(text, column, OPERATORS[match.group(3)],
+                                    self.literal(match.group(4), table, column), target_column,
+                                    self.literal(target.group(4), table, target_column)))
+
+    def compile_row_dep(self, text):
+        match = FUNCTION.match(text)
+        if not match:
+            raise UnsupportedRule("not unique(...), inc(...) or bound(...)")
+        function, args = match.groups()
+        columns = [self.resolve(arg.strip()) for arg in args.split(',')]
+        table = columns[0][0]
+        if any(t is not table for t, _ in columns):
+            raise UnsupportedRule("%s over columns of different tables" % function)
+        names = [c for _, c in columns]
+        if function == 'unique':
+            if names != table.primary_key:
+                self.unique.setdefault(table.name, []).append(names)
+        elif len(names) != 1:
+            raise UnsupportedRule("%s takes one column" % function)
+        else:
+            self.column_options(table, names[0])["sequence" if function == 'inc' else "permutation"] = True
+
+
+def load_constraints(path, schema):
+    """Compile a constraints/*.yml file against the schema it belongs to."""
+    with open(path) as f:
+        return Constraints(schema).compile(parse_constraints(f.read()))
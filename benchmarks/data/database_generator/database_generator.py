@@ -1,22 +1,174 @@
 import os
-import csv
 import numpy as np
 import math
 import random
+from contextlib import contextmanager
+from .sinks import TableSink, MultiSink, chunk_ranges, crop_chunks, DEFAULT_CHUNK_SIZE, COMPRESSIONS
+from .columnar import ColumnarTableSink
+from .sqlite_sink import SQLiteTableSink
+from .schema import load_schema
+from .sizes import parse_size
+from .streams import RandomStreams
+from .parallel import make_shards, generate_shards, DEFAULT_SHARD_ROWS
+from .report import RunReport, path_bytes
+
+
+def parse_row_range(text):
+    # "1000:2000" -> (1000, 2000), either end can be left out: ":500", "1000:"
+    if ':' not in text:
+        raise ValueError("row range should look like start:stop, got '%s'" % text)
+    start, stop = text.split(':', 1)
+    return int(start) if start else 0, int(stop) if stop else None
+
+# output formats a generator can write, picked with the DBGEN_FORMATS
+# environment variable (comma separated, csv by default)
+FORMATS = ('csv', 'columnar', 'sqlite')
 
 class DatabaseGenerator:
-    def __init__(self, size, problem_id:str|int, script_file):
+    def __init__(self, size, problem_id:str|int, script_file, formats=None, schema_file=None, compression=None,
+                 seed=2333, workers=None, tables=None, row_range=None):
         problem_id = str(problem_id)
         self.problem_id = problem_id
+        # scale of the database: the size argument of the script, e.g. "1M",
+        # "calcite_4M", "50M" or "sf100", as a number of rows
+        self.size = size
+        self.rows = parse_size(size)
         self.script_file = script_file
         self.output_dir = "output"
+        if formats is None:
+            formats = os.environ.get("DBGEN_FORMATS", "csv").split(",")
+        for f in formats:
+            if f not in FORMATS:
+                raise ValueError("unknown output format '%s', expected one of %s" % (f, ", ".join(FORMATS)))
+        self.formats = list(formats)
+        # csv compression (gzip, xz or bz2), from DBGEN_COMPRESSION by default
+        if compression is None:
+            compression = os.environ.get("DBGEN_COMPRESSION") or None
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError("unknown compression '%s', expected one of %s" % (compression, ", ".join(COMPRESSIONS)))
+        self.compression = compression
+        # columnar tables and their manifest.json live here
+        self.columnar_dir = self.output_dir + "/columnar"
+        self.sqlite_path = self.output_dir + "/" + problem_id + ".sqlite"
+        # the schemas/*.json of this problem, used for the sqlite PK/FK indexes
+        if schema_file is None:
+            schema_file = os.environ.get("DBGEN_SCHEMA")
+        self.schema = load_schema(schema_file) if schema_file else None
+        # root of every random stream of output_sharded, see streams.py
+        self.seed = seed
+        self.streams = RandomStreams(seed)
+        # processes building shards, from DBGEN_WORKERS by default; the output
+        # does not depend on it
+        if workers is None:
+            workers = int(os.environ.get("DBGEN_WORKERS", "1"))
+        self.workers = workers
+        # write only these tables (DBGEN_TABLES, comma separated) and only rows
+        # [start, stop) of them (DBGEN_ROWS, start:stop); sharded tables then
+        # build just the shards that hold those rows
+        if tables is None and os.environ.get("DBGEN_TABLES"):
+            tables = os.environ["DBGEN_TABLES"].split(",")
+        self.tables = None if tables is None else {t.lower() for t in tables}
+        if row_range is None and os.environ.get("DBGEN_ROWS"):
+            row_range = parse_row_range(os.environ["DBGEN_ROWS"])
+        self.row_range = row_range
+        # per table timings, rows, bytes and peak memory, see report.py
+        self.report = RunReport(problem_id, size, self.rows, self.formats, self.compression, self.workers)
+
+    def table_path(self, table_name: str):
+        path = self.output_dir + "/" + table_name + ".csv"
+        if self.compression is not None:
+            path += COMPRESSIONS[self.compression][0]
+        return path
+
+    def selected(self, table_name: str):
+        return self.tables is None or table_name.lower() in self.tables
 
     def output(self, table_name: str, data):
-        table_name = table_name
+        # data is a list of rows whose first two rows are the names and types
+        self.output_chunks(table_name, data[0], data[1], [data[2:]])
+
+    def sink(self, table_name: str, names, types):
+        # open a streaming writer for every configured format; header rows are written right away
         os.makedirs(self.output_dir, exist_ok=True)
-        with open(self.output_dir + "/" + table_name + ".csv", "w") as f:
-            writer = csv.writer(f)
-            writer.writerows(data)
+        sinks = []
+        if 'csv' in self.formats:
+            sinks.append(TableSink(self.table_path(table_name), names, types, self.compression))
+        if 'columnar' in self.formats:
+            sinks.append(ColumnarTableSink(self.columnar_dir, table_name, names, types, self.problem_id))
+        if 'sqlite' in self.formats:
+            schema_table = self.schema.table(table_name) if self.schema else None
+            sinks.append(SQLiteTableSink(self.sqlite_path, table_name, names, types, schema_table))
+        return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
+
+    def table_bytes(self, table_name: str):
+        # bytes this table takes in every format; for sqlite the whole file,
+        # callers take the difference around the table
+        nbytes = 0
+        if 'csv' in self.formats:
+            nbytes += path_bytes(self.table_path(table_name))
+        if 'columnar' in self.formats:
+            nbytes += path_bytes(self.columnar_dir + "/" + table_name)
+        if 'sqlite' in self.formats:
+            nbytes += path_bytes(self.sqlite_path)
+        return nbytes
+
+    @contextmanager
+    def reported_sink(self, table_name: str, names, types):
+        # self.sink, recording the table in the run report once it is closed
+        before = path_bytes(self.sqlite_path) if 'sqlite' in self.formats else 0
+        start = self.report.table_started()
+        with self.sink(table_name, names, types) as sink:
+            yield sink
+        self.report.table_finished(table_name, sink.rows_written, self.table_bytes(table_name) - before, start)
+        self.report.write(self.output_dir)
+
+    def output_chunks(self, table_name: str, names, types, chunks, columnar=False):
+        # chunks can be any iterator/generator of row batches, or of column
+        # chunks (a list with one sequence per column) when columnar is set
+        if not self.selected(table_name):
+            return
+        if self.row_range is not None:
+            start, stop = self.row_range
+            chunks = crop_chunks(chunks, start, float('inf') if stop is None else stop, columnar)
+        with self.reported_sink(table_name, names, types) as sink:
+            for chunk in chunks:
+                if columnar:
+                    sink.write_columns(chunk)
+                else:
+                    sink.write_rows(chunk)
+
+    def output_columns(self, table_name: str, names, types, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+        # write fully built columns without zipping them into one big list of rows
+        total = len(columns[0])
+        chunks = ([c[start:stop] for c in columns] for start, stop in chunk_ranges(total, chunk_size))
+        self.output_chunks(table_name, names, types, chunks, columnar=True)
+
+    def output_sharded(self, table_name: str, names, types, total, build, stream=None, where=None,
+                       shard_rows=DEFAULT_SHARD_ROWS):
+        """
+        Write a table of total rows built shard by shard: build(shard) returns
+        the columns of rows [shard.start, shard.stop), drawing from
+        shard.rng(column) / shard.sampler(column). The shards are built by
+        self.workers processes and written in order, so the file is the same
+        for any number of workers. stream names the streams to draw from
+        (the table name by default); a table derived from another one passes
+        that table's name to see the same rows, and where(columns) to pick
+        the rows it keeps. With a row range only the shards holding those
+        rows are built.
+        """
+        if not self.selected(table_name):
+            return
+        start, stop = self.row_range or (0, None)
+        shards = make_shards(stream or table_name, total, self.seed, shard_rows, start, stop)
+        chunks = generate_shards(build, shards, self.workers, where)
+        # take the first shard before the sink opens, so the worker processes
+        # are forked before any compression thread starts
+        first = next(chunks, None)
+        with self.reported_sink(table_name, names, types) as sink:
+            if first is not None:
+                sink.write_columns(first)
+            for columns in chunks:
+                sink.write_columns(columns)
 
     def finish(self):
         with open(self.output_dir + "/" + "script.py", "w") as f:
@@ -26,14 +178,16 @@ class DatabaseGenerator:
 
 
 def zipf_transform(pool):
-    np.random.seed(2333)
+    # prefer sampling.ZipfSampler, which draws from the same distribution
+    # without expanding the pool
+    state = np.random.RandomState(2333)
     transformed_pool = []
-    dist = np.random.zipf(1.25, len(pool))
+    dist = state.zipf(1.25, len(pool))
     while np.sum(dist) < 0:
         # generate a random number as seed
         random.seed()
-        np.random.seed(random.randrange(100))
-        dist = np.random.zipf(1.25, len(pool))
+        state = np.random.RandomState(random.randrange(100))
+        dist = state.zipf(1.25, len(pool))
 
     dist = dist / np.sum(dist)
     for i in range(len(pool)):
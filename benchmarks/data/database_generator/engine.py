@@ -0,0 +1,571 @@
+import functools
+import math
+from collections import namedtuple
+import numpy as np
+from .schema import type_kind, enum_values
+from .sampling import ZipfSampler, apply_nulls
+from .pools import to_day, day_span
+from .streams import stream_key
+
+DISTRIBUTIONS = ('uniform', 'zipf')
+
+# tables referenced by a foreign key get rows // PARENT_DIVISOR rows, so
+# every parent row is referenced a few times
+PARENT_DIVISOR = 4
+# varchar columns draw from rows // STR_POOL_DIVISOR distinct strings
+STR_POOL_DIVISOR = 10
+# default value ranges, both ends included; decimals are drawn in cents
+INT_RANGE = (0, 999)
+DECIMAL_RANGE = (0, 1000)
+DATE_RANGE = ('2019-01-01', '2021-12-31')
+LATEST_DAY = '9999-12-31'
+# schema type -> declared type of the output column
+OUTPUT_TYPES = {'int': 'int', 'varchar': 'str', 'date': 'date', 'time': 'time', 'numeric': 'numeric',
+                'decimal': 'decimal', 'bool': 'int', 'enum': 'enum'}
+# composite key codes stay below this, so they fit an int64
+CODE_LIMIT = 1 << 62
+# a fix-up pass redraws the rows breaking its rule at most this many times;
+# rows still breaking it are dropped, or kept if the rule cannot tell
+FIX_ROUNDS = 20
+# injected values below or above a bound land up to this many units away from it
+INJECT_SPREAD = 30
+
+# share of a column's rows replaced by one of values (plus offset times a
+# random 1..INJECT_SPREAD, for "some rows below/above x"); which rows is a
+# function of the row number, so referencing tables see the same values
+Injection = namedtuple("Injection", ["share", "values", "offset"])
+
+_MIX1 = np.uint64(0xbf58476d1ce4e5b9)
+_MIX2 = np.uint64(0x94d049bb133111eb)
+
+
+def mix(rows, salt):
+    """
+    splitmix64 finalizer of row + salt: a fixed pseudo random function of the
+    row number, so key columns can be recomputed for any row of any table.
+    """
+    x = np.asarray(rows).astype(np.uint64) + np.uint64(salt % (1 << 64))
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def uniform01(h):
+    # hashes -> floats in [0, 1)
+    return (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def assign(column, where, values):
+    """column[where] = values, widening the column first if values would not fit (longer strings, nulls)."""
+    values = np.asarray(values)
+    if column.dtype != values.dtype and column.dtype != object:
+        if column.dtype.kind == values.dtype.kind == 'U':
+            column = column.astype(np.result_type(column, values))
+        elif column.dtype.kind != values.dtype.kind:
+            column = column.astype(object)
+    column = column.copy()
+    column[where] = values
+    return column
+
+
+@functools.lru_cache(maxsize=None)
+def time_table():
+    # 'HH:MM:SS' for every second of a day
+    return np.array(["%02d:%02d:%02d" % (s // 3600, s // 60 % 60, s % 60) for s in range(86400)])
+
+
+class Domain:
+    """
+    The values a column can take, as indices 0..size-1 and a vectorized
+    render(indices) that turns drawn indices into the column. Columns that
+    share a Domain (the two sides of a Tuples entry) draw from the same
+    values.
+    """
+
+    def __init__(self, size, render, type_name, parent=None):
+        if size < 1:
+            raise ValueError("a column domain needs at least one value, got %d" % size)
+        self.size = size
+        self.render = render
+        self.type = type_name
+        # the TablePlan whose row numbers the indices are, for references
+        self.parent = parent
+
+
+def sub_domain(domain, part=None, half=None):
+    """
+    Every m-th value of domain starting at k (part=(k, m)), or its lower
+    (half=0) or upper (half=1) half. Two columns taking different parts of
+    one domain never share a value; taking its two halves, one is always
+    below the other.
+    """
+    if part is not None:
+        k, m = part
+        return Domain(max((domain.size - k + m - 1) // m, 1), lambda idx: domain.render(idx * m + k), domain.type)
+    if half is not None and domain.size > 1:
+        lower = domain.size // 2
+        if half == 0:
+            return Domain(lower, domain.render, domain.type)
+        return Domain(domain.size - lower, lambda idx: domain.render(idx + lower), domain.type)
+    return domain
+
+
+def int_domain(low, high, type_name='int'):
+    return Domain(high - low + 1, lambda idx: idx + low, type_name)
+
+
+def value_domain(values, kind):
+    # an explicit list of values, e.g. the members of an enum
+    values = [v for v in values]
+    if kind == 'date':
+        pool = np.array(values, dtype='datetime64[D]')
+    elif kind in ('int', 'bool'):
+        pool = np.array(values, dtype=np.int64)
+    elif kind in ('numeric', 'decimal'):
+        pool = np.array(values, dtype=np.float64)
+    else:
+        # enum members spelled null are nulls
+        pool = np.array(['' if v == 'null' else str(v) for v in values])
+    return Domain(len(pool), lambda idx: pool[idx], OUTPUT_TYPES.get(kind, 'str'))
+
+
+def default_domain(name, type_string, rows, key=False, low=None, high=None, values=None):
+    """
+    Domain of a column that is not a foreign key, from its schema type.
+    low/high narrow the range of int, decimal and date columns, values
+    replaces it by an explicit list. A lone key column (key=True) gets as
+    many values as the table has rows, so the rows can all differ.
+    """
+    kind = type_kind(type_string)
+    if values is not None:
+        return value_domain(values, kind)
+    if kind == 'enum':
+        return value_domain(enum_values(type_string), kind)
+    if kind == 'bool':
+        return int_domain(0, 1, OUTPUT_TYPES[kind])
+    if kind == 'int':
+        if low is None and high is None and key:
+            return int_domain(0, max(rows, 1) - 1)
+        if low is None and high is None and name.lower().endswith('id'):
+            # ids of some entity that is not in the schema, as many as a parent table would have
+            return int_domain(0, max(rows // PARENT_DIVISOR, 1) - 1)
+        low = INT_RANGE[0] if low is None else low
+        return int_domain(low, INT_RANGE[1] if high is None else high)
+    if kind in ('numeric', 'decimal'):
+        low = DECIMAL_RANGE[0] if low is None else low
+        high = DECIMAL_RANGE[1] if high is None else high
+        # whole cents first: low + idx / 100 writes 100.02000000000001 when low is fractional
+        cents = int(round(low * 100))
+        return Domain(int(round((high - low) * 100)) + 1, lambda idx: (cents + idx) / 100, OUTPUT_TYPES[kind])
+    if kind == 'date':
+        start = to_day(DATE_RANGE[0] if low is None else low)
+        end = LATEST_DAY if key and high is None else (DATE_RANGE[1] if high is None else high)
+        return Domain(day_span(start, end), lambda idx: start + idx, 'date')
+    if kind == 'time':
+        return Domain(86400, lambda idx: time_table()[idx], 'time')
+    # varchar and anything unknown: name_0, name_1, ...
+    prefix = name + '_'
+    size = max(rows, 1) if key else max(rows // STR_POOL_DIVISOR, 1)
+    return Domain(size, lambda idx: np.char.add(prefix, idx.astype(str)), OUTPUT_TYPES.get(kind, 'str'))
+
+
+
+
+def row_domain(plan, column):
+    """
+    Domain of a column referencing column of another table (or its own):
+    the indices are row numbers of plan, rendered as that row's value, so
+    every reference points at a value the referenced table really has.
+    column has to be one of plan's row functions, see TablePlan.
+    """
+    return Domain(plan.rows, lambda idx: plan.row_values(column, idx), plan.domains[column].type, parent=plan)
+
+
+class KeyCode:
+    """
+    Distinct tuples for a key over columns whose domains have the given
+    sizes, as a function of the row number alone. Row r gets the code
+    r * stride + jitter(r) < space, spelled out in mixed radix over the
+    shortest prefix of the columns whose values already keep the rows apart;
+    the columns after that prefix are hashed from r.
+    """
+
+    def __init__(self, columns, sizes, rows, salt):
+        self.salt = salt
+        self.prefix, self.radix = [], []
+        space = 1
+        for column, size in zip(columns, sizes):
+            if space >= rows:
+                break
+            size = min(size, CODE_LIMIT // space)
+            self.prefix.append(column)
+            self.radix.append(size)
+            space *= size
+        self.stride = space // max(rows, 1)
+
+    def indices(self, column, rows):
+        # the domain index of column at the given rows; column has to be in the prefix
+        code = rows * self.stride + (mix(rows, self.salt) % np.uint64(self.stride)).astype(np.int64)
+        for i, size in reversed(list(zip(self.prefix, self.radix))):
+            if i == column:
+                return code % size
+            code //= size
+
+
+class TablePlan:
+    """
+    How one table is generated: a Domain per column, the number of rows, the
+    fix-up passes of its constraints, and which columns are row functions.
+
+    Row functions are columns whose value at row r can be recomputed from r
+    alone, without generating the table: the columns of the primary key and
+    of every unique group (distinct tuples, see KeyCode), sequences (1, 2,
+    3, ...), permutations of 1..rows, and columns other tables reference,
+    drawn from hashes of r. A key space smaller than the requested rows caps
+    the table at that many rows.
+    """
+
+    def __init__(self, engine, name, names, domains, rows, keys=(), sequences=(), permutations=(),
+                 hashed=(), null_probs=None, injections=None):
+        self.engine = engine
+        self.name = name
+        self.names = names
+        self.domains = domains
+        self.key = list(keys[0]) if keys else []
+        self.sequences = set(sequences)
+        self.permutations = set(permutations)
+        self.null_probs = null_probs or {}
+        self.injections = injections or {}
+        self.fixes = []
+        self.salt = stream_key(name)
+        # a group holding a sequence or permutation is distinct already
+        self.groups = [list(g) for g in keys if g]
+        groups = [g for g in self.groups if not set(g) & (self.sequences | self.permutations)]
+        for group in groups:
+            rows = min(rows, math.prod(domains[i].size for i in group))
+        self.rows = rows
+        self.codes = {}
+        for n, group in enumerate(groups):
+            code = KeyCode(group, [domains[i].size for i in group], rows, self.salt + n)
+            self.codes.update((i, code) for i in code.prefix)
+        self.hashed = (set(hashed) | {i for g in keys for i in g}) - set(self.codes) - self.sequences - self.permutations
+        self.fixed = set(self.codes) | self.hashed | self.sequences | self.permutations
+        # multiplier of the permutation r -> (a * r + b) % rows
+        self.multiplier = max(int(rows * 0.6180339887), 1)
+        while math.gcd(self.multiplier, rows) != 1:
+            self.multiplier += 1
+
+    def distinct(self, column):
+        # whether no two rows share a value of this column
+        return column in self.sequences | self.permutations or [column] in self.groups
+
+    @property
+    def types(self):
+        return [d.type for d in self.domains]
+
+    def row_indices(self, column, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        if column in self.codes:
+            return self.codes[column].indices(column, rows)
+        return self.engine.hashed_draw(self.domains[column].size, rows, self.salt + column + 1)
+
+    def row_values(self, column, rows):
+        """Values of a row function column at the given row numbers."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if column in self.sequences:
+            values = rows + 1
+        elif column in self.permutations:
+            values = (rows * self.multiplier + self.salt % self.rows) % self.rows + 1
+        else:
+            values = self.domains[column].render(self.row_indices(column, rows))
+        return self.inject(column, values, rows)
+
+    def inject(self, column, values, rows):
+        for n, injection in enumerate(self.injections.get(column, ())):
+            salt = self.salt + (column + 1) * 1000 + n
+            where = np.flatnonzero(uniform01(mix(rows, salt)) < injection.share)
+            if not len(where):
+                continue
+            h = mix(rows[where], salt + 1)
+            chosen = np.asarray(injection.values)[(h % np.uint64(len(injection.values))).astype(np.int64)]
+            if injection.offset:
+                chosen = chosen + injection.offset * (1 + (h >> np.uint64(32)) % np.uint64(INJECT_SPREAD)).astype(np.int64)
+            values = assign(values, where, chosen)
+        return values
+
+    def draw(self, column, k, rng):
+        # k fresh values of a column that is not a row function, with their domain indices
+        domain = self.domains[column]
+        indices = self.engine.draw(domain.size, k, rng)
+        return domain.render(indices), indices
+
+    def build(self, shard):
+        rows = shard.rows
+        columns, indices = [], {}
+        for i, name in enumerate(self.names):
+            if i in self.fixed:
+                values = self.row_values(i, rows)
+            else:
+                values, indices[name] = self.draw(i, shard.size, shard.rng(name))
+                values = self.inject(i, values, rows)
+            columns.append(values)
+        if self.fixes:
+            batch = RowBatch(self, shard, columns, indices)
+            for fix in self.fixes:
+                fix.apply(batch)
+            columns = [batch[name] for name in self.names]
+        for i, name in enumerate(self.names):
+            null_prob = self.null_probs.get(name, 0.0)
+            if null_prob:
+                columns[i] = apply_nulls(columns[i], shard.rng(name + ".nulls").random(shard.size) < null_prob)
+        return columns
+
+    def where(self, columns):
+        """Rows the fix-up passes could not repair and the table drops, or None if it keeps all."""
+        keep = None
+        named = dict(zip(self.names, columns))
+        for fix in self.fixes:
+            mask = fix.keep(named)
+            if mask is not None:
+                keep = mask if keep is None else keep & mask
+        return keep
+
+
+class RowBatch:
+    """The columns of one shard while the fix-up passes of its table run over them."""
+
+    def __init__(self, plan, shard, columns, indices):
+        self.plan = plan
+        self.shard = shard
+        self.columns = dict(zip(plan.names, columns))
+        self.indices = indices
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def fixed(self, name):
+        # row functions can not change, other tables recompute them
+        return self.plan.names.index(name) in self.plan.fixed
+
+    def redraw(self, name, where, attempt):
+        column = self.plan.names.index(name)
+        values, indices = self.plan.draw(column, len(where), self.shard.rng("%s.fix%d" % (name, attempt)))
+        self.columns[name] = assign(self.columns[name], where, values)
+        self.indices[name][where] = indices
+
+    def assign(self, name, where, values):
+        # values is one value for every row, or one per row of where
+        values = np.asarray(values)
+        if values.ndim == 0:
+            values = np.full(len(where), values)
+        self.columns[name] = assign(self.columns[name], where, values)
+
+    def parent_values(self, name, parent_column, where=None):
+        """Values of parent_column at the rows of the table that column name references."""
+        parent = self.plan.domains[self.plan.names.index(name)].parent
+        rows = self.indices[name] if where is None else self.indices[name][where]
+        return parent.row_values(parent.names.index(parent_column), rows)
+
+
+# engines by id, so a shard build pickles as (engine id, table name) and the
+# forked workers look up the engine they inherited
+ENGINES = {}
+
+
+def build_table_shard(engine_id, table_name, shard):
+    return ENGINES[engine_id].plans[table_name].build(shard)
+
+
+def table_shard_where(engine_id, table_name, columns):
+    keep = ENGINES[engine_id].plans[table_name].where(columns)
+    return slice(None) if keep is None else keep
+
+
+class SchemaGenerator:
+    """
+    Generates the tables of any schemas/*.json file, no hand-written script
+    needed. Keys are distinct, foreign keys point at existing parent rows,
+    the two columns of every Tuples entry share their values, and every
+    other column is drawn from a default domain for its type, uniformly or
+    zipf skewed. Every table is written with output_sharded, so it streams
+    in shards and can be built by several workers.
+
+    options maps "Table.column" to keyword arguments of default_domain (low,
+    high, values) and to:
+      null_prob     share of nulls in the column
+      ref           (table, column) whose values this column takes
+      row_function  True if other columns reference this one
+      sequence      True for 1, 2, 3, ... in row order
+      permutation   True for a permutation of 1..rows
+      part, half    take part of the domain, see sub_domain
+      inject        list of Injection
+    unique maps a table to lists of columns whose tuples are distinct, on top
+    of its primary key, and fixes maps it to its fix-up passes, objects with
+    apply(batch), keep(columns) and an assigns list of the columns they set
+    (see constraints.py, which compiles all of these from a constraint file).
+    Rules the engine cannot enforce end up in self.unenforced.
+    """
+
+    def __init__(self, schema, rows, distribution='uniform', options=None, unique=None, fixes=None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError("unknown distribution '%s', expected one of %s"
+                             % (distribution, ", ".join(DISTRIBUTIONS)))
+        self.schema = schema
+        self.distribution = distribution
+        self.options = options or {}
+        self.unique = unique or {}
+        self.fixes = fixes or {}
+        self.unenforced = []
+        self.samplers = {}
+        referenced = {parent.lower() for table in schema.tables for parent in self.parents(table)
+                      if parent.lower() != table.name.lower()}
+        self.shared = {}
+        for tup in schema.tuples:
+            # a few entries point past the table list, those are left out
+            if max(int(tup["Table1"]), int(tup["Table2"])) >= len(schema.tables):
+                continue
+            first = (schema.tables[int(tup["Table1"])].name, tup["Name1"])
+            self.shared[(schema.tables[int(tup["Table2"])].name, tup["Name2"])] = first
+        self.plans = {}
+        for table in self.ordered_tables():
+            target = max(rows // PARENT_DIVISOR, 1) if table.name.lower() in referenced else rows
+            self.plans[table.name] = self.plan(table, target)
+        if distribution == 'zipf':
+            # built up front, so forked workers share them instead of each building its own
+            for plan in self.plans.values():
+                for i, domain in enumerate(plan.domains):
+                    if i not in plan.codes:
+                        self.sampler(domain.size)
+        ENGINES[id(self)] = self
+
+    def column_options(self, table_name, column_name):
+        return dict(self.options.get(table_name + "." + column_name, {}))
+
+    def parents(self, table):
+        # names of the tables this one takes values from, by foreign key or ref option
+        names = [fk.parent_table for fk in table.fkeys]
+        for column in table.columns:
+            ref = self.column_options(table.name, column.name).get("ref")
+            if ref is not None:
+                names.append(ref[0])
+        return names
+
+    def ordered_tables(self):
+        # parents before the tables that reference them
+        done, ordered = set(), []
+
+        def visit(table, path):
+            if table.name in done:
+                return
+            if table.name in path:
+                raise ValueError("foreign keys of problem %s form a cycle through %s"
+                                 % (self.schema.problem, table.name))
+            for name in self.parents(table):
+                parent = self.schema.table(name)
+                if parent is not table:
+                    visit(parent, path | {table.name})
+            done.add(table.name)
+            ordered.append(table)
+
+        for table in self.schema.tables:
+            visit(table, set())
+        return ordered
+
+    def plan(self, table, rows):
+        names = [column.name for column in table.columns]
+        groups = [table.primary_key] + self.unique.get(table.name, [])
+        groups = [[names.index(name) for name in group] for group in groups]
+        lone_keys = {g[0] for g in groups if len(g) == 1}
+        fkeys = {fk.column: fk for fk in table.fkeys}
+        domains, null_probs, injections, self_refs = [], {}, {}, []
+        flags = {"sequence": [], "permutation": [], "row_function": []}
+        for i, column in enumerate(table.columns):
+            options = self.column_options(table.name, column.name)
+            null_prob, inject = options.pop("null_prob", 0.0), options.pop("inject", None)
+            if null_prob:
+                null_probs[column.name] = null_prob
+            if inject:
+                injections[i] = inject
+            for flag, indices in flags.items():
+                if options.pop(flag, False):
+                    indices.append(i)
+            part, half = options.pop("part", None), options.pop("half", None)
+            ref = options.pop("ref", None)
+            if ref is not None and self.schema.table(ref[0]) is table:
+                # the table itself is not planned yet, see below
+                self_refs.append((i, ref[1]))
+                ref = None
+            in_key = any(i in g for g in groups)
+            domain = self.domain(table, column, rows, fkeys.get(column.name), ref, options, i in lone_keys, in_key)
+            domains.append(sub_domain(domain, part, half))
+        plan = TablePlan(self, table.name, names, domains, rows, groups, flags["sequence"],
+                         flags["permutation"], flags["row_function"], null_probs, injections)
+        for i, target in self_refs:
+            plan.domains[i] = row_domain(plan, names.index(target))
+        for fix in self.fixes.get(table.name, []):
+            locked = [name for name in fix.assigns if names.index(name) in plan.fixed]
+            if locked:
+                self.unenforced.append((fix.rule, "%s.%s can not be changed" % (table.name, locked[0])))
+            else:
+                plan.fixes.append(fix)
+        return plan
+
+    def domain(self, table, column, rows, fk, ref, options, lone_key, in_key):
+        shared = self.shared.get((table.name, column.name))
+        if shared is not None and not options and ref is None:
+            plan = self.plans.get(shared[0])
+            if plan is not None and shared[1] in plan.names:
+                return plan.domains[plan.names.index(shared[1])]
+        if ref is None and fk is not None and not options:
+            ref = (fk.parent_table, fk.parent_column)
+        if ref is not None:
+            plan = self.plans[self.schema.table(ref[0]).name]
+            # a few schemas name a parent column that does not exist, fall back to the parent key
+            if ref[1] in plan.names:
+                index = plan.names.index(ref[1])
+            else:
+                index = plan.key[0] if plan.key else 0
+            # a part of a composite key (or a hashed column) repeats from row
+            # to row; a key column referencing one draws from its values
+            # instead, so the key stays distinct, at the price of values the
+            # referenced table may not have
+            if index in plan.fixed and (plan.distinct(index) or not in_key):
+                return row_domain(plan, index)
+            if fk is not None:
+                self.unenforced.append(("foreign key %s.%s -> %s.%s" % (table.name, column.name, fk.parent_table,
+                                                                       fk.parent_column),
+                                        "drawn from the domain of %s.%s, some values are not in that table"
+                                        % (plan.name, plan.names[index])))
+            return plan.domains[index]
+        return default_domain(column.name, column.type or 'int', rows, lone_key, **options)
+
+    def sampler(self, size):
+        if size not in self.samplers:
+            self.samplers[size] = ZipfSampler(np.arange(size))
+        return self.samplers[size]
+
+    def draw(self, size, k, rng):
+        """k indices into a domain of size values."""
+        if self.distribution == 'zipf':
+            return self.sampler(size).sample_indices(k, rng)
+        return rng.integers(0, size, size=k)
+
+    def hashed_draw(self, size, rows, salt):
+        """Like draw, but the index of every row is a fixed function of the row number."""
+        h = mix(rows, salt)
+        if self.distribution == 'uniform':
+            return (h % np.uint64(size)).astype(np.int64)
+        sampler = self.sampler(size)
+        u = uniform01(mix(rows, salt + 1))
+        if sampler.cdf is not None:
+            return np.minimum(np.searchsorted(sampler.cdf, u * sampler.cdf[-1], side='right'), size - 1)
+        bucket = (h % np.uint64(size)).astype(np.int64)
+        return np.where(u < sampler.prob[bucket], bucket, sampler.alias[bucket])
+
+    def generate(self, db_generator):
+        """Write every table of the schema through db_generator, in schema order."""
+        for table in self.schema.tables:
+            plan = self.plans[table.name]
+            where = functools.partial(table_shard_where, id(self), plan.name) if plan.fixes else None
+            db_generator.output_sharded(plan.name, plan.names, plan.types, plan.rows,
+                                        functools.partial(build_table_shard, id(self), plan.name), where=where)
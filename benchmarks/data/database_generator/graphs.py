@@ -0,0 +1,64 @@
+import numpy as np
+from .sampling import make_rng
+
+
+def preferential_attachment_edges(n, m, rng=None):
+    """
+    Edges of a Barabási-Albert graph on n nodes, each new node attaching to
+    m distinct existing nodes with probability proportional to their degree:
+    the graph networkx.barabasi_albert_graph(n, m) builds, as two arrays
+    (older, newer) of node ids with older < newer on every edge, in no
+    particular order.
+
+    networkx keeps a list with every node repeated once per edge and has
+    each new node pick its targets from it. Every slot of that list is
+    either a node that was added (known up front) or a copy of an earlier
+    target, picked at random, so all the picks are drawn at once and the
+    copies resolved by pointer jumping, O(log n) passes over the targets.
+    """
+    if m < 1 or m >= n:
+        raise ValueError("preferential attachment needs 1 <= m < n, got m = %d, n = %d" % (m, n))
+    rng = make_rng(2333 if rng is None else rng)
+    # target i is picked by node m + 1 + i // m, from the list as it was before that node
+    count = (n - m - 1) * m
+    # the list starts with the star graph on nodes 0..m: 0 once per edge, then 1..m;
+    # then every node appends its m targets and m copies of itself
+    # list positions fit in int32 up to a billion edges, halving the memory
+    dtype = np.int32 if 2 * m * n < 1 << 31 else np.int64
+    start = np.arange(-m + 1, m + 1, dtype=dtype).clip(0)
+    picks = rng.integers(0, 2 * m * (np.arange(count, dtype=dtype) // m + 1), dtype=dtype)
+    while True:
+        targets = resolve_picks(picks, start, m)
+        # the targets of a node are distinct: redraw the later of two equal ones
+        rows = targets.reshape(-1, m)
+        order = np.argsort(rows, axis=1, kind='stable')
+        ranked = np.take_along_axis(rows, order, axis=1)
+        repeated = np.zeros(rows.shape, dtype=bool)
+        np.put_along_axis(repeated, order[:, 1:], ranked[:, 1:] == ranked[:, :-1], axis=1)
+        redraw = np.flatnonzero(repeated.ravel())
+        if not len(redraw):
+            break
+        picks[redraw] = rng.integers(0, 2 * m * (redraw // m + 1), dtype=dtype)
+    older = np.concatenate([np.zeros(m, dtype=dtype), targets])
+    newer = np.concatenate([np.arange(1, m + 1, dtype=dtype), np.repeat(np.arange(m + 1, n, dtype=dtype), m)])
+    return older, newer
+
+
+def resolve_picks(picks, start, m):
+    # list slot picked -> node: slots of the star graph and the copies of a
+    # node are known, a target slot is whatever that target resolves to
+    block, offset = np.divmod(picks - 2 * m, 2 * m)
+    values = np.where(picks < 2 * m, start[np.minimum(picks, 2 * m - 1)], block + (m + 1))
+    pointers = np.where((picks >= 2 * m) & (offset < m), block * m + offset, -1)
+    del block, offset
+    pending = np.flatnonzero(pointers >= 0)
+    while len(pending):
+        # jump to what the pointee points at, or take its value once it has one
+        to = pointers[pending]
+        jumped = pointers[to]
+        resolved = jumped < 0
+        values[pending[resolved]] = values[to[resolved]]
+        pointers[pending[resolved]] = -1
+        pending = pending[~resolved]
+        pointers[pending] = jumped[~resolved]
+    return values
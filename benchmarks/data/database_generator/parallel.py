@@ -0,0 +1,118 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .sampling import ColumnSampler
+from .streams import RandomStreams
+
+# rows per shard; fixed independently of the number of workers, since the
+# shard boundaries decide which stream every row is drawn from
+DEFAULT_SHARD_ROWS = 1 << 18
+
+
+class Shard:
+    """
+    Row block [start, stop) of a table. Every column of a shard draws from its
+    own counter based stream, addressed by (table, column, shard index), so a
+    shard comes out the same no matter which worker builds it, when, or
+    whether the shards before it were built at all.
+
+    build functions always draw the whole block (size rows); when only rows
+    [lo, hi) of it were asked for, crop() cuts the result down afterwards.
+    """
+
+    def __init__(self, streams, table, index, start, stop, lo=None, hi=None):
+        self.streams = streams
+        self.table = table
+        self.index = index
+        self.start = start
+        self.stop = stop
+        self.lo = start if lo is None else lo
+        self.hi = stop if hi is None else hi
+
+    @property
+    def size(self):
+        return self.stop - self.start
+
+    @property
+    def rows(self):
+        # global row numbers of the shard, e.g. for a primary key column
+        return np.arange(self.start, self.stop)
+
+    def rng(self, column):
+        return self.streams.block_rng(self.index, self.table, column)
+
+    def sampler(self, column):
+        return ColumnSampler(self.rng(column))
+
+    def crop(self, columns):
+        if self.lo == self.start and self.hi == self.stop:
+            return columns
+        return [c[self.lo - self.start:self.hi - self.start] for c in columns]
+
+
+def make_shards(table, total, seed=2333, shard_rows=DEFAULT_SHARD_ROWS, start=0, stop=None):
+    """
+    The shards holding rows [start, stop) of a table of total rows, with the
+    first and last one narrowed to the range. Shards outside of it are left
+    out, so asking for a slice costs at most two extra partial shards.
+    """
+    stop = total if stop is None else min(stop, total)
+    start = max(start, 0)
+    streams = RandomStreams(seed)
+    shards = []
+    for index in range(start // shard_rows, -(-stop // shard_rows) if stop > start else 0):
+        block_start = index * shard_rows
+        block_stop = min(block_start + shard_rows, total)
+        shards.append(Shard(streams, table, index, block_start, block_stop,
+                            max(start, block_start), min(stop, block_stop)))
+    return shards
+
+
+def build_shard(build, shard, where=None):
+    """build(shard) cut down to the rows asked for, keeping the rows where(columns) selects."""
+    columns = shard.crop(build(shard))
+    if where is not None:
+        keep = where(columns)
+        columns = [c[keep] for c in columns]
+    return columns
+
+
+def generate_shards(build, shards, workers=1, where=None):
+    """
+    Yield the columns of every shard, in shard order. With workers > 1 the
+    shards are built in a pool of forked processes, with at most two per
+    worker in flight so finished shards do not pile up in memory. build and
+    where have to be module level functions so they can be pickled.
+    """
+    if workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            yield build_shard(build, shard, where)
+        return
+    # fork, so the workers inherit the pools the script built before calling us
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+        pending = deque()
+        todo = iter(shards)
+        for shard in todo:
+            pending.append(pool.submit(build_shard, build, shard, where))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            columns = pending.popleft().result()
+            for shard in todo:
+                pending.append(pool.submit(build_shard, build, shard, where))
+                break
+            yield columns
+
+
+def generate_rows(build, table, total, start, stop, seed=2333, shard_rows=DEFAULT_SHARD_ROWS, where=None):
+    """
+    Rows [start, stop) of a table as a list of columns, without building the
+    rows before start. table, total, seed and shard_rows must be the ones the
+    table is generated with, e.g. generate_rows(build_emp, "EMP", 4000000,
+    1000000, 1000010).
+    """
+    chunks = list(generate_shards(build, make_shards(table, total, seed, shard_rows, start, stop), where=where))
+    if not chunks:
+        return []
+    return [np.concatenate([chunk[i] for chunk in chunks]) for i in range(len(chunks[0]))]
@@ -0,0 +1,50 @@
+import numpy as np
+from .sampling import make_rng
+
+
+def to_day(date):
+    # datetime.date, 'YYYY-MM-DD' or datetime64 -> datetime64[D]
+    return np.datetime64(date, 'D')
+
+
+def day_span(start, end):
+    # number of days in [start, end], both included
+    return int((to_day(end) - to_day(start)).astype(np.int64)) + 1
+
+
+def date_range(start, end):
+    """Every day from start to end, both included, as a datetime64[D] array."""
+    return np.arange(to_day(start), to_day(end) + 1)
+
+
+def days_before(base, n):
+    """base, base - 1 day, ..., base - (n - 1) days."""
+    return to_day(base) - np.arange(n)
+
+
+def random_dates(start, end, k, rng=None):
+    """k dates drawn uniformly from [start, end], repeats allowed (what fake.date_between gave)."""
+    rng = make_rng(2333 if rng is None else rng)
+    return to_day(start) + rng.integers(0, day_span(start, end), size=k)
+
+
+def unique_dates(start, end, k, rng=None):
+    """k distinct dates from [start, end] (what fake.unique.date_between gave), in random order."""
+    rng = make_rng(2333 if rng is None else rng)
+    span = day_span(start, end)
+    if k > span:
+        raise ValueError("cannot pick %d distinct dates out of %d days" % (k, span))
+    return to_day(start) + rng.choice(span, size=k, replace=False)
+
+
+def prefixed(prefix, n, start=0, suffix=''):
+    """
+    Array of prefix + str(i) + suffix for i in range(start, start + n), e.g.
+    prefixed('brand_', 3) -> ['brand_0', 'brand_1', 'brand_2'].
+    """
+    values = np.arange(start, start + n).astype(str)
+    if prefix:
+        values = np.char.add(prefix, values)
+    if suffix:
+        values = np.char.add(values, suffix)
+    return values
@@ -0,0 +1,91 @@
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+# written into the output folder of every script run
+REPORT_FILE = "run_report.json"
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kilobytes on linux but in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def path_bytes(path):
+    # size of a file, or of everything under a directory; 0 if it is not there
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+class RunReport:
+    """
+    Timings and resource use of one generator script, one record per table.
+    For every table, wall_time runs from the end of the previous table (or
+    the start of the script) so it includes building the columns, while
+    write_time only covers the sink. Peak RSS is the process peak so far;
+    with DBGEN_TRACEMALLOC=1 the peak of python allocations within the
+    table is recorded too, at a large slowdown.
+    """
+
+    def __init__(self, problem_id, size, rows, formats, compression=None, workers=1, trace=None):
+        if trace is None:
+            trace = os.environ.get("DBGEN_TRACEMALLOC") == "1"
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.record = {
+            "problem_id": problem_id,
+            "size": size,
+            "rows_scale": rows,
+            "formats": formats,
+            "compression": compression,
+            "workers": workers,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "wall_time": 0.0,
+            "rows": 0,
+            "bytes": 0,
+            "peak_rss_mb": 0.0,
+            "tables": [],
+        }
+        self.start = self.checkpoint = time.time()
+
+    def table_started(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        return time.time()
+
+    def table_finished(self, table_name, rows, nbytes, write_start):
+        now = time.time()
+        wall_time = now - self.checkpoint
+        self.checkpoint = now
+        table = {
+            "table": table_name,
+            "rows": rows,
+            "bytes": nbytes,
+            "wall_time": round(wall_time, 3),
+            "write_time": round(now - write_start, 3),
+            "rows_per_sec": round(rows / wall_time, 1) if wall_time > 0 else None,
+            # forked shard workers are children, count the largest of them too
+            "peak_rss_mb": round(max(peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN)), 1),
+        }
+        if tracemalloc.is_tracing():
+            table["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        record = self.record
+        record["tables"].append(table)
+        record["wall_time"] = round(now - self.start, 3)
+        record["rows"] += rows
+        record["bytes"] += nbytes
+        record["peak_rss_mb"] = max(record["peak_rss_mb"], table["peak_rss_mb"])
+
+    def write(self, directory):
+        # rewritten after every table, so a script that dies halfway still
+        # leaves the tables it finished
+        with open(os.path.join(directory, REPORT_FILE), "w") as f:
+            json.dump(self.record, f, indent=2)
@@ -0,0 +1,239 @@
+import numpy as np
+
+
+def make_rng(seed=2333):
+    """Accepts a seed or an existing numpy Generator."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+# samplers built without an rng each take the next child stream of this
+# seed, so two of them never draw the same values
+DEFAULT_SEEDS = np.random.SeedSequence(2333)
+
+
+def default_rng():
+    """A generator of its own, spawned from DEFAULT_SEEDS."""
+    return np.random.default_rng(DEFAULT_SEEDS.spawn(1)[0])
+
+
+def as_pool(pool):
+    """Turn a list/range/array pool into a numpy array that can be fancy indexed."""
+    if isinstance(pool, np.ndarray):
+        return pool
+    if isinstance(pool, range):
+        return np.arange(pool.start, pool.stop, pool.step)
+    return np.asarray(pool)
+
+
+class ColumnSampler:
+    """
+    Draws whole columns at once instead of calling random.choice once per row.
+    Every column returned is a numpy array of length k.
+    """
+
+    def __init__(self, seed=2333):
+        self.rng = make_rng(seed)
+
+    def choice(self, pool, k):
+        # uniform choice with replacement, same as [random.choice(pool) for _ in range(k)]
+        pool = as_pool(pool)
+        return pool[self.rng.integers(0, len(pool), size=k)]
+
+    def weighted_choice(self, pool, weights, k):
+        pool = as_pool(pool)
+        p = np.asarray(weights, dtype=np.float64)
+        p = p / p.sum()
+        return pool[self.rng.choice(len(pool), size=k, p=p)]
+
+    def randint(self, low, high, k):
+        # both ends inclusive, same as random.randint
+        return self.rng.integers(low, high, size=k, endpoint=True)
+
+    def null_mask(self, k, null_prob):
+        # True where the value should be replaced by null
+        return self.rng.random(k) < null_prob
+
+    def with_nulls(self, column, null_prob, null=''):
+        return apply_nulls(column, self.null_mask(len(column), null_prob), null)
+
+    def zipf(self, pool, a=1.25):
+        # skewed sampler over pool that draws from this sampler's stream
+        return ZipfSampler(pool, a=a, rng=self.rng)
+
+    def distinct_pairs(self, first, second, k, allow_equal=True):
+        return sample_distinct_pairs(first, second, k, rng=self.rng, allow_equal=allow_equal)
+
+
+def apply_nulls(column, mask, null=''):
+    column = np.asarray(column).astype(object)
+    column[mask] = null
+    return column
+
+
+def zipf_weights(n, a=1.25, seed=2333):
+    """
+    Weight of each pool element under zipf_transform, which repeats element i
+    ceil(dist[i] * n) times. Uses its own RandomState, so the global numpy
+    state is left alone.
+    """
+    draws = np.random.RandomState(seed).zipf(a, n)
+    total = np.sum(draws)
+    if total < 0:
+        # the int64 sum overflowed; zipf_transform reseeds at random here,
+        # take the exact sum instead so the result stays deterministic
+        total = np.sum(draws, dtype=np.float64)
+    return np.ceil(draws / total * n)
+
+
+def build_alias_table(weights):
+    """Vose's alias method: O(n) setup, then every draw is one bucket plus one coin flip."""
+    n = len(weights)
+    prob = np.asarray(weights, dtype=np.float64)
+    prob = prob * (n / prob.sum())
+    small = np.flatnonzero(prob < 1.0).tolist()
+    large = np.flatnonzero(prob >= 1.0).tolist()
+    prob = prob.tolist()
+    alias = list(range(n))
+    while small and large:
+        s = small.pop()
+        l = large[-1]
+        alias[s] = l
+        prob[l] -= 1.0 - prob[s]
+        if prob[l] < 1.0:
+            large.pop()
+            small.append(l)
+    # whatever is left over is full up to rounding error
+    for i in small + large:
+        prob[i] = 1.0
+    return np.array(prob), np.array(alias, dtype=np.int64)
+
+
+# pools larger than this skip the alias table: building it is a python loop
+# over the pool, too slow and too big at 100M elements
+ALIAS_TABLE_LIMIT = 1 << 24
+
+
+class AliasSampler:
+    """
+    Draws pool elements with the given weights in O(1) per draw, using O(pool)
+    memory instead of an expanded copy of the pool. Pools over
+    ALIAS_TABLE_LIMIT are sampled by binary search over the cumulative
+    weights instead, O(log pool) per draw but fully vectorized.
+
+    Without rng, the sampler gets its own stream from default_rng(): it is
+    independent of other samplers', but which one it gets depends on how
+    many samplers the process built before. Pass an rng (ColumnSampler.zipf
+    does) or give one to sample() for reproducible columns.
+    """
+
+    def __init__(self, pool, weights, rng=None):
+        self.pool = as_pool(pool)
+        if len(self.pool) != len(weights):
+            raise ValueError("pool has %d elements but got %d weights" % (len(self.pool), len(weights)))
+        self.weights = np.asarray(weights, dtype=np.float64)
+        if len(self.pool) > ALIAS_TABLE_LIMIT:
+            self.prob = self.alias = None
+            self.cdf = np.cumsum(self.weights)
+        else:
+            self.prob, self.alias = build_alias_table(self.weights)
+            self.cdf = None
+        self.rng = default_rng() if rng is None else make_rng(rng)
+
+    def sample_indices(self, k, rng=None):
+        # rng overrides the sampler's own stream, so one alias table can be
+        # shared by shards that each draw from their own stream
+        rng = self.rng if rng is None else rng
+        if self.cdf is not None:
+            indices = np.searchsorted(self.cdf, rng.random(k) * self.cdf[-1], side='right')
+            return np.minimum(indices, len(self.cdf) - 1)
+        bucket = rng.integers(0, len(self.prob), size=k)
+        coin = rng.random(k)
+        return np.where(coin < self.prob[bucket], bucket, self.alias[bucket])
+
+    def sample(self, k, rng=None):
+        return self.pool[self.sample_indices(k, rng)]
+
+
+class ZipfSampler(AliasSampler):
+    """
+    Same distribution as random.choice(zipf_transform(pool)), without building
+    the expanded pool.
+    """
+
+    def __init__(self, pool, a=1.25, rng=None):
+        pool = as_pool(pool)
+        super().__init__(pool, zipf_weights(len(pool), a), rng)
+
+
+# sample_distinct_pairs draws at most this many pairs per round (past k)
+MAX_PAIR_BATCH = 1 << 24
+
+
+def sample_distinct_pairs(first, second, k, rng=None, allow_equal=True):
+    """
+    Sample k distinct (a, b) pairs from first x second, e.g. for a composite
+    primary key. first and second are plain pools (uniform marginals) or
+    AliasSampler/ZipfSampler objects (skewed marginals).
+
+    The result has the same distribution as drawing pairs one by one and
+    skipping the ones already seen, but pairs are handled as int64 codes
+    i * len(second) + j in vectorized batches, so there is no tuple set.
+    Pairs are distinct by value even if a pool repeats values. With
+    allow_equal=False, pairs whose two values are equal are skipped too.
+    Returns the two columns as arrays.
+    """
+    rng = make_rng(2333 if rng is None else rng)
+    first_pool, draw_first = _index_drawer(first, rng)
+    second_pool, draw_second = _index_drawer(second, rng)
+    n1, n2 = len(first_pool), len(second_pool)
+    # both pools hold distinct values here, so each shared value is one equal pair
+    available = n1 * n2 if allow_equal else n1 * n2 - len(np.intersect1d(first_pool, second_pool))
+    if k > available:
+        raise ValueError("cannot pick %d distinct pairs out of %d" % (k, available))
+
+    picked = np.empty(0, dtype=np.int64)
+    seen = np.empty(0, dtype=np.int64)  # sorted copy of picked for lookups
+    # first guess assumes no collisions, later batches scale by the observed yield
+    batch = max(k, 1024)
+    limit = max(batch, MAX_PAIR_BATCH)
+    while len(picked) < k:
+        codes = draw_first(batch) * n2 + draw_second(batch)
+        if not allow_equal:
+            codes = codes[first_pool[codes // n2] != second_pool[codes % n2]]
+        # keep the first occurrence of each code, in draw order
+        _, first_seen = np.unique(codes, return_index=True)
+        codes = codes[np.sort(first_seen)]
+        codes = codes[~np.isin(codes, seen, assume_unique=True)]
+        codes = codes[:k - len(picked)]
+        picked = np.concatenate([picked, codes])
+        seen = np.sort(picked)
+        missing = k - len(picked)
+        if missing and len(codes) == 0 and batch >= limit:
+            raise ValueError("no new pair in %d draws with %d of %d pairs left to pick: the marginals "
+                             "rarely or never draw the rest" % (batch, missing, k))
+        if len(codes) > 0:
+            batch = min(max(int(missing * batch / len(codes) * 1.1), 1024), limit)
+        else:
+            batch = min(batch * 2, limit)
+    return first_pool[picked // n2], second_pool[picked % n2]
+
+
+def _index_drawer(pool, rng):
+    # returns the pool values and a function that draws k indices into them
+    if isinstance(pool, AliasSampler):
+        # the sampler's alias table, but draws from rng: two samplers
+        # sharing a default stream would only ever give (i, i) pairs
+        values, weights = pool.pool, pool.weights
+        draw = lambda k: pool.sample_indices(k, rng)
+    else:
+        values, weights = as_pool(pool), None
+        draw = lambda k: rng.integers(0, len(values), size=k)
+    unique, inverse = np.unique(values, return_inverse=True)
+    if len(unique) == len(values):
+        return values, draw
+    # repeated values would turn distinct codes into equal pairs, so merge
+    # them into one element carrying their combined weight
+    merged = np.bincount(inverse, weights=weights, minlength=len(unique))
+    return unique, AliasSampler(unique, merged, rng).sample_indices
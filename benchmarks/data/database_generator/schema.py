@@ -0,0 +1,66 @@
+import json
+from collections import namedtuple
+
+# type is the raw schema string, e.g. "int" or "enum,F,M"
+Column = namedtuple("Column", ["name", "type"])
+ForeignKey = namedtuple("ForeignKey", ["column", "parent_table", "parent_column"])
+
+
+def type_kind(type_string):
+    # "enum,F,M" -> "enum"
+    return type_string.split(",")[0].strip()
+
+
+def enum_values(type_string):
+    # "enum,F,M" -> ["F", "M"]
+    return [v.strip() for v in type_string.split(",")[1:]]
+
+
+class Table:
+    def __init__(self, name, pkeys, fkeys, others):
+        self.name = name
+        self.pkeys = pkeys
+        self.fkeys = fkeys
+        self.others = others
+
+    @property
+    def columns(self):
+        # foreign key columns are only listed by name, so they carry no type here
+        listed = {c.name for c in self.pkeys + self.others}
+        fk_columns = [Column(f.column, None) for f in self.fkeys if f.column not in listed]
+        return self.pkeys + fk_columns + self.others
+
+    @property
+    def primary_key(self):
+        return [c.name for c in self.pkeys]
+
+
+class Schema:
+    """One schemas/*.json file: the tables of a problem with their keys."""
+
+    def __init__(self, problem, tables, tuples=None):
+        self.problem = problem
+        self.tables = tables
+        self.tuples = tuples or []
+
+    def table(self, name):
+        # generator scripts and schemas do not always agree on case
+        for t in self.tables:
+            if t.name.lower() == name.lower():
+                return t
+        return None
+
+
+def load_schema(path):
+    with open(path) as f:
+        data = json.load(f)
+    raw_tables = data["Tables"]
+    tables = []
+    for raw in raw_tables:
+        fkeys = [ForeignKey(fk["FName"], raw_tables[int(fk["PTable"])]["TableName"], fk["PName"])
+                 for fk in raw["FKeys"]]
+        tables.append(Table(raw["TableName"],
+                            [Column(c["Name"], c["Type"]) for c in raw["PKeys"]],
+                            fkeys,
+                            [Column(c["Name"], c["Type"]) for c in raw["Others"]]))
+    return Schema(str(data["Problem Number"]), tables, data.get("Tuples"))
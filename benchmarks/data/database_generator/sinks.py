@@ -0,0 +1,206 @@
+import bz2
+import csv
+import gzip
+import lzma
+import queue
+import threading
+import numpy as np
+from .csvformat import format_rows
+
+# number of rows turned into python objects at a time when writing columns
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def chunk_ranges(total, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (start, stop) pairs that cover range(total) in chunks."""
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+# compression name -> (file suffix, opener, keyword arguments for writing);
+# the levels favour speed, the default gzip -9 and xz -6 take several times
+# longer than generating the rows
+COMPRESSIONS = {
+    'gzip': ('.gz', gzip.open, {'compresslevel': 6}),
+    'xz': ('.xz', lzma.open, {'preset': 1}),
+    'bz2': ('.bz2', bz2.open, {'compresslevel': 9}),
+}
+
+
+def open_csv(path):
+    """Open a (possibly compressed) table for reading as a text stream, e.g. csv.reader(open_csv(p))."""
+    for suffix, opener, _ in COMPRESSIONS.values():
+        if path.endswith(suffix):
+            return opener(path, "rt", newline='')
+    return open(path, newline='')
+
+
+class BackgroundCompressor:
+    """
+    Text file object whose compression runs on a background thread. write()
+    only buffers text; full blocks are encoded and handed over through a
+    bounded queue, so formatting rows and compressing them overlap (zlib, lzma
+    and bz2 release the GIL) while memory stays at a few blocks.
+    """
+
+    def __init__(self, path, compression, block_size=1 << 20, queue_size=8):
+        _, opener, options = COMPRESSIONS[compression]
+        self.file = opener(path, "wb", **options)
+        self.block_size = block_size
+        self.parts = []
+        self.buffered = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self.compress, daemon=True)
+        self.thread.start()
+
+    def compress(self):
+        while True:
+            block = self.queue.get()
+            if block is None:
+                break
+            if self.error is None:
+                try:
+                    self.file.write(block)
+                except Exception as e:
+                    # keep draining so the producer never blocks on a full queue
+                    self.error = e
+        self.file.close()
+
+    def write(self, text):
+        self.parts.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.block_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.parts:
+            self.queue.put("".join(self.parts).encode())
+            self.parts = []
+            self.buffered = 0
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def crop_chunks(chunks, start, stop, columnar=False):
+    """Keep rows [start, stop) of a stream of row batches (or column chunks)."""
+    offset = 0
+    for chunk in chunks:
+        if not columnar:
+            chunk = list(chunk)
+        n = len(chunk[0]) if columnar else len(chunk)
+        lo, hi = max(start - offset, 0), min(stop - offset, n)
+        offset += n
+        if lo < hi:
+            yield [c[lo:hi] for c in chunk] if columnar else chunk[lo:hi]
+        if offset >= stop:
+            break
+
+
+def to_list(column):
+    # ndarray.tolist() hands csv plain python ints/strs/dates, which format
+    # much faster than numpy scalars and give the same text
+    if isinstance(column, np.ndarray):
+        return column.tolist()
+    return list(column)
+
+
+class TableSink:
+    """
+    Writes one table as CSV: the name and type header rows first, then any
+    number of row batches or column chunks. Nothing is kept after a batch is
+    written, so memory is bounded by the largest batch passed in. With a
+    compression from COMPRESSIONS, path should carry its suffix.
+    """
+
+    def __init__(self, path, names, types, compression=None):
+        if len(names) != len(types):
+            raise ValueError("got %d column names but %d types" % (len(names), len(types)))
+        self.path = path
+        self.names = list(names)
+        self.types = list(types)
+        self.rows_written = 0
+        if compression is None:
+            self.file = open(path, "w")
+        else:
+            self.file = BackgroundCompressor(path, compression)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.names)
+        self.writer.writerow(self.types)
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+        self.rows_written += 1
+
+    def write_rows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        if set(map(len, rows)) != {len(self.names)}:
+            # ragged rows: leave them to csv.writer, which writes them as they are
+            self.writer.writerows(rows)
+            self.rows_written += len(rows)
+            return
+        self.write_columns([list(c) for c in zip(*rows)])
+
+    def write_columns(self, columns):
+        # formatted a column at a time from the declared types, see csvformat.py;
+        # the bytes are the same csv.writer would write
+        if len(columns) != len(self.names):
+            raise ValueError("expected %d columns, got %d" % (len(self.names), len(columns)))
+        length = len(columns[0])
+        if any(len(c) != length for c in columns):
+            raise ValueError("columns have different lengths")
+        self.file.write(format_rows(columns, self.types))
+        self.rows_written += length
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MultiSink:
+    """Fans every batch out to several sinks, e.g. CSV and columnar at once."""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    @property
+    def rows_written(self):
+        return self.sinks[0].rows_written
+
+    def write_row(self, row):
+        for sink in self.sinks:
+            sink.write_row(row)
+
+    def write_rows(self, rows):
+        rows = list(rows)
+        for sink in self.sinks:
+            sink.write_rows(rows)
+
+    def write_columns(self, columns):
+        for sink in self.sinks:
+            sink.write_columns(columns)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,34 @@
+import re
+
+# rows of scale factor 1, the default size of every script
+SCALE_FACTOR_ROWS = 1000000
+
+SUFFIXES = {'': 1, 'K': 1000, 'M': 1000000, 'B': 1000000000}
+
+SIZE_LABEL = re.compile(r'^(\d+(?:\.\d+)?)([KMB]?)$', re.IGNORECASE)
+SCALE_FACTOR = re.compile(r'^sf(\d+(?:\.\d+)?)$', re.IGNORECASE)
+
+
+def parse_size(label):
+    """
+    Number of rows a size argument asks for. Accepts the usual labels
+    ("100K", "1M", "10M", "50M", "2.5M"), the calcite ones ("calcite_4M"),
+    plain row counts ("123456") and scale factors ("sf0.1" is 100K rows,
+    "sf100" is 100M). Anything else is an error instead of silently
+    generating the default size.
+    """
+    text = str(label).strip()
+    # "calcite_4M" -> "4M"
+    text = text.rsplit('_', 1)[-1]
+    match = SCALE_FACTOR.match(text)
+    if match:
+        rows = float(match.group(1)) * SCALE_FACTOR_ROWS
+    else:
+        match = SIZE_LABEL.match(text)
+        if not match:
+            raise ValueError("unknown database size '%s', expected e.g. 100K, 50M, calcite_4M, 123456 or sf10"
+                             % label)
+        rows = float(match.group(1)) * SUFFIXES[match.group(2).upper()]
+    if rows < 1:
+        raise ValueError("database size '%s' has no rows" % label)
+    return int(round(rows))
@@ -0,0 +1,124 @@
+import sys
+import sqlite3
+import numpy as np
+from .sinks import to_list
+
+SQL_TYPES = {'int': 'INTEGER', 'decimal': 'REAL', 'numeric': 'REAL', 'float': 'REAL'}
+# everything else, dates included, is stored as TEXT
+
+# bulk load settings: the file is rebuilt from scratch if a load dies halfway,
+# so there is no point paying for a journal or fsyncs
+PRAGMAS = [
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+]
+
+# rows handed to one executemany call
+BATCH_SIZE = 50000
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_value(v):
+    # '' is how the CSV files spell null; sqlite3 cannot bind numpy scalars
+    if isinstance(v, np.generic):
+        return v.item()
+    return None if v == '' else v
+
+
+def sql_values(column, type_name):
+    values = to_list(column)
+    if type_name == 'date':
+        return [None if v == '' or v is None else str(v) for v in values]
+    return [sql_value(v) for v in values]
+
+
+class SQLiteTableSink:
+    """
+    Streams a table into a SQLite file with batched executemany inside one
+    transaction. On close it creates the primary and foreign key indexes that
+    schema_table (a schema.Table, optional) declares.
+    """
+
+    def __init__(self, db_path, table_name, names, types, schema_table=None):
+        if len(names) != len(types):
+            raise ValueError("got %d column names but %d types" % (len(names), len(types)))
+        self.table_name = table_name
+        self.names = list(names)
+        self.types = list(types)
+        self.schema_table = schema_table
+        self.rows_written = 0
+        self.pending = []
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        columns = ", ".join(quote(n) + " " + SQL_TYPES.get(t, 'TEXT') for n, t in zip(self.names, self.types))
+        self.conn.execute("DROP TABLE IF EXISTS " + quote(table_name))
+        self.conn.execute("CREATE TABLE " + quote(table_name) + " (" + columns + ")")
+        self.insert = "INSERT INTO %s VALUES (%s)" % (quote(table_name), ", ".join("?" * len(self.names)))
+        self.conn.execute("BEGIN")
+
+    def write_row(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def write_columns(self, columns):
+        if len(columns) != len(self.names):
+            raise ValueError("expected %d columns, got %d" % (len(self.names), len(columns)))
+        self.flush()
+        columns = [sql_values(c, t) for c, t in zip(columns, self.types)]
+        self.conn.executemany(self.insert, zip(*columns))
+        self.rows_written += len(columns[0])
+
+    def flush(self):
+        if not self.pending:
+            return
+        columns = [sql_values(c, t) for c, t in zip(zip(*self.pending), self.types)]
+        self.conn.executemany(self.insert, zip(*columns))
+        self.rows_written += len(self.pending)
+        self.pending = []
+
+    def create_indexes(self):
+        table = self.schema_table
+        if table is None:
+            return
+        known = {n.lower(): n for n in self.names}
+        pkey = [known.get(c.lower()) for c in table.primary_key]
+        if pkey and all(pkey):
+            columns = ", ".join(quote(c) for c in pkey)
+            try:
+                self.conn.execute("CREATE UNIQUE INDEX %s ON %s (%s)"
+                                  % (quote("pk_" + self.table_name), quote(self.table_name), columns))
+            except sqlite3.IntegrityError:
+                print("warning: primary key of %s is not unique, creating a plain index" % self.table_name,
+                      file=sys.stderr)
+                self.conn.execute("CREATE INDEX %s ON %s (%s)"
+                                  % (quote("pk_" + self.table_name), quote(self.table_name), columns))
+        for fk in table.fkeys:
+            column = known.get(fk.column.lower())
+            if column is None:
+                continue
+            self.conn.execute("CREATE INDEX IF NOT EXISTS %s ON %s (%s)"
+                              % (quote("fk_" + self.table_name + "_" + column), quote(self.table_name), quote(column)))
+
+    def close(self):
+        self.flush()
+        self.conn.execute("COMMIT")
+        self.create_indexes()
+        self.conn.execute("ANALYZE " + quote(self.table_name))
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
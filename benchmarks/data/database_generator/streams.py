@@ -0,0 +1,46 @@
+import hashlib
+import numpy as np
+
+
+def stream_key(part):
+    """
+    Turn one part of a stream address (a table or column name, or a shard
+    number) into the non-negative int SeedSequence wants. Names are hashed
+    instead of using hash(), which changes from one interpreter to the next.
+    """
+    if isinstance(part, (int, np.integer)):
+        if part < 0:
+            raise ValueError("stream key parts must be non-negative, got %d" % part)
+        return int(part)
+    return int.from_bytes(hashlib.sha256(str(part).encode()).digest()[:8], "little")
+
+
+class RandomStreams:
+    """
+    Independent random streams spawned from one root seed and addressed by
+    name, e.g. streams.rng("pools", "SAL"). Each address maps to its own
+    SeedSequence child, so a stream never depends on which other streams
+    were drawn from, in what order, or in which process.
+
+    block_rng(3, "EMP", "SAL") is the stream of row block 3 of column SAL of
+    table EMP. It is counter based: the address picks a Philox key and the
+    block number is the high word of the counter, so any block can be
+    generated on its own without touching the blocks before it.
+    """
+
+    def __init__(self, seed=2333):
+        self.seed = seed
+
+    def seed_sequence(self, *key):
+        # same construction SeedSequence.spawn uses for its children, with the
+        # spawn key spelled out so it can be rebuilt anywhere
+        return np.random.SeedSequence(self.seed, spawn_key=tuple(stream_key(k) for k in key))
+
+    def rng(self, *key):
+        return np.random.Generator(np.random.PCG64(self.seed_sequence(*key)))
+
+    def block_rng(self, block, *key):
+        # a block draws at most a few values per row, far below the 2**192
+        # counter steps that separate it from the next block
+        philox_key = self.seed_sequence(*key).generate_state(2, np.uint64)
+        return np.random.Generator(np.random.Philox(key=philox_key, counter=int(block) << 192))
@@ -0,0 +1,672 @@
+"""
+Checks a generated database against its schemas/*.json file and, if there
+is one, its constraints/*.yml file: primary keys (and unique() groups) are
+distinct and not null, foreign keys and '<-' rules only point at values the
+referenced column has, the value and row rules hold, and how many nulls
+every column has.
+
+Every table is streamed from its CSV file in chunks by one worker process
+of a pool, so memory stays at a chunk plus the key columns. Keys are kept
+as sorted int64 fingerprints of their text, 8 bytes a row whatever their
+type; the few checks that need two tables at once (foreign keys, rules
+between tables) combine what the workers send back. Only ordering rules
+through a foreign key need a second pass, over the child table.
+"""
+
+import csv
+import multiprocessing
+import operator
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .constraints import COMPARISON, FUNCTION, OPERATORS, Constraints, UnsupportedRule, parse_constraints
+from .sinks import COMPRESSIONS, open_csv
+
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+
+# placeholder parsed in place of a null, the null mask is what counts
+NULL_TEXT = {'int': '0', 'bool': '0', 'numeric': '0', 'decimal': '0', 'float': '0', 'date': '1970-01-01'}
+PARSED_TYPES = {'int': np.int64, 'bool': np.int64, 'numeric': np.float64, 'decimal': np.float64,
+                'float': np.float64, 'date': 'datetime64[D]'}
+
+# the outcome of one check; failures counts rows (or values) breaking it
+Finding = namedtuple("Finding", ["table", "check", "failures", "detail"])
+
+
+def fingerprint(texts):
+    """64 bit FNV-1a hash of every string of a str array, the same whatever the array's width."""
+    codes = np.ascontiguousarray(texts).view(np.uint32).reshape(len(texts), -1)
+    hashes = np.full(len(texts), FNV_OFFSET, dtype=np.uint64)
+    for j in range(codes.shape[1]):
+        code = codes[:, j].astype(np.uint64)
+        # the padding of shorter strings must not count
+        hashes = np.where(code != 0, (hashes ^ code) * FNV_PRIME, hashes)
+    return hashes
+
+
+def fingerprints(columns):
+    # one int64 per row for a (composite) key, from the text of its columns
+    hashes = fingerprint(columns[0])
+    for column in columns[1:]:
+        hashes = (hashes * FNV_PRIME) ^ fingerprint(column)
+    return hashes.view(np.int64)
+
+
+def parse(texts, kind):
+    """(values, nulls) of a column: int64, float64 or datetime64 where the kind says so and every value parses."""
+    nulls = texts == ''
+    if kind in PARSED_TYPES:
+        try:
+            return np.where(nulls, NULL_TEXT[kind], texts).astype(PARSED_TYPES[kind]), nulls
+        except ValueError:
+            pass
+    return texts, nulls
+
+
+class Chunk:
+    """
+    A block of rows of a table, columns as lists of str; each column is
+    turned into an array and parsed only once, when a check asks for it.
+    """
+
+    def __init__(self, columns, kinds, start):
+        self.columns = columns
+        self.kinds = kinds
+        self.start = start
+        self.arrays = {}
+        self.parsed = {}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def text(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = np.array(self.columns[name])
+        return self.arrays[name]
+
+    def values(self, name):
+        if name not in self.parsed:
+            self.parsed[name] = parse(self.text(name), self.kinds.get(name))
+        return self.parsed[name][0]
+
+    def nulls(self, name):
+        self.values(name)
+        return self.parsed[name][1]
+
+    def fingerprints(self, names):
+        return fingerprints([self.text(n) for n in names])
+
+
+def holds(values, op, other, nulls):
+    # op row by row, rows with a null on either side count as holding
+    return np.asarray(op(values, other), dtype=bool) | nulls
+
+
+class Check:
+    """
+    One property of a table, accumulated chunk by chunk in the worker that
+    scans the table. result() is sent back to the main process: a Finding,
+    or the data a check between two tables needs.
+    """
+
+    def __init__(self, table, name, columns):
+        self.table = table
+        self.name = name
+        self.columns = list(columns)
+        # set by scan_table when the values of a column do not compare with the rule's
+        self.error = None
+
+    def update(self, chunk):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+    def finding(self, failures, detail=""):
+        return Finding(self.table, self.name, int(failures), detail)
+
+
+class KeyCheck(Check):
+    """The columns are distinct together and never null."""
+
+    def __init__(self, table, name, columns):
+        super().__init__(table, name, columns)
+        self.keys = []
+        self.nulls = 0
+
+    def update(self, chunk):
+        nulls = np.zeros(len(chunk), dtype=bool)
+        for c in self.columns:
+            nulls |= chunk.text(c) == ''
+        self.nulls += int(nulls.sum())
+        self.keys.append(chunk.fingerprints(self.columns))
+
+    def result(self):
+        keys = np.sort(np.concatenate(self.keys)) if self.keys else np.empty(0, dtype=np.int64)
+        duplicates = int((keys[1:] == keys[:-1]).sum())
+        detail = "%d duplicate keys, %d with nulls" % (duplicates, self.nulls) if duplicates or self.nulls else ""
+        return self.finding(duplicates + self.nulls, detail)
+
+
+class ValueSet(Check):
+    """The distinct non-null values of a column, as sorted fingerprints, and how often each appears."""
+
+    def __init__(self, table, name, columns):
+        super().__init__(table, name, columns)
+        self.keys = []
+
+    def update(self, chunk):
+        present = chunk.text(self.columns[0]) != ''
+        self.keys.append(chunk.fingerprints(self.columns)[present])
+
+    def result(self):
+        if not self.keys:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(self.keys), return_counts=True)
+
+
+class Compare(Check):
+    """column op value (or op another column of the row) holds on every row."""
+
+    def __init__(self, table, name, column, op, value=None, other=None):
+        super().__init__(table, name, [column] + ([other] if other else []))
+        self.column, self.op, self.value, self.other = column, op, value, other
+        self.failures = 0
+
+    def update(self, chunk):
+        nulls = chunk.nulls(self.column)
+        if self.other is None:
+            other = self.value
+        else:
+            other = chunk.values(self.other)
+            nulls = nulls | chunk.nulls(self.other)
+        self.failures += int((~holds(chunk.values(self.column), self.op, other, nulls)).sum())
+
+    def result(self):
+        return self.finding(self.failures)
+
+
+class Some(Check):
+    """column op value holds on at least one row: a (s) rule, or a value a '->' rule asks for."""
+
+    def __init__(self, table, name, column, op, value):
+        super().__init__(table, name, [column])
+        self.column, self.op, self.value = column, op, value
+        self.found = False
+
+    def update(self, chunk):
+        if not self.found:
+            self.found = bool((~chunk.nulls(self.column) & self.op(chunk.values(self.column), self.value)).any())
+
+    def result(self):
+        return self.finding(0 if self.found else 1, "" if self.found else "no row has it")
+
+
+class HasNulls(Check):
+    def __init__(self, table, name, column):
+        super().__init__(table, name, [column])
+        self.found = False
+
+    def update(self, chunk):
+        self.found = self.found or bool(chunk.nulls(self.columns[0]).any())
+
+    def result(self):
+        return self.finding(0 if self.found else 1, "" if self.found else "the column has no nulls")
+
+
+class Implication(Check):
+    """Where condition op value holds, column is target (null for None)."""
+
+    def __init__(self, table, name, condition, op, value, column, target):
+        super().__init__(table, name, [condition, column])
+        self.condition, self.op, self.value = condition, op, value
+        self.column, self.target = column, target
+        self.failures = 0
+
+    def update(self, chunk):
+        applies = ~chunk.nulls(self.condition) & self.op(chunk.values(self.condition), self.value)
+        if self.target is None:
+            wrong = ~chunk.nulls(self.column)
+        else:
+            wrong = chunk.nulls(self.column) | (chunk.values(self.column) != self.target)
+        self.failures += int((applies & wrong).sum())
+
+    def result(self):
+        return self.finding(self.failures)
+
+
+class Sequence(Check):
+    """inc(): the column is 1, 2, 3, ... in row order."""
+
+    def __init__(self, table, name, column):
+        super().__init__(table, name, [column])
+        self.failures = 0
+
+    def update(self, chunk):
+        expected = np.arange(chunk.start + 1, chunk.start + len(chunk) + 1)
+        self.failures += int((chunk.nulls(self.columns[0]) | (chunk.values(self.columns[0]) != expected)).sum())
+
+    def result(self):
+        return self.finding(self.failures)
+
+
+class Permutation(Check):
+    """bound(): the column holds every number of 1..rows exactly once."""
+
+    def __init__(self, table, name, column):
+        super().__init__(table, name, [column])
+        self.values = []
+
+    def update(self, chunk):
+        values = chunk.values(self.columns[0])
+        self.values.append(np.where(chunk.nulls(self.columns[0]), 0, values) if values.dtype.kind in 'iu'
+                           else np.zeros(len(values), dtype=np.int64))
+
+    def result(self):
+        values = np.sort(np.concatenate(self.values)) if self.values else np.empty(0, dtype=np.int64)
+        return self.finding((values != np.arange(1, len(values) + 1)).sum())
+
+
+class Extremes(Check):
+    """Smallest and largest non-null value of a column, for ordering rules between unrelated tables."""
+
+    def __init__(self, table, name, column):
+        super().__init__(table, name, [column])
+        self.low = self.high = None
+
+    def update(self, chunk):
+        values = chunk.values(self.columns[0])[~chunk.nulls(self.columns[0])]
+        if len(values):
+            low, high = values.min(), values.max()
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+
+    def result(self):
+        return self.low, self.high
+
+
+class Lookup(Check):
+    """key -> value of a parent table, for comparing child rows with the row their foreign key points at."""
+
+    def __init__(self, table, name, key, column):
+        super().__init__(table, name, [key, column])
+        self.keys, self.values, self.nulls = [], [], []
+
+    def update(self, chunk):
+        self.keys.append(chunk.fingerprints(self.columns[:1]))
+        self.values.append(chunk.values(self.columns[1]))
+        self.nulls.append(chunk.nulls(self.columns[1]))
+
+    def result(self):
+        if not self.keys:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=bool)
+        keys = np.concatenate(self.keys)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], np.concatenate(self.values)[order], np.concatenate(self.nulls)[order]
+
+
+class JoinedCompare(Check):
+    """column op the parent's column on the row the foreign key via points at; unmatched rows are the FK check's."""
+
+    def __init__(self, table, name, column, op, via, lookup):
+        super().__init__(table, name, [column, via])
+        self.column, self.op, self.via = column, op, via
+        self.lookup = lookup
+        self.failures = 0
+
+    def update(self, chunk):
+        keys, values, nulls = self.lookup
+        if not len(keys):
+            return
+        wanted = chunk.fingerprints([self.via])
+        index = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        matched = keys[index] == wanted
+        mine = chunk.values(self.column)[matched]
+        other = values[index[matched]]
+        skip = chunk.nulls(self.column)[matched] | nulls[index[matched]]
+        self.failures += int((~holds(mine, self.op, other, skip)).sum())
+
+    def result(self):
+        return self.finding(self.failures)
+
+
+def table_path(folder, table_name):
+    """The CSV file of a table in an output folder, compressed or not, matching the name case insensitively."""
+    suffixes = [".csv"] + [".csv" + suffix for suffix, _, _ in COMPRESSIONS.values()]
+    for name in sorted(os.listdir(folder)):
+        for suffix in suffixes:
+            if name.endswith(suffix) and name[:-len(suffix)].lower() == table_name.lower():
+                return os.path.join(folder, name)
+    return None
+
+
+def read_header(path):
+    # the column names and declared types, the first two rows of every table
+    with open_csv(path) as f:
+        reader = csv.reader(f)
+        return next(reader, []), next(reader, [])
+
+
+def read_columns(f, width, size_hint):
+    """
+    The next block of about size_hint characters of an open CSV file as
+    (columns, rows), or None at the end. Blocks without quotes are split on
+    the separators directly, much faster than csv.reader; the rest go
+    through it, with short rows padded (a missing field reads as a null).
+    """
+    lines = f.readlines(size_hint)
+    if not lines:
+        return None
+    text = "".join(lines)
+    if '"' not in text:
+        fields = text.replace('\r\n', '\n').replace('\n', ',').split(',')
+        if not text.endswith('\n'):
+            fields.append('')
+        fields.pop()
+        if len(fields) == len(lines) * width:
+            return [fields[i::width] for i in range(width)], len(lines)
+    # a quoted field may hold line breaks: read on until every quote is closed
+    while text.count('"') % 2:
+        line = f.readline()
+        if not line:
+            break
+        lines.append(line)
+        text += line
+    rows = [(r + [''] * width)[:width] for r in csv.reader(lines)]
+    return [list(c) for c in zip(*rows)] if rows else [[] for _ in range(width)], len(rows)
+
+
+def scan_table(path, kinds, checks, block_size=1 << 23):
+    """
+    Stream one table through its checks; returns the number of rows, the
+    nulls of every column and the result of every check. Runs in a worker,
+    so checks travel pickled and only their results come back.
+    """
+    rows = 0
+    with open_csv(path) as f:
+        reader = csv.reader(f)
+        names = next(reader, [])
+        next(reader, None)
+        nulls = dict.fromkeys(names, 0)
+        while names:
+            block = read_columns(f, len(names), block_size)
+            if block is None:
+                break
+            columns, length = block
+            if not length:
+                continue
+            columns = dict(zip(names, columns))
+            chunk = Chunk(columns, kinds, rows)
+            for name, column in columns.items():
+                nulls[name] += column.count('')
+            for check in checks:
+                if check.error is None:
+                    try:
+                        check.update(chunk)
+                    except TypeError as e:
+                        check.error = "the values do not compare: %s" % e
+            rows += length
+    return rows, nulls, [check.finding(1, check.error) if check.error else check.result() for check in checks]
+
+
+class DatabaseValidator:
+    """
+    The checks of one database folder, built from the schema (and the
+    constraints file) and run with validate(). Rules no check is built for
+    are listed in not_checked as (rule, reason) pairs.
+    """
+
+    def __init__(self, folder, schema, constraints_text=None):
+        self.folder = folder
+        self.schema = schema
+        # only used to resolve rule names and literals, like the generator does
+        self.resolver = Constraints(schema)
+        self.paths = {}
+        self.names = {}
+        for table in schema.tables:
+            path = table_path(folder, table.name)
+            if path is not None:
+                self.paths[table.name] = path
+                self.names[table.name] = {n.lower(): n for n in read_header(path)[0]}
+        self.checks = {}
+        self.joined = []
+        self.cross = []
+        self.not_checked = []
+        self.findings = [Finding(t.name, "table", 1, "no CSV file in " + folder)
+                         for t in schema.tables if t.name not in self.paths]
+        self.add_schema_checks()
+        if constraints_text is not None:
+            for rule in parse_constraints(constraints_text):
+                try:
+                    getattr(self, "check_" + rule.section)(rule.text)
+                except (UnsupportedRule, ValueError) as e:
+                    self.not_checked.append((rule.text, str(e)))
+
+    def column(self, table, name):
+        # the name the CSV file uses for a schema column
+        names = self.names.get(table.name)
+        if names is None:
+            raise UnsupportedRule("table %s was not generated" % table.name)
+        if name.lower() not in names:
+            raise UnsupportedRule("%s has no column %s" % (table.name, name))
+        return names[name.lower()]
+
+    def add(self, table, check):
+        self.checks.setdefault(table.name, []).append(check)
+        return check
+
+    def value_set(self, table, column):
+        # one per column, however many references read it
+        for check in self.checks.get(table.name, []):
+            if isinstance(check, ValueSet) and check.columns == [column]:
+                return check
+        return self.add(table, ValueSet(table.name, column, [column]))
+
+    def resolve(self, name):
+        table, column = self.resolver.resolve(name)
+        return table, self.column(table, column)
+
+    def add_schema_checks(self):
+        for table in self.schema.tables:
+            if table.name not in self.paths:
+                continue
+            if table.primary_key:
+                try:
+                    columns = [self.column(table, c) for c in table.primary_key]
+                    self.add(table, KeyCheck(table.name, "primary key (%s)" % ", ".join(columns), columns))
+                except UnsupportedRule as e:
+                    self.findings.append(Finding(table.name, "primary key", 1, str(e)))
+            for fk in table.fkeys:
+                parent = self.schema.table(fk.parent_table)
+                try:
+                    # as the generator does, a missing parent column means the parent's key
+                    parent_column = fk.parent_column if fk.parent_column in [c.name for c in parent.columns] \
+                        else parent.primary_key[0]
+                    self.reference("foreign key %s -> %s.%s" % (fk.column, parent.name, parent_column),
+                                   table, self.column(table, fk.column), parent, self.column(parent, parent_column))
+                except UnsupportedRule as e:
+                    self.findings.append(Finding(table.name, "foreign key %s" % fk.column, 1, str(e)))
+
+    def reference(self, name, table, column, parent, parent_column):
+        # every non-null value of table.column is one of parent.parent_column
+        self.cross.append(("reference", table.name, name,
+                           self.value_set(table, column), self.value_set(parent, parent_column)))
+
+    def kinds(self, table):
+        # the declared kind of every CSV column, which picks how it is parsed
+        return {self.column(table, c.name): self.resolver.kind(table, c.name)
+                for c in table.columns if c.name.lower() in self.names[table.name]}
+
+    def literal(self, text, table, column):
+        return self.resolver.literal(text, table, column)
+
+    def check_col_val(self, text):
+        match = COMPARISON.match(text)
+        if not match:
+            raise UnsupportedRule("not a column rule")
+        some, name, op, value = match.groups()
+        table, column = self.resolve(name)
+        if op == '|':
+            if 'null' not in value:
+                raise UnsupportedRule("only '| int+null' is understood")
+            self.add(table, HasNulls(table.name, text, column))
+        elif op == '<-':
+            low, high = value.strip().strip('[]').split(',')
+            self.add(table, Compare(table.name, text, column, operator.ge, self.literal(low, table, column)))
+            self.add(table, Compare(table.name, text, column, operator.le, self.literal(high, table, column)))
+        elif op == '->':
+            for v in value.strip().strip('{}').split(','):
+                self.add(table, Some(table.name, "%s (%s)" % (text, v.strip()), column, operator.eq,
+                                     self.literal(v, table, column)))
+        elif op in OPERATORS and op != '!=':
+            check = Some if some else Compare
+            self.add(table, check(table.name, text, column, OPERATORS[op], self.literal(value, table, column)))
+        else:
+            raise UnsupportedRule("'%s' is not a value rule" % op)
+
+    def check_col_dep(self, text):
+        if '=>' in text:
+            return self.check_implication(text)
+        match = COMPARISON.match(text)
+        if not match or match.group(1):
+            raise UnsupportedRule("not a dependency between two columns")
+        _, left, op, right = match.groups()
+        table, column = self.resolve(left)
+        other_table, other = self.resolve(right.strip())
+        if op == '<-':
+            self.reference(text, table, column, other_table, other)
+        elif op not in OPERATORS or op == '=':
+            raise UnsupportedRule("'%s' is not a dependency" % op)
+        elif table is other_table:
+            self.add(table, Compare(table.name, text, column, OPERATORS[op], other=other))
+        elif op == '!=':
+            self.cross.append(("disjoint", table.name, text,
+                               self.value_set(table, column), self.value_set(other_table, other)))
+        else:
+            self.check_ordering(text, table, column, OPERATORS[op], other_table, other)
+
+    def check_ordering(self, text, table, column, op, other_table, other):
+        # between tables joined by a foreign key every row is compared with the
+        # row it references, otherwise the two ranges must not overlap
+        for child, child_column, parent, parent_column, child_op in (
+                (table, column, other_table, other, op),
+                (other_table, other, table, column, operator.gt if op is operator.lt else operator.lt)):
+            for fk in child.fkeys:
+                if self.schema.table(fk.parent_table) is parent:
+                    key = self.column(parent, fk.parent_column if fk.parent_column.lower() in
+                                      self.names.get(parent.name, {}) else parent.primary_key[0])
+                    lookup = self.add(parent, Lookup(parent.name, text, key, parent_column))
+                    self.joined.append((child, child_column, child_op, self.column(child, fk.column), lookup, text))
+                    return
+        low, high = ((table, column), (other_table, other)) if op is operator.lt else ((other_table, other), (table, column))
+        self.cross.append(("ordered", table.name, text, self.add(low[0], Extremes(low[0].name, text, low[1])),
+                           self.add(high[0], Extremes(high[0].name, text, high[1]))))
+
+    def check_implication(self, text):
+        condition, result = [part.strip() for part in text.split('=>', 1)]
+        match, target = COMPARISON.match(condition), COMPARISON.match(result)
+        if not match or not target or target.group(3) != '=' or match.group(3) not in OPERATORS:
+            raise UnsupportedRule("only 'a op x => b = y' implications are understood")
+        table, column = self.resolve(match.group(2))
+        target_table, target_column = self.resolve(target.group(2))
+        if target_table is not table:
+            raise UnsupportedRule("implication between two tables")
+        self.add(table, Implication(table.name, text, column, OPERATORS[match.group(3)],
+                                    self.literal(match.group(4), table, column), target_column,
+                                    self.literal(target.group(4), table, target_column)))
+
+    def check_row_dep(self, text):
+        match = FUNCTION.match(text)
+        if not match:
+            raise UnsupportedRule("not unique(...), inc(...) or bound(...)")
+        function, args = match.groups()
+        columns = [self.resolve(arg.strip()) for arg in args.split(',')]
+        table = columns[0][0]
+        if any(t is not table for t, _ in columns):
+            raise UnsupportedRule("%s over columns of different tables" % function)
+        names = [c for _, c in columns]
+        if function == 'unique':
+            if [n.lower() for n in names] != [c.lower() for c in table.primary_key]:
+                self.add(table, KeyCheck(table.name, text, names))
+        elif len(names) != 1:
+            raise UnsupportedRule("%s takes one column" % function)
+        else:
+            self.add(table, (Sequence if function == 'inc' else Permutation)(table.name, text, names[0]))
+
+    def scan(self, jobs, workers):
+        # jobs: (table, checks); biggest files first so a large table does not run alone at the end
+        jobs = sorted(jobs, key=lambda job: -os.path.getsize(self.paths[job[0].name]))
+        args = [(self.paths[t.name], self.kinds(t), checks) for t, checks in jobs]
+        if workers <= 1 or len(jobs) <= 1:
+            results = [scan_table(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(min(workers, len(jobs)), mp_context=multiprocessing.get_context("fork")) as pool:
+                results = list(pool.map(scan_table, *zip(*args)))
+        return {t.name: result for (t, _), result in zip(jobs, results)}
+
+    def validate(self, workers=1):
+        """Run every check; returns the report as a dict, see format_report."""
+        start = time.time()
+        tables = [t for t in self.schema.tables if t.name in self.paths]
+        scanned = self.scan([(t, self.checks.get(t.name, [])) for t in tables], workers)
+        results = {}
+        for t in tables:
+            for check, result in zip(self.checks.get(t.name, []), scanned[t.name][2]):
+                results[id(check)] = result
+        findings = list(self.findings)
+        findings += [r for r in results.values() if isinstance(r, Finding)]
+        findings += [self.combine(kind, table, name, results[id(a)], results[id(b)])
+                     for kind, table, name, a, b in self.cross]
+        # ordering rules through a foreign key read the parent's values in a second pass
+        second = {}
+        for child, column, op, via, lookup, text in self.joined:
+            check = JoinedCompare(child.name, text, column, op, via, results[id(lookup)])
+            second.setdefault(child.name, (child, []))[1].append(check)
+        if second:
+            for name, (_, _, checks) in self.scan(list(second.values()), workers).items():
+                findings += checks
+        report = {
+            "database": self.folder,
+            "problem_id": self.schema.problem,
+            "wall_time": round(time.time() - start, 3),
+            "tables": {name: {"rows": rows,
+                              "null_fractions": {c: round(n / rows, 4) if rows else 0.0 for c, n in nulls.items()}}
+                       for name, (rows, nulls, _) in scanned.items()},
+            "checks": [dict(f._asdict()) for f in findings],
+            "not_checked": [list(r) for r in self.not_checked],
+            "failed": sum(1 for f in findings if f.failures),
+        }
+        return report
+
+    def combine(self, kind, table, name, a, b):
+        # the checks between two tables, from what the scans of both sent back
+        if kind == "reference":
+            (keys, counts), (parent_keys, _) = a, b
+            missing = int(counts[~np.isin(keys, parent_keys, assume_unique=True)].sum())
+            return Finding(table, name, missing, "%d rows point at no parent value" % missing if missing else "")
+        if kind == "disjoint":
+            shared = np.intersect1d(a[0], b[0], assume_unique=True)
+            return Finding(table, name, len(shared), "%d values on both sides" % len(shared) if len(shared) else "")
+        (_, low), (high, _) = a, b
+        if low is None or high is None or low < high:
+            return Finding(table, name, 0, "")
+        return Finding(table, name, 1, "ranges overlap: %s >= %s" % (low, high))
+
+
+def format_report(report):
+    """Text summary of a validate() report: the failed checks, then the totals."""
+    lines = []
+    for check in report["checks"]:
+        if check["failures"]:
+            detail = " (%s)" % check["detail"] if check["detail"] else ""
+            lines.append("FAILED %s: %s, %d%s" % (check["table"], check["check"], check["failures"], detail))
+    for rule, reason in report["not_checked"]:
+        lines.append("not checked: %s (%s)" % (rule, reason))
+    rows = sum(t["rows"] for t in report["tables"].values())
+    lines.append("%s: %d checks on %d tables, %d rows, %d failed in %.1fs"
+                 % (report["database"], len(report["checks"]), len(report["tables"]), rows, report["failed"],
+                    report["wall_time"]))
+    return "\n".join(lines)
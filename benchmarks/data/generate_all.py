@@ -1,77 +1,338 @@
+import argparse
 import glob
+import hashlib
+import json
 import os
 import shutil
+import subprocess
+import sys
+import tempfile
 import time
-
-
-def run_generation(tmp_folder, db_generator_folder, db_script, dbsize, output_folder):
-    # clean the tmp folder
-    shutil.rmtree(tmp_folder, ignore_errors=True)
-    os.mkdir(tmp_folder)
-    # copy the database_generator folder
-    shutil.copytree(db_generator_folder, tmp_folder+"/database_generator")
-    # copy the db_script
-    shutil.copy(db_script, tmp_folder+"/db_script.py")
-    # execute the db_script and generate the database
-    os.chdir(tmp_folder)
-    os.system("python db_script.py "+dbsize)
-    # move the generated database to output_folder
-    os.makedirs(output_folder, exist_ok=True)
-    shutil.copytree("output", output_folder, dirs_exist_ok=True)
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database_generator.sizes import parse_size
 
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 database_generator_util_path = dir_path + "/database_generator"
 database_output_folder = dir_path + "/databases"
 
-leetcode_uniform_scripts = glob.glob(
-    dir_path + "/leetcode/leetcode_uniform/*.py")
-leetcode_zipf_scripts = glob.glob(dir_path + "/leetcode/leetcode_zipf/*.py")
-calcite_uniform_scripts = glob.glob(dir_path + "/calcite/calcite_uniform/*.py")
-calcite_zipf_scripts = glob.glob(dir_path + "/calcite/calcite_zipf/*.py")
-
-# need a tmp folder to assemble the scripts
-tmp_folder = dir_path + "/tmp_"+str(int(time.time()))
-
-# generating leetcode uniform csv files
-for idx, script in enumerate(leetcode_uniform_scripts):
-    for db_size in ["100K", "1M"]:
-        script_name = script.split("/")[-1]
-        problem_id = script_name.split(".")[0]
-        print("generating uniform leetcode uniform csv files for problem " +
-              problem_id + " with size "+db_size + " ("+str(idx+1)+"/"+str(len(leetcode_uniform_scripts))+")")
-        run_generation(tmp_folder, database_generator_util_path, script, db_size,
-                       database_output_folder + "/leetcode_uniform/" + db_size + "/" + problem_id)
-
-# generating leetcode zipf csv files
-for idx, script in enumerate(leetcode_zipf_scripts):
-    for db_size in ["100K", "1M"]:
-        script_name = script.split("/")[-1]
-        problem_id = script_name.split(".")[0]
-        print("generating uniform leetcode zipf csv files for problem " +
-              problem_id + " with size "+db_size + " ("+str(idx+1)+"/"+str(len(leetcode_zipf_scripts))+")")
-        run_generation(tmp_folder, database_generator_util_path, script, db_size,
-                       database_output_folder + "/leetcode_zipf/" + db_size + "/" + problem_id)
-
-# generating calcite uniform csv files
-for idx, script in enumerate(calcite_uniform_scripts):
-    for db_size in ["calcite_250K", "calcite_1M", "calcite_4M"]:
-        script_name = script.split("/")[-1]
-        problem_id = script_name.split(".")[0]
-        print("generating calcite uniform csv files for problem " +
-              problem_id + " with size "+db_size + " ("+str(idx+1)+"/"+str(len(calcite_uniform_scripts))+")")
-        run_generation(tmp_folder, database_generator_util_path, script, db_size,
-                       database_output_folder + "/calcite_uniform/" + db_size + "/" + problem_id)
-
-# generating calcite zipf csv files
-for idx, script in enumerate(calcite_zipf_scripts):
-    for db_size in ["calcite_250K", "calcite_1M", "calcite_4M"]:
-        script_name = script.split("/")[-1]
-        problem_id = script_name.split(".")[0]
-        print("generating calcite zipf csv files for problem " +
-              problem_id + " with size "+db_size + " ("+str(idx+1)+"/"+str(len(calcite_zipf_scripts))+")")
-        run_generation(tmp_folder, database_generator_util_path, script, db_size,
-                       database_output_folder + "/calcite_zipf/" + db_size + "/" + problem_id)
-
-# finally, remove tmp folder
-shutil.rmtree(tmp_folder, ignore_errors=True)
+# (benchmark folder, distribution folder) -> size labels generated for it
+GENERATION_MATRIX = [
+    ("leetcode", "leetcode_uniform", ["100K", "1M"]),
+    ("leetcode", "leetcode_zipf", ["100K", "1M"]),
+    ("calcite", "calcite_uniform", ["calcite_250K", "calcite_1M", "calcite_4M"]),
+    ("calcite", "calcite_zipf", ["calcite_250K", "calcite_1M", "calcite_4M"]),
+]
+
+Job = namedtuple("Job", ["script", "distribution", "size", "problem_id", "output_folder"])
+
+# written into every output folder, records what the folder was generated from
+GENERATION_MANIFEST = "generation.json"
+
+# written by every script next to its tables, see database_generator/report.py
+RUN_REPORT = "run_report.json"
+
+# how many entries each ranking of the summary shows
+SUMMARY_TOP = 10
+
+
+# runs the schema engine (database_generator/engine.py) for the problems
+# that have no hand-written script, see --all-schemas
+SCHEMA_SCRIPT = dir_path + "/generate_schema.py"
+
+
+def schemas_dir(benchmark):
+    # leetcode -> ../LeetCode/schemas, calcite likewise
+    return os.path.join(os.path.dirname(dir_path), "LeetCode" if benchmark == "leetcode" else "Calcite", "schemas")
+
+
+def schema_file(job):
+    # leetcode_zipf problem 570 -> ../LeetCode/schemas/570.json
+    return os.path.join(schemas_dir(job.distribution.split("_")[0]), job.problem_id + ".json")
+
+
+def constraints_file(job):
+    # leetcode_zipf problem 1098 -> ../LeetCode/constraints/1098.yml, which
+    # generate_schema.py finds next to the schema on its own
+    return os.path.join(os.path.dirname(schemas_dir(job.distribution.split("_")[0])), "constraints",
+                        job.problem_id + ".yml")
+
+
+def distribution_name(job):
+    # leetcode_zipf -> zipf, what generate_schema.py expects
+    return job.distribution.split("_")[-1]
+
+
+def job_cost(job):
+    # rough cost used for scheduling; calcite scripts write six tables of that size
+    return parse_size(job.size) * (6 if job.distribution.startswith("calcite") else 1)
+
+
+def collect_jobs(problems=None, distributions=None, sizes_override=None, all_schemas=False):
+    """
+    One job per script, size and distribution. With all_schemas, every
+    schema without a script of its own gets a generate_schema.py job too.
+    """
+    jobs = []
+    for benchmark, distribution, sizes in GENERATION_MATRIX:
+        if distributions and distribution not in distributions:
+            continue
+        sizes = sizes_override or sizes
+        scripts = {os.path.basename(script).split(".")[0]: script
+                   for script in glob.glob(dir_path + "/" + benchmark + "/" + distribution + "/*.py")}
+        if all_schemas:
+            for schema in glob.glob(schemas_dir(benchmark) + "/*.json"):
+                scripts.setdefault(os.path.basename(schema).split(".")[0], SCHEMA_SCRIPT)
+        for problem_id, script in sorted(scripts.items()):
+            if problems and problem_id not in problems:
+                continue
+            for db_size in sizes:
+                jobs.append(Job(script, distribution, db_size, problem_id,
+                                database_output_folder + "/" + distribution + "/" + db_size + "/" + problem_id))
+    # largest first, so the long calcite jobs do not end up running alone at the end
+    jobs.sort(key=job_cost, reverse=True)
+    return jobs
+
+
+def hash_tree(folder):
+    # content hash of every source file under folder, independent of mtimes
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".pyc"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, folder).encode() + b"\0")
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    # None for a file that does not exist, e.g. a problem without constraints
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def generation_key(job, generator_hash):
+    """
+    Hash of everything a job's output depends on: the script (which also pins
+    its seed), the database_generator module, the size, the distribution and
+    the output formats, compression and table/row selection. The schema and
+    constraints drive generate_schema.py jobs; for the other scripts the
+    schema only matters for the sqlite indexes, but both are cheap to include.
+    """
+    with open(job.script, "rb") as f:
+        script_hash = hashlib.sha256(f.read()).hexdigest()
+    schema_hash = file_hash(schema_file(job))
+    constraints_hash = file_hash(constraints_file(job))
+    fields = {
+        "script": script_hash,
+        "schema": schema_hash,
+        "constraints": constraints_hash,
+        "database_generator": generator_hash,
+        "size": job.size,
+        "distribution": job.distribution,
+        "formats": os.environ.get("DBGEN_FORMATS", "csv"),
+        "compression": os.environ.get("DBGEN_COMPRESSION", ""),
+        "tables": os.environ.get("DBGEN_TABLES", ""),
+        "rows": os.environ.get("DBGEN_ROWS", ""),
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def is_cached(job, key):
+    path = os.path.join(job.output_folder, GENERATION_MANIFEST)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path) as f:
+            return json.load(f).get("key") == key
+    except ValueError:
+        return False
+
+
+def write_manifest(job, key):
+    manifest = {
+        "key": key,
+        "script": os.path.relpath(job.script, dir_path),
+        "distribution": job.distribution,
+        "size": job.size,
+        "formats": os.environ.get("DBGEN_FORMATS", "csv"),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(job.output_folder, GENERATION_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_report(output_dir):
+    # a script that failed early may not have written one
+    try:
+        with open(os.path.join(output_dir, RUN_REPORT)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_generation(job, tmp_root, key=None):
+    """Run one script in its own working directory and copy its output to job.output_folder."""
+    work_dir = tempfile.mkdtemp(prefix=job.distribution + "_" + job.problem_id + "_" + job.size + "_",
+                                dir=tmp_root)
+    try:
+        # copy the database_generator folder and the db_script
+        shutil.copytree(database_generator_util_path, work_dir + "/database_generator")
+        shutil.copy(job.script, work_dir + "/db_script.py")
+        env = dict(os.environ)
+        # lets the sqlite output create the PK/FK indexes declared in the schema
+        env["DBGEN_SCHEMA"] = schema_file(job)
+        # only read by generate_schema.py, the other scripts pick theirs by folder
+        env["DBGEN_DISTRIBUTION"] = distribution_name(job)
+        start = time.time()
+        # execute the db_script and generate the database
+        result = subprocess.run([sys.executable, "db_script.py", job.size], cwd=work_dir, env=env)
+        elapsed = time.time() - start
+        report = read_report(work_dir + "/output")
+        if result.returncode == 0:
+            # move the generated database to output_folder, dropping whatever an
+            # older version of the script left there
+            shutil.rmtree(job.output_folder, ignore_errors=True)
+            shutil.copytree(work_dir + "/output", job.output_folder)
+            if key is not None:
+                write_manifest(job, key)
+        return result.returncode, elapsed, report
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_all(jobs, workers, tmp_root, keys=None):
+    """Run every job; returns the failed jobs and one record per job for the summary."""
+    failed = []
+    records = []
+    keys = keys or {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # each job is its own python process, the pool only bounds how many run at once
+        futures = {pool.submit(run_generation, job, tmp_root, keys.get(job)): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                returncode, elapsed, report = future.result()
+            except Exception as e:
+                returncode, elapsed, report = str(e), 0.0, None
+            status = "done" if returncode == 0 else "FAILED (" + str(returncode) + ")"
+            peak = " peak %.0f MB" % report["peak_rss_mb"] if report else ""
+            print("%s %s csv files for problem %s with size %s in %.1fs%s (%d/%d)"
+                  % (status, job.distribution, job.problem_id, job.size, elapsed, peak, done, len(jobs)), flush=True)
+            if returncode != 0:
+                failed.append(job)
+            records.append({
+                "script": os.path.relpath(job.script, dir_path),
+                "distribution": job.distribution,
+                "size": job.size,
+                "problem_id": job.problem_id,
+                "returncode": returncode,
+                "elapsed": round(elapsed, 3),
+                "report": report,
+            })
+    return failed, records
+
+
+def summarize(records, top=SUMMARY_TOP):
+    """Rank the jobs by time and memory and the tables by time; returns the summary as a dict."""
+    def job_name(r):
+        return "%s/%s/%s" % (r["distribution"], r["size"], r["problem_id"])
+
+    reported = [r for r in records if r["report"]]
+    tables = [dict(t, job=job_name(r)) for r in reported for t in r["report"]["tables"]]
+    summary = {
+        "jobs": len(records),
+        "failed": [job_name(r) for r in records if r["returncode"] != 0],
+        "total_job_time": round(sum(r["elapsed"] for r in records), 1),
+        "rows": sum(r["report"]["rows"] for r in reported),
+        "bytes": sum(r["report"]["bytes"] for r in reported),
+        "slowest_jobs": [{"job": job_name(r), "elapsed": r["elapsed"]}
+                         for r in sorted(records, key=lambda r: -r["elapsed"])[:top]],
+        "largest_peak_rss": [{"job": job_name(r), "peak_rss_mb": r["report"]["peak_rss_mb"]}
+                             for r in sorted(reported, key=lambda r: -r["report"]["peak_rss_mb"])[:top]],
+        "slowest_tables": [{"job": t["job"], "table": t["table"], "wall_time": t["wall_time"],
+                            "rows_per_sec": t["rows_per_sec"]}
+                           for t in sorted(tables, key=lambda t: -t["wall_time"])[:top]],
+        "records": records,
+    }
+    return summary
+
+
+def print_summary(summary):
+    print("\n%d jobs, %.1fs of job time, %d rows, %.1f MB written"
+          % (summary["jobs"], summary["total_job_time"], summary["rows"], summary["bytes"] / 1e6))
+    print("slowest jobs:")
+    for entry in summary["slowest_jobs"]:
+        print("  %8.1fs  %s" % (entry["elapsed"], entry["job"]))
+    print("largest peak RSS:")
+    for entry in summary["largest_peak_rss"]:
+        print("  %8.0f MB  %s" % (entry["peak_rss_mb"], entry["job"]))
+    print("slowest tables:")
+    for entry in summary["slowest_tables"]:
+        print("  %8.1fs  %10.0f rows/s  %s %s"
+              % (entry["wall_time"], entry["rows_per_sec"] or 0, entry["job"], entry["table"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the databases of every benchmark problem.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of generation jobs run at the same time (default: number of cores)")
+    parser.add_argument("--problems", nargs="+", help="only generate these problem ids")
+    parser.add_argument("--distributions", nargs="+", help="only generate these distributions, e.g. leetcode_zipf")
+    parser.add_argument("--sizes", nargs="+",
+                        help="generate these sizes instead of the default ones, e.g. 50M 100M or sf10")
+    parser.add_argument("--all-schemas", action="store_true",
+                        help="also generate the problems without a script of their own, from their schema")
+    parser.add_argument("--force", action="store_true",
+                        help="regenerate every job even if its output is up to date")
+    parser.add_argument("--summary", default=database_output_folder + "/run_summary.json",
+                        help="where to write the JSON summary of the run (default: databases/run_summary.json)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also record the peak python allocations of every table (slow)")
+    args = parser.parse_args(argv)
+
+    for size in args.sizes or []:
+        try:
+            parse_size(size)
+        except ValueError as e:
+            parser.error(str(e))
+    jobs = collect_jobs(args.problems, args.distributions, args.sizes, args.all_schemas)
+    generator_hash = hash_tree(database_generator_util_path)
+    keys = {job: generation_key(job, generator_hash) for job in jobs}
+    if not args.force:
+        cached = [job for job in jobs if is_cached(job, keys[job])]
+        if cached:
+            print("skipping %d jobs whose output is up to date" % len(cached))
+        jobs = [job for job in jobs if job not in cached]
+    # need a tmp folder to assemble the scripts, one sub folder per job
+    tmp_root = dir_path + "/tmp_" + str(int(time.time()))
+    os.makedirs(tmp_root, exist_ok=True)
+    print("running %d generation jobs on %d workers" % (len(jobs), args.workers), flush=True)
+    if args.tracemalloc:
+        os.environ["DBGEN_TRACEMALLOC"] = "1"
+    try:
+        failed, records = run_all(jobs, args.workers, tmp_root, keys)
+    finally:
+        # finally, remove tmp folder
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+    if records:
+        summary = summarize(records)
+        print_summary(summary)
+        os.makedirs(os.path.dirname(os.path.abspath(args.summary)), exist_ok=True)
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    for job in failed:
+        print("failed: " + job.script + " " + job.size)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Generates a database straight from a schemas/*.json file, for the problems
+that have no hand-written script:
+
+    python3 generate_schema.py 1M --schema ../LeetCode/schemas/1045.json --distribution zipf
+
+The rules of the problem's constraints/*.yml file, if it has one, are
+compiled and enforced while generating (see database_generator/constraints.py).
+generate_all.py runs it like any other script, with the schema, the
+constraints and the distribution in DBGEN_SCHEMA, DBGEN_CONSTRAINTS and
+DBGEN_DISTRIBUTION.
+"""
+
+import argparse
+import os
+import sys
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.engine import SchemaGenerator, DISTRIBUTIONS
+from database_generator.schema import load_schema
+from database_generator.constraints import load_constraints
+
+
+def default_constraints(schema_path):
+    # ../LeetCode/schemas/1098.json -> ../LeetCode/constraints/1098.yml, if there is one
+    folder, name = os.path.split(os.path.abspath(schema_path))
+    path = os.path.join(os.path.dirname(folder), "constraints", os.path.splitext(name)[0] + ".yml")
+    return path if os.path.exists(path) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the tables of a schema file.")
+    parser.add_argument("size", help="database size, e.g. 100K, 1M or sf10")
+    parser.add_argument("--schema", default=os.environ.get("DBGEN_SCHEMA"),
+                        help="schemas/*.json file (default: $DBGEN_SCHEMA)")
+    parser.add_argument("--constraints", default=os.environ.get("DBGEN_CONSTRAINTS"),
+                        help="constraints/*.yml file (default: $DBGEN_CONSTRAINTS, or the one next to the schema)")
+    parser.add_argument("--distribution", default=os.environ.get("DBGEN_DISTRIBUTION", "uniform"),
+                        choices=DISTRIBUTIONS, help="value distribution (default: $DBGEN_DISTRIBUTION or uniform)")
+    args = parser.parse_args(argv)
+    if not args.schema:
+        parser.error("no schema given, pass --schema or set DBGEN_SCHEMA")
+
+    schema = load_schema(args.schema)
+    constraints_path = args.constraints or default_constraints(args.schema)
+    options, unique, fixes, unenforced = {}, {}, {}, []
+    if constraints_path:
+        constraints = load_constraints(constraints_path, schema)
+        options, unique, fixes, unenforced = (constraints.options, constraints.unique, constraints.fixes,
+                                              constraints.unenforced)
+    db_generator = DatabaseGenerator(size=args.size, problem_id=schema.problem, script_file=__file__,
+                                     schema_file=args.schema)
+    generator = SchemaGenerator(schema, db_generator.rows, args.distribution, options, unique, fixes)
+    for rule, reason in unenforced + generator.unenforced:
+        print("not enforced: %s (%s)" % (rule, reason), file=sys.stderr)
+    generator.generate(db_generator)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,14 +12,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1050 schema
@@ -51,10 +44,8 @@ director_id = [random.choice(director_pool) for i in range(total)]
 timestamp = list(range(total))
 
 
-table = list(zip(actor_id, director_id, timestamp))
-table.reverse()
-table.append(['int','int','int'])
-table.append(['actor_id','director_id','timestamp'])
-table.reverse()
 # output tables
-db_generator.output("ActorDirector", table)
\ No newline at end of file
+db_generator.output_columns("ActorDirector",
+                            ['actor_id','director_id','timestamp'],
+                            ['int','int','int'],
+                            [actor_id, director_id, timestamp])
\ No newline at end of file
@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, generate_pair
+from database_generator.pools import prefixed
 
 import sys
 
@@ -13,14 +14,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 # start logic writing
 product_id_pool = [i for i in range(size)]
@@ -28,7 +22,7 @@ year_pool = [i for i in range(2000, 2022)]
 quantity_pool = [i for i in range(1,10)]
 price_pool = [i for i in range(1, 20)]
 
-product_name_pool = ['pname_' + str(i) for i in range(int(size / 100))]
+product_name_pool = prefixed('pname_', int(size / 100))
 sale_pool = list(range(int(size / 10)))
 
 product_table = []
@@ -1,5 +1,7 @@
 import random
-from database_generator.database_generator import DatabaseGenerator, generate_pair
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import prefixed
+from database_generator.sampling import ColumnSampler
 import sys
 
 dbsize = sys.argv[1]
@@ -11,15 +13,9 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 # setup seed
 seed = 2333
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 sale
@@ -55,7 +51,7 @@ year_num = 20
 
 
 product_id = list(range(product_num))
-product_name_pool = ['p_name_' + str(i) for i in range(int(product_num/2))]
+product_name_pool = prefixed('p_name_', int(product_num/2))
 
 sale_id_pool = list(range(sale_id_num))
 year_pool = list(range(2000,2020 + year_num))
@@ -64,24 +60,19 @@ price_pool = list(range(10,20))
 
 # fill in columns
 
-sales = []
-sales.append(['sale_id','year','product_id','quantity','price'])
-sales.append(['int', 'int', 'int','int','int'])
-pair_set = set()
-
-for i in range(size):
-    pair = generate_pair(sale_id_pool, year_pool)
-    while pair in pair_set:
-        pair = generate_pair(sale_id_pool, year_pool)
-    pair_set.add(pair)
-    sales.append([pair[0], pair[1], random.choice(product_id), random.choice(quantity_pool), random.choice(price_pool)])
+sale_id, year = sampler.distinct_pairs(sale_id_pool, year_pool, size)
+sales_product_id = sampler.choice(product_id, size)
+quantity = sampler.choice(quantity_pool, size)
+price = sampler.choice(price_pool, size)
 
-product = []
-product.append(['product_id','product_name'])
-product.append(['int', 'str'])
-for i in range(product_num):
-    product.append([product_id[i], random.choice(product_name_pool)])
+product_name = sampler.choice(product_name_pool, product_num)
 
 # output tables
-db_generator.output("Sales", sales)
-db_generator.output("Product", product)
+db_generator.output_columns("Sales",
+                            ['sale_id','year','product_id','quantity','price'],
+                            ['int', 'int', 'int','int','int'],
+                            [sale_id, year, sales_product_id, quantity, price])
+db_generator.output_columns("Product",
+                            ['product_id','product_name'],
+                            ['int', 'str'],
+                            [product_id, product_name])
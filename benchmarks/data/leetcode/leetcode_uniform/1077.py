@@ -12,14 +12,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 # start logic writing
 
@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, generate_pair
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -12,14 +13,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1126 schema
@@ -42,7 +36,7 @@ Each row in the table logs the info that an event of some type occurred at some
 event_num = 100
 
 bid_pool = list(range(int(size / 20)))
-event_pool = ['event_' + str(x) for x in range(event_num)]
+event_pool = prefixed('event_', event_num)
 occurences = [random.randint(1, 30) for i in range(size)]
 
 # prepare table
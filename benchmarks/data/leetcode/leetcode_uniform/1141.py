@@ -1,6 +1,7 @@
 import random
 from database_generator.database_generator import DatabaseGenerator
-from faker import Faker
+from database_generator.sampling import ColumnSampler
+from database_generator.pools import random_dates
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1141 schema
@@ -48,7 +41,7 @@ Note that each session belongs to exactly one user.
 num_row = size
 user_num = int(num_row / 10)
 user_id_pool = range(user_num)
-date_pool = [fake.date_between(datetime.date(2019,5,20), datetime.date(2019,7,30)) for _ in range(50)]
+date_pool = random_dates(datetime.date(2019,5,20), datetime.date(2019,7,30), 50, sampler.rng)
 activity_type_pool = ['open_session', 'end_session', 'scroll_down', 'send_message']
 
 
@@ -57,13 +50,8 @@ session_id = list(range(num_row))
 activity_date = [random.choice(date_pool) for _ in range(num_row)]
 activity_type = [random.choice(activity_type_pool) for _ in range(num_row)]
 
-# prepare table
-
-activity = list(zip(user_id, session_id, activity_date, activity_type))
-activity.reverse()
-activity.append(['int','int','date','str'])
-activity.append(['user_id','session_id','activity_date','activity_type'])
-activity.reverse()
-
 # output tables
-db_generator.output("Activity", activity)
\ No newline at end of file
+db_generator.output_columns("Activity",
+                            ['user_id','session_id','activity_date','activity_type'],
+                            ['int','int','date','str'],
+                            [user_id, session_id, activity_date, activity_type])
\ No newline at end of file
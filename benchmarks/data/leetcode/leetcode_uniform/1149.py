@@ -1,6 +1,7 @@
 import random
 from database_generator.database_generator import DatabaseGenerator
-from faker import Faker
+from database_generator.sampling import ColumnSampler
+from database_generator.pools import random_dates
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1149 schema (same as 1148)
@@ -53,7 +46,7 @@ member_num = int(size / view_data_num)
 
 artical_id_pool = list(range(10000))
 member_id_pool = list(range(member_num))
-view_date_pool = [fake.date_between(datetime.date(2010,1,1), datetime.date(2021,12,30)) for _ in range(view_data_num)]
+view_date_pool = random_dates(datetime.date(2010,1,1), datetime.date(2021,12,30), view_data_num, sampler.rng)
 
 # fill in columns
 
@@ -64,10 +57,8 @@ view_date = [random.choice(view_date_pool) for _ in range(total)]
 
 
 # prepare table
-table = list(zip(article_id, author_id, viewer_id, view_date))
-table.reverse()
-table.append(['int','int', 'int', 'date'])
-table.append(['article_id', 'author_id', 'viewer_id', 'view_date'])
-table.reverse()
 # output tables
-db_generator.output("Views", table)
\ No newline at end of file
+db_generator.output_columns("Views",
+                            ['article_id', 'author_id', 'viewer_id', 'view_date'],
+                            ['int','int', 'int', 'date'],
+                            [article_id, author_id, viewer_id, view_date])
\ No newline at end of file
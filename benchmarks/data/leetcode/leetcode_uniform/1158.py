@@ -1,29 +1,19 @@
 import random
+import numpy as np
 from database_generator.database_generator import DatabaseGenerator
-from faker import Faker
+from database_generator.pools import random_dates, prefixed
 import datetime
 import sys
 
 dbsize = sys.argv[1]
 
-# some setups
-db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
-                                 problem_id="1158")
-
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
+                                 problem_id="1158", seed=seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 """
@@ -72,48 +62,48 @@ item_id is the primary key of this table.
 total_user = size
 total_order = size
 total_item = size
-date_pool = [fake.date_between(datetime.date(2014,1,1),datetime.date(2022,12,31)) for _ in range(2000)]
-user_id_pool = list(range(size))
-brand_pool = ['brand_' + str(i) for i in range(10000)]
-order_id_pool = list(range(size))
-item_id_pool = list(range(size))
-
-# fill in columns
-
-user_id = user_id_pool
-join_date = random.choices(date_pool, k=total_user)
-favorite_brand = random.choices(brand_pool, k=total_user)
-
-order_id = order_id_pool
-order_date = random.choices(date_pool,k = total_order)
-item_id = random.choices(item_id_pool, k = total_order)
-buyer_id = random.choices(user_id_pool, k = total_order)
-seller_id = random.choices(user_id_pool,k = total_order)
-
-item_id_pool = item_id_pool
-item_brand = random.choices(brand_pool, k = total_item)
-
-# prepare table
-
-users = list(zip(user_id, join_date, favorite_brand))
-users.reverse()
-users.append(['int','date','str'])
-users.append(['user_id','join_date','favorite_brand'])
-users.reverse()
-
-orders = list(zip(order_id, item_id, buyer_id, seller_id, order_date))
-orders.reverse()
-orders.append(['int','int','int','int','date'])
-orders.append(['order_id','item_id','buyer_id','seller_id','order_date'])
-orders.reverse()
-
-items = list(zip(item_id_pool, item_brand))
-items.reverse()
-items.append(['int', 'str'])
-items.append(['item_id', 'item_brand'])
-items.reverse()
+date_pool = random_dates(datetime.date(2014,1,1), datetime.date(2022,12,31), 2000,
+                         db_generator.streams.rng("pools", "date"))
+user_id_pool = np.arange(size)
+brand_pool = prefixed('brand_', 10000)
+item_id_pool = np.arange(size)
+
+# fill in columns, one shard of rows at a time; any row range of a table can
+# be built on its own, see DatabaseGenerator.output_sharded
+
+def draw(shard, column, pool):
+    return shard.sampler(column).choice(pool, shard.size)
+
+
+def build_users(shard):
+    return [shard.rows,
+            draw(shard, 'join_date', date_pool),
+            draw(shard, 'favorite_brand', brand_pool)]
+
+
+def build_orders(shard):
+    return [shard.rows,
+            draw(shard, 'item_id', item_id_pool),
+            draw(shard, 'buyer_id', user_id_pool),
+            draw(shard, 'seller_id', user_id_pool),
+            draw(shard, 'order_date', date_pool)]
+
+
+def build_items(shard):
+    return [shard.rows,
+            draw(shard, 'item_brand', brand_pool)]
+
 
 # output tables
-db_generator.output("Users", users)
-db_generator.output("Orders", orders)
-db_generator.output("Items", items)
+db_generator.output_sharded("Users",
+                            ['user_id','join_date','favorite_brand'],
+                            ['int','date','str'],
+                            total_user, build_users)
+db_generator.output_sharded("Orders",
+                            ['order_id','item_id','buyer_id','seller_id','order_date'],
+                            ['int','int','int','int','date'],
+                            total_order, build_orders)
+db_generator.output_sharded("Items",
+                            ['item_id', 'item_brand'],
+                            ['int', 'str'],
+                            total_item, build_items)
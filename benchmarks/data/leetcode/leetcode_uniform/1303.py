@@ -12,14 +12,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1303 schema
@@ -48,10 +41,8 @@ team_id_pool = [i for i in range(team_num)]
 employee_id = [i for i in range(total)]
 team_id = [random.choice(team_id_pool) for i in range(total)]
 
-table = list(zip(employee_id,team_id))
-table.reverse()
-table.append(['int','int'])
-table.append(['employee_id','team_id'])
-table.reverse()
 # output tables
-db_generator.output("Employee", table)
\ No newline at end of file
+db_generator.output_columns("Employee",
+                            ['employee_id','team_id'],
+                            ['int','int'],
+                            [employee_id, team_id])
\ No newline at end of file
@@ -1,6 +1,7 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, generate_pair
-from faker import Faker
+from database_generator.sampling import ColumnSampler
+from database_generator.pools import random_dates, prefixed
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1532 schema
@@ -63,8 +56,8 @@ customer_num = int(total / 3)
 order_id = list(range(total))
 customer_id_pool = list(range(customer_num))
 
-customer_name_pool = ['name_' + str(x) for x in range(int(customer_num / 4))]
-date_pool = [fake.date_between(datetime.date(2020,1,1), datetime.date(2020,12,30)) for _ in range(200)]
+customer_name_pool = prefixed('name_', int(customer_num / 4))
+date_pool = random_dates(datetime.date(2020,1,1), datetime.date(2020,12,30), 200, sampler.rng)
 cost_pool = list(range(1, 6))
 
 
@@ -85,14 +78,9 @@ for i in range(total):
     pair_set.add(pair)
     orders_table.append([order_id[i], pair[0], pair[1], random.choice(cost_pool)])
 
-# prepare table
-
-customers_table = list(zip(customer_id_pool, customer_name))
-customers_table.reverse()
-customers_table.append(['int','str'])
-customers_table.append(['customer_id', 'name'])
-customers_table.reverse()
-
 # output tables
-db_generator.output("Customers", customers_table)
+db_generator.output_columns("Customers",
+                            ['customer_id', 'name'],
+                            ['int','str'],
+                            [customer_id_pool, customer_name])
 db_generator.output("Orders", orders_table)
\ No newline at end of file
@@ -12,14 +12,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1757 schema
@@ -48,12 +41,10 @@ boolean_pool = ['Y','N']
 low_fats = [random.choice(boolean_pool) for _ in range(total)]
 recyclable = [random.choice(boolean_pool) for _ in range(total)]
 
-table = list(zip(id, low_fats, recyclable))
-table.reverse()
-table.append(['int','enum','enum'])
-table.append(['product_id','low_fats','recyclable'])
-table.reverse()
 
 # output tables
-db_generator.output("Products", table)
+db_generator.output_columns("Products",
+                            ['product_id','low_fats','recyclable'],
+                            ['int','enum','enum'],
+                            [id, low_fats, recyclable])
 
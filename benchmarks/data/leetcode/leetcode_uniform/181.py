@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -11,14 +12,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 181 schema
@@ -41,7 +35,7 @@ Each row of this table indicates the ID of an employee, their name, salary, and
 # setup columns
 
 id = list(range(size))
-name_pool = ['name_' + str(x) for x in range(int(size / 10))]
+name_pool = prefixed('name_', int(size / 10))
 salary_pool = [x for x in range(4000, 5000)]
 manager_num = int(size / 5)
 managerid_pool = [random.choice(id) for i in range(manager_num)]
@@ -51,11 +45,8 @@ salary = [random.choice(salary_pool) for i in range(size)]
 managerId = [random.choice(managerid_pool) for i in range(size)]
 
 
-table = list(zip(id, name, salary, managerId))
-table.reverse()
-table.append(['int','str','int','int'])
-table.append(['id','name','salary','managerid'])
-table.reverse()
-
 # output tables
-db_generator.output("Employee", table)
\ No newline at end of file
+db_generator.output_columns("Employee",
+                            ['id','name','salary','managerid'],
+                            ['int','str','int','int'],
+                            [id, name, salary, managerId])
\ No newline at end of file
@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -11,21 +12,14 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 dept_num = int(size / 1000)
 
 eid_pool = [i for i in range(size)]
 did_pool = [i for i in range(dept_num)]
-name_pool = ['ename_' + str(i) for i in range(int(size / 2))]
-department_name_pool = ['dname_' + str(i) for i in range(dept_num)]
+name_pool = prefixed('ename_', int(size / 2))
+department_name_pool = prefixed('dname_', dept_num)
 salary_pool = [i for i in range(100, 150)]
 
 employee_table = []
@@ -1,5 +1,8 @@
 import random
 from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import prefixed
+from database_generator.sampling import ColumnSampler
+import numpy as np
 import sys
 
 
@@ -12,15 +15,9 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 # setup seed
 seed = 2333
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 """
@@ -46,22 +43,19 @@ No employee will be the manager of themself.
 # setup columns
 total = size
 
-id = list(range(total))
-name_pool = ['name_' + str(x) for x in range(int(total / 10))]
-department_pool = ['d_' + str(x) for x in range(3000)]
+id = np.arange(total)
+name_pool = prefixed('name_', int(total / 10))
+department_pool = prefixed('d_', 3000)
 manager_num = int(total / 5)
-managerid_pool = [random.choice(id) for i in range(manager_num)]
-
-name = [random.choice(name_pool) for i in range(total)]
-department = [random.choice(department_pool) for i in range(total)]
-managerId = [random.choice(managerid_pool) for i in range(total)]
+managerid_pool = sampler.choice(id, manager_num)
 
+name = sampler.choice(name_pool, total)
+department = sampler.choice(department_pool, total)
+managerId = sampler.choice(managerid_pool, total)
 
-table = list(zip(id, name, department, managerId))
-table.reverse()
-table.append(['int','str','str','int'])
-table.append(['id','name','department','managerid'])
-table.reverse()
 
 # output tables
-db_generator.output("Employee", table)
\ No newline at end of file
+db_generator.output_columns("Employee",
+                            ['id','name','department','managerid'],
+                            ['int','str','str','int'],
+                            [id, name, department, managerId])
\ No newline at end of file
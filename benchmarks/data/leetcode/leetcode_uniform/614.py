@@ -1,6 +1,6 @@
-import networkx as nx
-import random
 from database_generator.database_generator import DatabaseGenerator
+from database_generator.sampling import ColumnSampler
+from database_generator.graphs import preferential_attachment_edges
 import sys
 
 
@@ -10,19 +10,11 @@ dbsize = sys.argv[1]
 db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
                                  problem_id="614")
 
-size = 1000000
+# setup seed
+seed = 2333
+sampler = ColumnSampler(seed)
 
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
-
-G = nx.barabasi_albert_graph(int(size/2), 2, seed=2333)
-edge_list = list(G.edges)
-edge_list = [list(x) for x in edge_list]
-random.shuffle(edge_list)
+size = db_generator.rows
 
 
 """
@@ -41,15 +33,15 @@ There will not be a user following themself.
 # size = 1000000
 
 # fill in columns
-
-table = []
-table.append(['followee', 'follower'])
-table.append(['str', 'str'])
-
-for e in edge_list:
-    e = [str(x) for x in e]
-    table.append(e)
+# a Barabasi-Albert graph on size/2 users, 2 edges per new user (what
+# networkx.barabasi_albert_graph(size/2, 2) gave), the older user of every
+# edge being the followee, with the edges in random order
+followee, follower = preferential_attachment_edges(int(size/2), 2, sampler.rng)
+order = sampler.rng.permutation(len(followee))
 
 
 # output tables
-db_generator.output("Follow", table)
\ No newline at end of file
+db_generator.output_columns("Follow",
+                            ['followee', 'follower'],
+                            ['str', 'str'],
+                            [followee[order], follower[order]])
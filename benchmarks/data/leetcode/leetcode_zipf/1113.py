@@ -1,6 +1,7 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
-from faker import Faker
+from database_generator.sampling import ColumnSampler
+from database_generator.pools import random_dates
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1113 schema
@@ -49,7 +42,7 @@ The extra column has optional information about the action, such as a reason for
 num_row = size
 id_pool = range(num_row)
 post_id_pool = range(int(num_row / 100))
-action_date_pool = [fake.date_between(datetime.date(2019,5,20), datetime.date(2019,7,5)) for _ in range(50)]
+action_date_pool = random_dates(datetime.date(2019,5,20), datetime.date(2019,7,5), 50, sampler.rng)
 action_pool = ['view','like','reaction','comment','report','share']
 
 # id_pool = zipf_transform(id_pool)
@@ -67,13 +60,8 @@ extra_pool = list(range(10))
 extra_pool = [str(x) for x in extra_pool]
 extra = [random.choice(extra_pool) if action[i] == 'report' else '' for i in range(num_row)]
 
-# prepare table
-
-actions = list(zip(user_id, post_id, action_date, action, extra))
-actions.reverse()
-actions.append(['int','int','date','str','str'])
-actions.append(['user_id','post_id','action_date','action','extra'])
-actions.reverse()
-
 # output tables
-db_generator.output("Actions", actions)
\ No newline at end of file
+db_generator.output_columns("Actions",
+                            ['user_id','post_id','action_date','action','extra'],
+                            ['int','int','date','str','str'],
+                            [user_id, post_id, action_date, action, extra])
\ No newline at end of file
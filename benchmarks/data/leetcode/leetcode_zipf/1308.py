@@ -1,5 +1,7 @@
 import random
-from database_generator.database_generator import DatabaseGenerator, generate_pair, zipf_transform
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import days_before, prefixed
+from database_generator.sampling import ColumnSampler
 import datetime
 import sys
 
@@ -12,15 +14,9 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 # setup seed
 seed = 2333
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1308 schema
@@ -48,31 +44,24 @@ player_num = 5000
 day_num = 30000
 gender_num = int(size * 9 / day_num)
 
-player_name_pool = ['name_' + str(i) for i in range(player_num)]
-gender = ['gender' + str(i) for i in range(gender_num)]
+player_name_pool = prefixed('name_', player_num)
+gender = prefixed('gender', gender_num)
 
 base = datetime.date(2200,1,1)
-day_pool = [base - datetime.timedelta(days=x) for x in range(day_num)]
-# day_pool = [fake.date_between(datetime.date(1000,1,1), datetime.date(5000,1,1)) for i in range(day_num)]
-score_points = [random.randint(1, 15) for i in range(num_row)]
+day_pool = days_before(base, day_num)
 
-player_name_pool = zipf_transform(player_name_pool)
-gender = zipf_transform(gender)
-day_pool = zipf_transform(day_pool)
+player_name_pool = sampler.zipf(player_name_pool)
+gender = sampler.zipf(gender)
+day_pool = sampler.zipf(day_pool)
 
 # fill in columns
 
-table = []
-table.append(['gender','day','player_name','score_points'])
-table.append(['str','date','str','int'])
-pair_set = set()
-
-for i in range(num_row):
-    pair = generate_pair(gender, day_pool)
-    while pair in pair_set:
-        pair = generate_pair(gender, day_pool)
-    pair_set.add(pair)
-    table.append([pair[0], pair[1], random.choice(player_name_pool), random.choice(score_points)])
+gender_col, day = sampler.distinct_pairs(gender, day_pool, num_row)
+player_name = player_name_pool.sample(num_row)
+score_points = sampler.randint(1, 15, num_row)
 
 # output tables
-db_generator.output("Scores", table)
+db_generator.output_columns("Scores",
+                            ['gender','day','player_name','score_points'],
+                            ['str','date','str','int'],
+                            [gender_col, day, player_name, score_points])
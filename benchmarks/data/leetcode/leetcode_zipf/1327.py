@@ -1,6 +1,7 @@
 import random, datetime
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
-from faker import Faker
+from database_generator.sampling import ColumnSampler
+from database_generator.pools import random_dates, prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -11,26 +12,18 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
+size = db_generator.rows
 
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
 
-
-date_pool = [fake.date_between(datetime.date(2020,1,1), datetime.date(2020,12,31)) for _ in range(200)]
+date_pool = random_dates(datetime.date(2020,1,1), datetime.date(2020,12,31), 200, sampler.rng)
 
 
 id_pool = [i for i in range(size)]
-name_pool = ['name_' + str(i) for i in range(3000)]
-category_pool = ['category_' + str(i) for i in range(100)]
+name_pool = prefixed('name_', 3000)
+category_pool = prefixed('category_', 100)
 unit_pool = [i for i in range(200)]
 
 transformed_id_pool = zipf_transform(id_pool)
@@ -1,5 +1,8 @@
 import random
-from database_generator.database_generator import DatabaseGenerator, generate_pair, zipf_transform
+import numpy as np
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import prefixed
+from database_generator.sampling import ColumnSampler
 import sys
 
 dbsize = sys.argv[1]
@@ -11,15 +14,9 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 # setup seed
 seed = 2333
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 """
@@ -70,51 +67,39 @@ con_row = size
 inv_row = size
 
 cus_id_pool = list(range(cus_row))
-cus_name_pool = ['name_' + str(i) for i in range(cus_row)]
-cus_email_pool = [str(i) + '@gg.com' for i in range(cus_row)]
+cus_name_pool = prefixed('name_', cus_row)
+cus_email_pool = prefixed('', cus_row, suffix='@gg.com')
 
 contact_id_pool = list(range(2 * cus_row))
 
 invoice_id = list(range(inv_row))
-price_pool = [random.randint(10, 15) for _ in range(inv_row)]
+price_pool = sampler.randint(10, 15, inv_row)
 
 
 # transform
 
-transformed_cus_id_pool = zipf_transform(cus_id_pool)
-contact_id_pool = zipf_transform(contact_id_pool)
+transformed_cus_id_pool = sampler.zipf(cus_id_pool)
+contact_id_pool = sampler.zipf(contact_id_pool)
 
 # fill in columns
 
-contacts = []
-contacts.append(['user_id','contact_email','contact_name'])
-contacts.append(['int','str','str'])
-
-pkey = set()
-for i in range(con_row):
-    pair = generate_pair(transformed_cus_id_pool, contact_id_pool)
-    while pair in pkey or pair[0] == pair[1]:
-        pair = generate_pair(transformed_cus_id_pool, contact_id_pool)
-    pkey.add(pair)
-    contacts.append([pair[0], 'name_' + str(pair[1]), str(pair[1]) + '@gg.com'])
-
-inv_user_id = [random.choice(transformed_cus_id_pool) for i in range(inv_row)]
-
-# prepare table
-
-customers = list(zip(cus_id_pool, cus_name_pool, cus_email_pool))
-customers.reverse()
-customers.append(['int','str','str'])
-customers.append(['customer_id','customer_name','email'])
-customers.reverse()
+user_id, contact_id = sampler.distinct_pairs(transformed_cus_id_pool, contact_id_pool, con_row, allow_equal=False)
+contact_id = contact_id.astype(str)
+contact_email = np.char.add('name_', contact_id)
+contact_name = np.char.add(contact_id, '@gg.com')
 
-invoices = list(zip(invoice_id, inv_user_id, price_pool))
-invoices.reverse()
-invoices.append(['int','int','int'])
-invoices.append(['invoice_id','user_id','price'])
-invoices.reverse()
+inv_user_id = transformed_cus_id_pool.sample(inv_row)
 
 # output tables
-db_generator.output("Customers", customers)
-db_generator.output("Contacts", contacts)
-db_generator.output("Invoices", invoices)
+db_generator.output_columns("Customers",
+                            ['customer_id','customer_name','email'],
+                            ['int','str','str'],
+                            [cus_id_pool, cus_name_pool, cus_email_pool])
+db_generator.output_columns("Contacts",
+                            ['user_id','contact_email','contact_name'],
+                            ['int','str','str'],
+                            [user_id, contact_email, contact_name])
+db_generator.output_columns("Invoices",
+                            ['invoice_id','user_id','price'],
+                            ['int','int','int'],
+                            [invoice_id, inv_user_id, price_pool])
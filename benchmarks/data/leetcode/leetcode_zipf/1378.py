@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -12,14 +13,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1378 schema
@@ -52,7 +46,7 @@ Each row of this table contains the id and the corresponding unique id of an emp
 total = size
 
 id = list(range(total))
-name_pool = ['name_' + str(x) for x in range(int(total / 10))]
+name_pool = prefixed('name_', int(total / 10))
 
 name_pool = zipf_transform(name_pool)
 transformed_id = zipf_transform(id)
@@ -63,18 +57,13 @@ uni_num = int(total / 5)
 unique_id = list(range(uni_num))
 sub_id = [random.choice(transformed_id) for i in range(uni_num)]
 
-employees_table = list(zip(id, name))
-employees_table.reverse()
-employees_table.append(['int','str'])
-employees_table.append(['id','name'])
-employees_table.reverse()
-
-uni_table = list(zip(sub_id, unique_id))
-uni_table.reverse()
-uni_table.append(['int','int'])
-uni_table.append(['id','unique_id'])
-uni_table.reverse()
 
 # output tables
-db_generator.output("Employees", employees_table)
-db_generator.output("EmployeeUNI", uni_table)
+db_generator.output_columns("Employees",
+                            ['id','name'],
+                            ['int','str'],
+                            [id, name])
+db_generator.output_columns("EmployeeUNI",
+                            ['id','unique_id'],
+                            ['int','int'],
+                            [sub_id, unique_id])
@@ -1,6 +1,7 @@
 import random
-from database_generator.database_generator import DatabaseGenerator, generate_pair, zipf_transform
-from faker import Faker
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import random_dates, prefixed
+from database_generator.sampling import ColumnSampler
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 """
@@ -63,41 +56,36 @@ content_type is the category of the content as movies, series, etc.
 # setup columns
 content_num = int(size / 10)
 
-date_pool = [fake.date_between(datetime.date(2020,1,1),datetime.date(2020,12,31)) for _ in range(200)]
+date_pool = random_dates(datetime.date(2020,1,1), datetime.date(2020,12,31), 200, sampler.rng)
 content_id_pool = list(range(content_num))
-channel_pool = ['c' + str(i) for i in range(300)]
+channel_pool = prefixed('c', 300)
 
-title_pool = ['title_' + str(i) for i in range(int(content_num / 20))]
+title_pool = prefixed('title_', int(content_num / 20))
 kids_pool = ['Y', 'N']
 content_type_pool = ["Movies", "Series", "Songs"]
 
 
-date_pool = zipf_transform(date_pool)
-transformed_content_id_pool = zipf_transform(content_id_pool)
-channel_pool = zipf_transform(channel_pool)
-title_pool = zipf_transform(title_pool)
-kids_pool = zipf_transform(kids_pool)
-content_type_pool = zipf_transform(content_type_pool)
+date_pool = sampler.zipf(date_pool)
+transformed_content_id_pool = sampler.zipf(content_id_pool)
+channel_pool = sampler.zipf(channel_pool)
+title_pool = sampler.zipf(title_pool)
+kids_pool = sampler.zipf(kids_pool)
+content_type_pool = sampler.zipf(content_type_pool)
 
 # fill in columns
-tvprogram = []
-tvprogram.append(['program_date','content_id','channel'])
-tvprogram.append(['date','str','str'])
-
-pair_set = set()
-for i in range(size):
-    pair = generate_pair(date_pool, transformed_content_id_pool)
-    while pair in pair_set:
-        pair = generate_pair(date_pool, transformed_content_id_pool)
-    pair_set.add(pair)
-    tvprogram.append([pair[0], pair[1], random.choice(channel_pool)])
-
-content = []
-content.append(['content_id','title','kids_content','content_type'])
-content.append(['str','str','str','str'])
-for i in range(content_num):
-    content.append([str(content_id_pool[i]), random.choice(title_pool), random.choice(kids_pool), random.choice(content_type_pool)])
+program_date, content_id = sampler.distinct_pairs(date_pool, transformed_content_id_pool, size)
+channel = channel_pool.sample(size)
+
+title = title_pool.sample(content_num)
+kids_content = kids_pool.sample(content_num)
+content_type = content_type_pool.sample(content_num)
 
 # output tables
-db_generator.output("TVProgram", tvprogram)
-db_generator.output("Content", content)
+db_generator.output_columns("TVProgram",
+                            ['program_date','content_id','channel'],
+                            ['date','str','str'],
+                            [program_date, content_id, channel])
+db_generator.output_columns("Content",
+                            ['content_id','title','kids_content','content_type'],
+                            ['str','str','str','str'],
+                            [content_id_pool, title, kids_content, content_type])
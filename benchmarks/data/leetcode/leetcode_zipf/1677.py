@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -12,21 +13,14 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 # start logic writing
 
 product_num = int(size / 10)
 
 pid_pool = list(range(product_num))
-name_pool = ['pname_' + str(i) for i in range(product_num)]
+name_pool = prefixed('pname_', product_num)
 
 invoice_id = list(range(size))
 num_pool = [i for i in range(10)]
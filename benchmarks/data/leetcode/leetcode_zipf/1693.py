@@ -1,6 +1,7 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
-from faker import Faker
+from database_generator.sampling import ColumnSampler
+from database_generator.pools import random_dates, prefixed
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 
 # setup seed
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 1693 schema
@@ -52,8 +45,8 @@ make_name_num = int(size / 2 / date_num)
 id_num = 20
 
 
-date_pool = [fake.date_between(datetime.date(2010,1,1), datetime.date(2019,1,6)) for i in range(date_num)]
-make_name_pool = ['make_' + str(i) for i in range(make_name_num)]
+date_pool = random_dates(datetime.date(2010,1,1), datetime.date(2019,1,6), date_num, sampler.rng)
+make_name_pool = prefixed('make_', make_name_num)
 id_pool = [i for i in range(id_num)]
 
 date_pool = zipf_transform(date_pool)
@@ -66,12 +59,8 @@ name = [random.choice(make_name_pool) for i in range(total)]
 lead = [random.choice(id_pool) for i in range(total)]
 partner = [random.choice(id_pool) for i in range(total)]
 
-# prepare table
-
-table = list(zip(date,name,lead,partner))
-table.reverse()
-table.append(['date', 'str','int','int'])
-table.append(['date_id','make_name','lead_id','partner_id'])
-table.reverse()
 # output tables
-db_generator.output("DailySales", table)
+db_generator.output_columns("DailySales",
+                            ['date_id','make_name','lead_id','partner_id'],
+                            ['date', 'str','int','int'],
+                            [date, name, lead, partner])
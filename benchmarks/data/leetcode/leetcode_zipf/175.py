@@ -1,6 +1,7 @@
 import random
 import numpy as np
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -13,24 +14,17 @@ seed = 2333
 random.seed(seed)
 np.random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 name_num = int(size / 100)
 
 pid_pool = [i for i in range(size)]
 aid_pool = [i for i in range(size)]
-first_name_pool = ['f_name_' + str(i) for i in range(name_num)]
-last_name_pool = ['l_name_' + str(i) for i in range(name_num)]
-city_pool = ['c_name_' + str(i) for i in range(500)]
-state_pool = ['s_name_' + str(i) for i in range(50)]
+first_name_pool = prefixed('f_name_', name_num)
+last_name_pool = prefixed('l_name_', name_num)
+city_pool = prefixed('c_name_', 500)
+state_pool = prefixed('s_name_', 50)
 
 
 transformed_pid_pool = zipf_transform(pid_pool)
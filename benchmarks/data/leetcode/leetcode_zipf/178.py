@@ -11,14 +11,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 178 schema
@@ -49,10 +42,8 @@ id = list(range(size))
 score = [random.choice(transformed_score_pool) for _ in range(size)]
 
 # prepare table
-table = list(zip(id, score))
-table.reverse()
-table.append(['int','decimal'])
-table.append(['id', 'score'])
-table.reverse()
 # output tables
-db_generator.output("Scores", table)
\ No newline at end of file
+db_generator.output_columns("Scores",
+                            ['id', 'score'],
+                            ['int','decimal'],
+                            [id, score])
\ No newline at end of file
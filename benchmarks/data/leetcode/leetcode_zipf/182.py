@@ -11,14 +11,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 """
 182 schema
@@ -44,11 +37,9 @@ email_pool = list(range(int(size / 1.5)))
 email_pool = zipf_transform(email_pool)
 email = ['email_' + str(random.choice(email_pool)) + '@cc.com' for _ in range(size)]
 
-table = list(zip(id, email))
-table.reverse()
-table.append(['int','str'])
-table.append(['id','email'])
-table.reverse()
 
 # output tables
-db_generator.output("Person", table)
+db_generator.output_columns("Person",
+                            ['id','email'],
+                            ['int','str'],
+                            [id, email])
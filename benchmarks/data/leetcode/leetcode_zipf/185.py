@@ -1,6 +1,7 @@
 import random
 
 from database_generator.database_generator import DatabaseGenerator, zipf_transform
+from database_generator.pools import prefixed
 import sys
 
 dbsize = sys.argv[1]
@@ -12,22 +13,15 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 department_num = int(size / 100)
 employee_num = size
 
 d_id_pool = list(range(department_num))
-d_name_pool = ['d_name_' + str(i) for i in range(department_num)]
-e_name_pool = ['e_name_' + str(i) for i in range(int(employee_num * 0.6))]
+d_name_pool = prefixed('d_name_', department_num)
+e_name_pool = prefixed('e_name_', int(employee_num * 0.6))
 salary_pool = list(range(950, 1000))
 
 transformed_d_id_pool = zipf_transform(d_id_pool)
@@ -1,6 +1,7 @@
 import random
-from database_generator.database_generator import DatabaseGenerator, generate_pair, zipf_transform
-from faker import Faker
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.pools import unique_dates
+from database_generator.sampling import ColumnSampler
 import datetime
 import sys
 
@@ -12,18 +13,10 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
                                  problem_id="534")
 
 seed = 2333
-Faker.seed(seed)
-fake = Faker()
 random.seed(seed)
+sampler = ColumnSampler(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 """
@@ -47,26 +40,20 @@ player_num = int(num_row / 200)
 
 player_id_pool = list(range(player_num))
 device_id_pool = list(range(20))
-event_date_pool = [fake.unique.date_between(datetime.date(2009,1,1), datetime.date(2022,11,30)) for _ in range(1000)]
+event_date_pool = unique_dates(datetime.date(2009,1,1), datetime.date(2022,11,30), 1000, sampler.rng)
 games_played_pool = list(range(1,10))
 
-player_id_pool = zipf_transform(player_id_pool)
-event_date_pool = zipf_transform(event_date_pool)
+player_id_pool = sampler.zipf(player_id_pool)
+event_date_pool = sampler.zipf(event_date_pool)
 
 # fill in columns
 
-table = []
-table.append(['player_id','event_date','device_id','games_played'])
-table.append(['int', 'date','int','int'])
-
-pair_set = set()
-
-for i in range(num_row):
-    pair = generate_pair(player_id_pool, event_date_pool)
-    while pair in pair_set:
-        pair = generate_pair(player_id_pool, event_date_pool)
-    pair_set.add(pair)
-    table.append([pair[0], pair[1], random.choice(device_id_pool), random.choice(games_played_pool)])
+player_id, event_date = sampler.distinct_pairs(player_id_pool, event_date_pool, num_row)
+device_id = sampler.choice(device_id_pool, num_row)
+games_played = sampler.choice(games_played_pool, num_row)
 
 # output tables
-db_generator.output("Activity", table)
+db_generator.output_columns("Activity",
+                            ['player_id','event_date','device_id','games_played'],
+                            ['int', 'date','int','int'],
+                            [player_id, event_date, device_id, games_played])
@@ -1,5 +1,6 @@
 import random
 from database_generator.database_generator import DatabaseGenerator, generate_pair, zipf_transform
+from database_generator.pools import prefixed
 import sys
 
 
@@ -13,14 +14,7 @@ db_generator = DatabaseGenerator(size =dbsize, script_file=__file__,
 seed = 2333
 random.seed(seed)
 
-size = 1000000
-
-if dbsize == '10M':
-    size = 10000000
-elif dbsize == '1M':
-    size = 1000000
-elif dbsize == '100K':
-    size = 100000
+size = db_generator.rows
 
 
 """
@@ -41,8 +35,8 @@ Each row of this table indicates the name of a student and the class in which th
 class_size = int(size / 5)
 student_size = 1000
 
-class_pool = ['c_' + str(x) for x in range(class_size)]
-student_pool = ['s_' + str(x) for x in range(student_size)]
+class_pool = prefixed('c_', class_size)
+student_pool = prefixed('s_', student_size)
 
 class_pool = zipf_transform(class_pool)
 student_pool = zipf_transform(student_pool)
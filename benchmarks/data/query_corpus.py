@@ -0,0 +1,105 @@
+"""
+Looks queries up in the packed query corpus (see corpus/pack.py), building
+or refreshing the pack first if needed:
+
+    python3 query_corpus.py query leetcode 1050 4
+    python3 query_corpus.py testcase testIntersectToDistinct
+    python3 query_corpus.py problem leetcode 1050
+    python3 query_corpus.py canonical leetcode 1050 4
+    python3 query_corpus.py dedup --json dedup.json
+    python3 query_corpus.py tree leetcode 1050 4
+    python3 query_corpus.py build
+"""
+
+import argparse
+import json
+import os
+import sys
+from corpus.canonical import canonicalize, dedup_problem, dialect_of, fingerprint, schema_names
+from corpus.pack import DEFAULT_PACK, build_pack, open_corpus
+from corpus.syntax import TreeCache, format_tree
+from database_generator.schema import load_schema
+from generate_all import schemas_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look queries up in the packed query corpus.")
+    parser.add_argument("--pack", default=DEFAULT_PACK, help="pack file (default: cache/queries.pack)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="rebuild the pack from the query files")
+    query = commands.add_parser("query", help="print one query")
+    query.add_argument("benchmark", choices=["leetcode", "calcite"])
+    query.add_argument("problem", help="problem number, or calcite_sales")
+    query.add_argument("query_id", type=int)
+    problem = commands.add_parser("problem", help="print every query of a problem, one 'id,query' per line")
+    problem.add_argument("benchmark", choices=["leetcode", "calcite"])
+    problem.add_argument("problem")
+    testcase = commands.add_parser("testcase", help="print both queries of a calcite testcase")
+    testcase.add_argument("name")
+    commands.add_parser("list", help="print every problem and testcase")
+    canonical = commands.add_parser("canonical", help="print the canonical form and fingerprint of one query")
+    canonical.add_argument("benchmark", choices=["leetcode", "calcite"])
+    canonical.add_argument("problem")
+    canonical.add_argument("query_id", type=int)
+    dedup = commands.add_parser("dedup", help="group the queries of every problem by canonical form")
+    dedup.add_argument("benchmark", nargs="?", choices=["leetcode", "calcite"], help="only this benchmark")
+    dedup.add_argument("problems", nargs="*", help="only these problems")
+    dedup.add_argument("--json", help="write the groups to this JSON file")
+    tree = commands.add_parser("tree", help="print the syntax tree of one query, from the tree cache")
+    tree.add_argument("benchmark", choices=["leetcode", "calcite"])
+    tree.add_argument("problem")
+    tree.add_argument("query_id", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_pack(args.pack)
+    with open_corpus(args.pack) as corpus:
+        try:
+            if args.command == "build":
+                print("%s: %d queries, %d problems, %d testcases"
+                      % (args.pack, len(corpus), len(corpus.problems()), len(corpus.testcases())))
+            elif args.command == "query":
+                print(corpus.query(args.benchmark, args.problem, args.query_id))
+            elif args.command == "problem":
+                for query_id, sql in corpus.problem(args.benchmark, args.problem):
+                    print("%d,%s" % (query_id, sql))
+            elif args.command == "testcase":
+                print("\n".join(corpus.testcase(args.name)))
+            elif args.command == "canonical":
+                sql = corpus.query(args.benchmark, args.problem, args.query_id)
+                names = schema_names(load_schema(os.path.join(schemas_dir(args.benchmark), args.problem + ".json")))
+                form = canonicalize(sql, dialect_of(args.benchmark), names)
+                print("%s %s" % (fingerprint(form), form))
+            elif args.command == "tree":
+                cache = TreeCache()
+                print(format_tree(cache.tree(corpus.query(args.benchmark, args.problem, args.query_id),
+                                             dialect_of(args.benchmark))))
+                cache.save()
+            elif args.command == "dedup":
+                groups = {}
+                for benchmark, problem in corpus.problems():
+                    if args.benchmark in (None, benchmark) and (not args.problems or problem in args.problems):
+                        groups[benchmark + "/" + problem] = dedup_problem(corpus, benchmark, problem,
+                                                                          schemas_dir(benchmark))
+                for key, problem_groups in groups.items():
+                    print("%s: %d queries, %d canonical forms"
+                          % (key, sum(len(g["queries"]) for g in problem_groups.values()), len(problem_groups)))
+                print("total: %d queries, %d canonical forms"
+                      % (sum(len(g["queries"]) for p in groups.values() for g in p.values()),
+                         sum(len(p) for p in groups.values())))
+                if args.json:
+                    with open(args.json, "w") as f:
+                        json.dump(groups, f, indent=2)
+            else:
+                for benchmark, problem in corpus.problems():
+                    print("%s %s" % (benchmark, problem))
+                for name in corpus.testcases():
+                    print("testcase " + name)
+        except KeyError as e:
+            print("not in the corpus: %s" % e.args[0], file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
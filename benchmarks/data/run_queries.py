@@ -0,0 +1,91 @@
+"""
+Times the benchmark queries of each problem on its generated database in
+SQLite (see corpus/execute.py), e.g. after generate_all.py:
+
+    python3 run_queries.py databases/leetcode_zipf/1M/1050 databases/leetcode_zipf/1M/1378 --workers 4
+    python3 run_queries.py databases/leetcode_zipf/1M/614 --queries 1 2 3 --repeat 10 --timeout 5
+    python3 run_queries.py databases/leetcode_zipf/1M/1050 --digest
+
+Prints one line per query with its min, median and 95th percentile time,
+and with --digest the groups of queries that return the same result.
+"""
+
+import argparse
+import json
+import os
+import sys
+from corpus.canonical import dedup_problem, representatives
+from corpus.execute import format_table, latency, load_sqlite, run_queries
+from corpus.pack import DEFAULT_PACK, open_corpus
+from corpus.results import equivalence_classes
+from database_generator.schema import load_schema
+from generate_all import schemas_dir
+from validate_database import guess_schema
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the benchmark queries on generated databases in SQLite.")
+    parser.add_argument("folders", nargs="+", help="output folders holding the CSV files of a database")
+    parser.add_argument("--schema", default=os.environ.get("DBGEN_SCHEMA"),
+                        help="schemas/*.json file (default: $DBGEN_SCHEMA, or the one the folder name points at)")
+    parser.add_argument("--queries", nargs="+", type=int, help="only run these query ids")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of queries run at the same time (default: number of cores)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs of each query first (default: 1)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each query (default: 5)")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="seconds after which a run is interrupted, 0 for none (default: 10)")
+    parser.add_argument("--memory-limit", type=int, help="MB of heap SQLite may use in each worker")
+    parser.add_argument("--dedup", action="store_true",
+                        help="run one query per canonical form (corpus/canonical.py) and copy its times to the others")
+    parser.add_argument("--digest", action="store_true",
+                        help="run each query once more to fingerprint its result (corpus/results.py) and group the "
+                             "queries of each database by result")
+    parser.add_argument("--pack", default=DEFAULT_PACK, help="query pack file (default: cache/queries.pack)")
+    parser.add_argument("--json", help="also write every result, with its run times, to this JSON file")
+    args = parser.parse_args(argv)
+
+    jobs = []
+    same_as = {}
+    with open_corpus(args.pack) as corpus:
+        for folder in args.folders:
+            schema_path = args.schema or guess_schema(folder)
+            if not schema_path:
+                parser.error("no schema found for %s, pass --schema" % folder)
+            schema = load_schema(schema_path)
+            benchmark = "calcite" if schema.problem == "calcite_sales" else "leetcode"
+            print("loading %s" % folder, file=sys.stderr, flush=True)
+            path = load_sqlite(folder, schema)
+            queries = corpus.problem(benchmark, schema.problem)
+            if args.queries:
+                queries = [(i, sql) for i, sql in queries if i in args.queries]
+            if args.dedup:
+                runs = representatives(dedup_problem(corpus, benchmark, schema.problem, schemas_dir(benchmark)))
+                ids = {i for i, _ in queries}
+                same_as.update(((folder, i), runs[i]) for i in ids if runs[i] != i and runs[i] in ids)
+            jobs += [((folder, i), path, sql) for i, sql in queries if (folder, i) not in same_as]
+
+    results = run_queries(jobs, args.workers, args.warmup, args.repeat, args.timeout or None,
+                          args.memory_limit and args.memory_limit << 20, args.digest)
+    for (folder, query_id), run in same_as.items():
+        results[folder, query_id] = dict(results[folder, run], same_as=run)
+    print(format_table([(folder, query_id, results[folder, query_id]) for folder, query_id in sorted(results)]))
+    if args.digest:
+        for folder in args.folders:
+            classes = equivalence_classes({i: r["digest"] for (f, i), r in results.items() if f == folder})
+            print("%s: %d distinct results" % (folder, len(classes)))
+            for query_ids in classes:
+                print("    %s" % " ".join(map(str, query_ids)))
+
+    if args.json:
+        summary = []
+        for (folder, query_id), result in sorted(results.items()):
+            minimum, median, p95 = latency(result["times"])
+            summary.append(dict(result, folder=folder, query=query_id, min=minimum, median=median, p95=p95))
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if any(r["status"] != "ok" for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
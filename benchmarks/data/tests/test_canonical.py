@@ -0,0 +1,44 @@
+from corpus.canonical import canonicalize, dedup, representatives, tokenize
+
+NAMES = {'employee', 'dept', 'name', 'id', 'salary'}
+
+
+def test_spelling_does_not_matter():
+    a = "SELECT  Name AS n FROM Employee AS e INNER JOIN Dept d ON e.id=d.id -- the names\n;"
+    b = "select name n from employee e join dept as d on e.id = d.id"
+    assert canonicalize(a, names=NAMES) == canonicalize(b, names=NAMES) == \
+        'select name c1 from employee t1 join dept t2 on t1.id = t2.id'
+
+
+def test_optional_words_and_operators():
+    assert canonicalize("select * from t left outer join u using (id) where a != 1") == \
+        'select * from t left join u using (id) where a <> 1'
+    assert canonicalize("SELECT e.`Name` FROM `Employee` e /* c */ WHERE e.salary > .5") == \
+        'select t1.name from employee t1 where t1.salary > 0.5'
+
+
+def test_quotes_follow_the_dialect():
+    # a string in mysql, a case sensitive name in ansi
+    assert canonicalize('select "a b", "x" from t') == "select 'a b', 'x' from t"
+    assert canonicalize('select "a b", "x" from t', 'ansi') == 'select "a b", "x" from T'
+
+
+def test_words_that_are_not_aliases():
+    assert canonicalize("select cast(x as double precision) from t", 'ansi') == 'select cast(X as DOUBLE PRECISION) from T'
+    assert canonicalize("select date_add(d, interval 1 day) from t") == 'select date_add(d, interval 1 day) from t'
+    assert canonicalize("select left(name, 2), count(*) from t group by 1") == \
+        'select left(name, 2), count(*) from t group by 1'
+    assert [t.kind for t in tokenize("select left(x) from a left join b")][1:3] == ['function', 'punct']
+
+
+def test_names_of_the_schema_are_kept():
+    # e is an alias, salary a column: renaming salary would merge different queries
+    assert canonicalize("select e.salary from employee e", names=NAMES) == 'select t1.salary from employee t1'
+    assert canonicalize("select salary s from employee", names=NAMES) != \
+        canonicalize("select name s from employee", names=NAMES)
+
+
+def test_dedup_groups():
+    groups = dedup([(3, "select a from t"), (1, "SELECT a FROM t;"), (2, "select b from t")])
+    assert [g["queries"] for g in groups.values()] == [[1, 3], [2]]
+    assert representatives(groups) == {1: 1, 3: 1, 2: 2}
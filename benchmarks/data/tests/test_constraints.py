@@ -0,0 +1,64 @@
+import pytest
+from database_generator.constraints import Constraints, Implies, NotEqual, Ordered, parse_constraints
+from database_generator.schema import Column, ForeignKey, Schema, Table
+
+RULES = """col_val: Parent.score > 100.01; Child.low <- [1, 5]; Child.flag = Y
+  Child.high | int+null; (s) Child.low < 3; Parent.id -> {1, 2}
+col_dep: Child.low < Child.high; Child.low != Child.high; Child.low > Parent.score
+  Child.low != 1 => Child.high = null
+row_dep: unique(Child.low, Child.high); inc(Parent.id); unique(Parent.id, Child.low); nonsense(x)
+"""
+
+
+def compiled(text=RULES):
+    schema = Schema('test', [
+        Table('Parent', [Column('id', 'int')], [], [Column('score', 'decimal'), Column('day', 'date')]),
+        Table('Child', [Column('cid', 'int')], [ForeignKey('pid', 'Parent', 'id')],
+              [Column('low', 'int'), Column('high', 'int'), Column('flag', 'enum,Y,N')]),
+        Table('Other', [Column('oid', 'int')], [], [Column('amount', 'int')]),
+    ])
+    return Constraints(schema).compile(parse_constraints(text))
+
+
+def test_value_rules_become_options():
+    options = compiled().options
+    assert options['Child.low'] == {'low': 1, 'high': 5}
+    assert options['Child.flag'] == {'values': ['Y']}
+    assert options['Child.high'] == {'null_prob': 0.2}
+    assert options['Parent.score']['low'] == pytest.approx(100.02)
+    # lone int keys already hold 1 and 2
+    assert 'inject' not in options.get('Parent.id', {})
+
+
+def test_row_rules_become_row_functions():
+    constraints = compiled()
+    assert constraints.unique == {'Child': [['low', 'high']]}
+    assert constraints.options['Parent.id']['sequence']
+    # compared with the rows that reference it, so it has to be a row function
+    assert constraints.options['Parent.score']['row_function']
+
+
+def test_dependencies_become_fixes_implications_last():
+    fixes = compiled().fixes['Child']
+    assert [type(f) for f in fixes] == [Ordered, NotEqual, Ordered, Implies]
+    assert fixes[2].via == 'pid'
+
+
+def test_unsupported_rules_are_listed():
+    unenforced = dict(compiled().unenforced)
+    assert set(unenforced) == {'unique(Parent.id, Child.low)', 'nonsense(x)', '(s) Child.low < 3'}
+    assert 'key column' in unenforced['(s) Child.low < 3']
+
+
+def test_ranges_between_unrelated_tables_are_kept_apart():
+    options = compiled("col_val: Parent.score <- [10, 20]\ncol_dep: Other.amount > Parent.score").options
+    assert options['Other.amount']['low'] == 21
+    options = compiled("col_dep: Other.amount < Child.high").options
+    assert (options['Other.amount']['half'], options['Child.high']['half']) == (0, 1)
+
+
+def test_rules_outside_of_a_section():
+    with pytest.raises(ValueError):
+        parse_constraints("unique(a)")
+    with pytest.raises(ValueError):
+        parse_constraints("checks: a < b")
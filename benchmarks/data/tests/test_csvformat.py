@@ -0,0 +1,47 @@
+import csv
+import datetime
+import io
+import numpy as np
+from database_generator.csvformat import format_rows
+
+
+def writer_output(columns):
+    f = io.StringIO()
+    csv.writer(f).writerows(zip(*columns))
+    return f.getvalue()
+
+
+def check(columns, types):
+    assert format_rows(columns, types) == writer_output(columns)
+
+
+def test_typed_arrays():
+    rng = np.random.default_rng(2333)
+    days = np.datetime64('2020-01-01') + rng.integers(0, 400, 50)
+    check([rng.integers(-5, 5, 50), rng.integers(0, 10 ** 12, 50), days, rng.random(50),
+           np.array(['a', 'b,c', 'd"e', 'f\ng', ''] * 10)],
+          ['int', 'int', 'date', 'decimal', 'varchar'])
+
+
+def test_lists_with_nulls_and_mixed_values():
+    check([[1, None, 3, -4], ['x', '', None, 'a,b'], [1.5, 2, None, float('inf')], [True, False, 'y', 0]],
+          ['int', 'varchar', 'decimal', 'bool'])
+
+
+def test_date_columns():
+    dates = [datetime.date(2020, 1, 1), '', datetime.date(1999, 12, 31), 'a,b', 'say "hi"']
+    check([dates, list(range(5))], ['date', 'int'])
+    check([[datetime.date(2020, 1, 2)] * 3, [1, 2, 3]], ['date', 'int'])
+    # NaT and days outside of 0001..9999 leave the lookup table path
+    check([np.array(['2020-01-01', 'NaT'], dtype='datetime64[D]'), [1, 2]], ['date', 'int'])
+    check([np.array(['2020-01-01', '10000-01-01'], dtype='datetime64[D]'), [1, 2]], ['date', 'int'])
+    check([np.array(['2020-01-01T10:00', 'NaT'], dtype='datetime64[s]'), [1, 2]], ['date', 'int'])
+
+
+def test_one_column_with_empty_fields():
+    check([['', 'a', '']], ['varchar'])
+    check([np.array(['', 'a'])], ['varchar'])
+
+
+def test_empty_chunk():
+    assert format_rows([[], []], ['int', 'int']) == ''
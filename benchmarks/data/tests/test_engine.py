@@ -0,0 +1,19 @@
+import os
+import numpy as np
+from database_generator.engine import SchemaGenerator, default_domain
+from database_generator.schema import load_schema
+from generate_all import schemas_dir
+
+
+def test_decimal_domains_are_whole_cents():
+    # the low bound a "> 100.01" rule gives
+    domain = default_domain('price', 'decimal', 100, low=100.01 + 0.01, high=200)
+    values = domain.render(np.arange(domain.size))
+    assert values[0] == 100.02 and values[-1] == 200
+    assert all(len(repr(v)) <= 6 for v in values.tolist())
+
+
+def test_foreign_keys_into_part_of_a_composite_key_are_reported():
+    schema = load_schema(os.path.join(schemas_dir('leetcode'), '1495.json'))
+    unenforced = SchemaGenerator(schema, 5000).unenforced
+    assert [rule for rule, _ in unenforced] == ['foreign key Content.content_id -> TVProgram.content_id']
@@ -0,0 +1,58 @@
+import numpy as np
+from database_generator.database_generator import DatabaseGenerator
+from database_generator.parallel import generate_rows, generate_shards, make_shards
+from database_generator.sampling import ZipfSampler
+
+TOTAL = 10500
+SHARD_ROWS = 1000
+NAMES = ['id', 'price', 'brand']
+TYPES = ['int', 'int', 'str']
+brands = ZipfSampler(np.array(['brand_%d' % i for i in range(40)]))
+
+
+# module level, so the worker processes can unpickle it
+def build(shard):
+    return [shard.rows, shard.rng('price').integers(0, 1000, shard.size), brands.sample(shard.size, shard.rng('brand'))]
+
+
+def cheap(columns):
+    return columns[1] < 500
+
+
+def table(workers, where=None):
+    chunks = list(generate_shards(build, make_shards('T', TOTAL, shard_rows=SHARD_ROWS), workers, where))
+    return [np.concatenate([chunk[i] for chunk in chunks]) for i in range(len(NAMES))]
+
+
+def test_workers_do_not_change_the_rows():
+    one = table(1)
+    assert len(one[0]) == TOTAL
+    assert all(np.array_equal(a, b) for a, b in zip(one, table(4)))
+    assert all(np.array_equal(a, b) for a, b in zip(table(1, cheap), table(4, cheap)))
+
+
+def test_generate_rows_is_a_slice_of_the_table():
+    whole = table(1)
+    for start, stop in ((0, 10), (995, 2005), (10400, TOTAL), (3000, 3000)):
+        rows = generate_rows(build, 'T', TOTAL, start, stop, shard_rows=SHARD_ROWS)
+        if start == stop:
+            assert rows == []
+        else:
+            assert all(np.array_equal(a[start:stop], b) for a, b in zip(whole, rows))
+
+
+def written(tmp_path, monkeypatch, workers):
+    monkeypatch.chdir(tmp_path / str(workers))
+    generator = DatabaseGenerator(size=str(TOTAL), problem_id="test", script_file=__file__, formats=['csv'],
+                                  workers=workers)
+    generator.output_sharded('T', NAMES, TYPES, TOTAL, build, shard_rows=SHARD_ROWS)
+    with open(generator.output_dir + "/T.csv", "rb") as f:
+        return f.read()
+
+
+def test_output_sharded_files_are_the_same_for_any_number_of_workers(tmp_path, monkeypatch):
+    (tmp_path / "1").mkdir()
+    (tmp_path / "4").mkdir()
+    one = written(tmp_path, monkeypatch, 1)
+    assert one.count(b"\n") == TOTAL + 2
+    assert written(tmp_path, monkeypatch, 4) == one
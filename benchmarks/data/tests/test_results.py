@@ -0,0 +1,33 @@
+"""Run from benchmarks/data: python3 -m pytest tests"""
+
+import random
+from corpus.results import ResultDigest
+
+
+def bag_digest(batches):
+    digest = ResultDigest()
+    for rows in batches:
+        digest.add_rows(rows)
+    return digest.digest()
+
+
+def test_mixed_types_hash_the_same_in_any_batch():
+    assert bag_digest([[(1,)], [('a',)]]) == bag_digest([[('a',), (1,)]])
+    assert bag_digest([[(1,)], [(2 ** 63,)]]) == bag_digest([[(1,), (2 ** 63,)]])
+    assert bag_digest([[(2.0,)], [('2',)]]) == bag_digest([[('2',), (2.0,)]])
+
+
+def test_bag_digest_ignores_batch_boundaries_and_order():
+    values = [None, 0, -1, 7, 2 ** 63, -2 ** 64, 7.0, 0.1, -0.0, float('inf'), 'a', '', 'a,b', b'a', b'\x00']
+    rows = [(v, w) for v in values for w in values]
+    expected = bag_digest([rows])
+    shuffled = random.Random(2333).sample(rows, len(rows))
+    for size in (1, 2, 7, 50):
+        assert bag_digest([shuffled[i:i + size] for i in range(0, len(shuffled), size)]) == expected
+
+
+def test_equal_values_of_different_types():
+    assert bag_digest([[(3,)]]) == bag_digest([[(3.0,)]])
+    assert bag_digest([[(0.1 + 0.2,)]]) == bag_digest([[(0.3,)]])
+    assert bag_digest([[(3,)]]) != bag_digest([[('3',)]])
+    assert bag_digest([[(None,)]]) != bag_digest([[(0,)]])
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from database_generator.sampling import AliasSampler, ColumnSampler, ZipfSampler, sample_distinct_pairs
+
+
+def pairs(first, second):
+    return list(zip(first.tolist(), second.tolist()))
+
+
+def test_sampler_marginals_give_distinct_pairs():
+    # two default samplers used to draw the same stream: only (i, i) pairs, and no end
+    drawn = pairs(*sample_distinct_pairs(ZipfSampler(range(100)), ZipfSampler(range(100)), 2000))
+    assert len(drawn) == len(set(drawn)) == 2000
+    assert all(0 <= a < 100 and 0 <= b < 100 for a, b in drawn)
+
+
+def test_all_pairs_of_a_skewed_pool():
+    first = AliasSampler(['a', 'b', 'c'], [10, 1, 1])
+    drawn = pairs(*sample_distinct_pairs(first, range(4), 12, rng=7))
+    assert sorted(drawn) == [(a, b) for a in 'abc' for b in range(4)]
+
+
+def test_equal_pairs_and_repeated_values():
+    drawn = pairs(*sample_distinct_pairs([1, 2, 2, 3], [2, 3, 3], 4, allow_equal=False))
+    assert sorted(drawn) == [(1, 2), (1, 3), (2, 3), (3, 2)]
+    with pytest.raises(ValueError):
+        sample_distinct_pairs([1, 2], [1, 2], 3, allow_equal=False)
+    with pytest.raises(ValueError):
+        sample_distinct_pairs(range(3), range(3), 10)
+
+
+def test_same_rng_same_pairs():
+    first = pairs(*ColumnSampler(5).distinct_pairs(ZipfSampler(range(50)), range(30), 500))
+    second = pairs(*ColumnSampler(5).distinct_pairs(ZipfSampler(range(50)), range(30), 500))
+    assert first == second
+
+
+def test_default_samplers_draw_different_streams():
+    assert not np.array_equal(ZipfSampler(range(1000)).sample(100), ZipfSampler(range(1000)).sample(100))
@@ -0,0 +1,62 @@
+"""
+Checks generated databases against their schema and constraints files
+(see database_generator/validate.py), e.g. after generate_all.py:
+
+    python3 validate_database.py databases/calcite_zipf/calcite_4M/calcite_sales --workers 6
+    python3 validate_database.py output --schema ../LeetCode/schemas/1098.json
+
+Exits with 1 if any check fails.
+"""
+
+import argparse
+import json
+import os
+import sys
+from database_generator.schema import load_schema
+from database_generator.validate import DatabaseValidator, format_report
+from generate_all import schemas_dir
+from generate_schema import default_constraints
+
+
+def guess_schema(folder):
+    # databases/leetcode_zipf/1M/1098 -> ../LeetCode/schemas/1098.json
+    parts = os.path.abspath(folder).split(os.sep)
+    if len(parts) < 3:
+        return None
+    path = os.path.join(schemas_dir(parts[-3].split("_")[0]), parts[-1] + ".json")
+    return path if os.path.exists(path) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check generated databases against their schema and constraints.")
+    parser.add_argument("folders", nargs="+", help="output folders holding the CSV files of a database")
+    parser.add_argument("--schema", default=os.environ.get("DBGEN_SCHEMA"),
+                        help="schemas/*.json file (default: $DBGEN_SCHEMA, or the one the folder name points at)")
+    parser.add_argument("--constraints", default=os.environ.get("DBGEN_CONSTRAINTS"),
+                        help="constraints/*.yml file (default: $DBGEN_CONSTRAINTS, or the one next to the schema)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of tables checked at the same time (default: number of cores)")
+    parser.add_argument("--json", help="also write the reports to this JSON file")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for folder in args.folders:
+        schema_path = args.schema or guess_schema(folder)
+        if not schema_path:
+            parser.error("no schema found for %s, pass --schema" % folder)
+        constraints_path = args.constraints or default_constraints(schema_path)
+        constraints_text = None
+        if constraints_path:
+            with open(constraints_path) as f:
+                constraints_text = f.read()
+        report = DatabaseValidator(folder, load_schema(schema_path), constraints_text).validate(args.workers)
+        print(format_report(report), flush=True)
+        reports.append(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 1 if any(r["failed"] for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())